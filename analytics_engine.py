@@ -0,0 +1,268 @@
+import os
+import sys
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from api_client import api_client, APIClient
+
+# Sentiment scores (-1..1) above/below these bounds count as positive/negative
+POSITIVE_THRESHOLD = 0.25
+NEGATIVE_THRESHOLD = -0.25
+
+# A numeric churn_risk at or above this raises a churn alert
+CHURN_RISK_THRESHOLD = 0.7
+
+# Statuses meaning the employee answered the check-in
+RESPONDED_STATUSES = ["responded", "completed", "escalated"]
+
+
+def _to_timestamp(value: date) -> pd.Timestamp:
+    """Naive UTC timestamp for the start of a date"""
+    return pd.Timestamp(value).tz_localize(None).normalize()
+
+
+def records_to_frame(records: List[Dict[str, Any]],
+                     employee_sites: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Normalize raw check-in records into the engine's columnar layout"""
+    if not records:
+        return pd.DataFrame({
+            "id": pd.Series(dtype="string"),
+            "created_at": pd.Series(dtype="datetime64[ns]"),
+            "agent_id": pd.Series(dtype="category"),
+            "employee_id": pd.Series(dtype="string"),
+            "site": pd.Series(dtype="category"),
+            "flow_name": pd.Series(dtype="category"),
+            "responded": pd.Series(dtype="bool"),
+            "sentiment_score": pd.Series(dtype="float64"),
+            "sentiment": pd.Series(dtype="category"),
+            "churn_alert": pd.Series(dtype="bool")
+        })
+
+    raw = pd.DataFrame.from_records(records)
+    n = len(raw)
+
+    def column(name: str, default: Any = None) -> pd.Series:
+        return raw[name] if name in raw else pd.Series([default] * n, index=raw.index)
+
+    frame = pd.DataFrame(index=raw.index)
+    frame["id"] = column("id").astype("string")
+    frame["created_at"] = pd.to_datetime(column("created_at"), utc=True, errors="coerce").dt.tz_localize(None)
+    frame["agent_id"] = column("agent_id").astype("string")
+    frame["employee_id"] = column("employee_id").astype("string")
+
+    site = column("site_location")
+    if employee_sites:
+        site = site.fillna(frame["employee_id"].map(employee_sites))
+    frame["site"] = site.fillna("Unknown").astype("string")
+    frame["flow_name"] = column("flow_name").astype("string")
+
+    status = column("status", "").fillna("").astype("string").str.lower()
+    frame["responded"] = status.isin(RESPONDED_STATUSES).to_numpy() | column("responded_at").notna().to_numpy()
+
+    score = pd.to_numeric(column("sentiment_score"), errors="coerce")
+    frame["sentiment_score"] = score
+    label = column("sentiment").astype("string").str.lower()
+    derived = np.select([score >= POSITIVE_THRESHOLD, score <= NEGATIVE_THRESHOLD, score.notna()],
+                        ["positive", "negative", "neutral"], default="")
+    frame["sentiment"] = label.fillna(pd.Series(derived, index=raw.index)).replace("", pd.NA)
+
+    churn = column("churn_risk")
+    churn_numeric = pd.to_numeric(churn, errors="coerce")
+    churn_flag = churn.map(lambda v: v is True)
+    frame["churn_alert"] = (
+        (churn_numeric >= CHURN_RISK_THRESHOLD).to_numpy()
+        | churn_flag.to_numpy(dtype=bool)
+        | column("escalated", False).fillna(False).astype(bool).to_numpy()
+    )
+
+    for col in ["agent_id", "site", "flow_name", "sentiment"]:
+        frame[col] = frame[col].astype("category")
+    return frame.dropna(subset=["created_at"])
+
+
+class CheckinAnalytics:
+    """Local analytics over raw check-in records.
+
+    Records are pulled page by page for the requested date window and kept in
+    one DataFrame. Widening the window only fetches the missing range, and
+    computed rollups are memoized per filter, so changing a site/agent/date
+    filter inside the loaded window never goes back to the backend.
+    """
+
+    def __init__(self, token: str, client: APIClient = api_client,
+                 employee_sites: Optional[Dict[str, str]] = None):
+        self.token = token
+        self.client = client
+        self.employee_sites = employee_sites or {}
+        self._spill_path: Optional[str] = None
+        self.frame = records_to_frame([])
+        self.window: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None
+        self._rollups: Dict[Tuple, Any] = {}
+
+    # ============ MEMORY ============
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Loaded check-ins (read back from disk first if they were spilled)"""
+        if self._spill_path is not None:
+            self._frame = pd.read_pickle(self._spill_path)
+            self._discard_spill()
+        return self._frame
+
+    @frame.setter
+    def frame(self, value: pd.DataFrame):
+        self._discard_spill()
+        self._frame = value
+
+    def _discard_spill(self):
+        if self._spill_path is not None and os.path.exists(self._spill_path):
+            os.remove(self._spill_path)
+        self._spill_path = None
+
+    def memory_bytes(self) -> int:
+        """Memory held by loaded check-ins and memoized rollups"""
+        if self._spill_path is not None:
+            return sys.getsizeof(self._rollups)
+        return int(self._frame.memory_usage(deep=True).sum()) + sum(sys.getsizeof(v) for v in self._rollups.values())
+
+    def spill(self, directory: str) -> int:
+        """Move loaded check-ins to disk and drop memoized rollups; returns bytes freed.
+
+        The loaded window is kept, so the next query reads the frame back
+        instead of refetching it.
+        """
+        before = self.memory_bytes()
+        self._rollups.clear()
+        if self._spill_path is None and not self._frame.empty:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"checkins_{id(self):x}.pkl")
+            self._frame.to_pickle(path)
+            self._spill_path = path
+            self._frame = records_to_frame([])
+        return before - self.memory_bytes()
+
+    # ============ LOADING ============
+
+    def _fetch(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Fetch check-ins created in [start, end) as a frame"""
+        pages = [
+            records_to_frame(records, self.employee_sites)
+            for records in self.client.iter_checkins(self.token, since=start.isoformat(), until=end.isoformat())
+        ]
+        if not pages:
+            return records_to_frame([])
+        return pd.concat(pages, ignore_index=True)
+
+    def ensure_loaded(self, start: date, end: date):
+        """Make sure every check-in between start and end (inclusive dates) is loaded"""
+        start_ts, end_ts = _to_timestamp(start), _to_timestamp(end) + timedelta(days=1)
+
+        if self.window is None:
+            missing = [(start_ts, end_ts)]
+        else:
+            loaded_start, loaded_end = self.window
+            missing = []
+            if start_ts < loaded_start:
+                missing.append((start_ts, loaded_start))
+            if end_ts > loaded_end:
+                missing.append((loaded_end, end_ts))
+            start_ts, end_ts = min(start_ts, loaded_start), max(end_ts, loaded_end)
+
+        if not missing:
+            return
+
+        frames = [self.frame] + [self._fetch(lo, hi) for lo, hi in missing]
+        frames = [f for f in frames if not f.empty]
+        if frames:
+            combined = pd.concat(frames, ignore_index=True)
+            for col in ["agent_id", "site", "flow_name", "sentiment"]:
+                combined[col] = combined[col].astype("category")
+            self.frame = combined.drop_duplicates(subset=["id"], keep="last").reset_index(drop=True)
+        self.window = (start_ts, end_ts)
+        self._rollups.clear()
+
+    def refresh(self):
+        """Drop loaded data so the next query refetches"""
+        self.frame = records_to_frame([])
+        self.window = None
+        self._rollups.clear()
+
+    # ============ QUERIES ============
+
+    def _select(self, start: date, end: date, sites: Iterable[str] = (),
+                agents: Iterable[str] = ()) -> pd.DataFrame:
+        """Rows matching the filters (loads the date window if needed)"""
+        self.ensure_loaded(start, end)
+        frame = self.frame
+        mask = ((frame["created_at"] >= _to_timestamp(start))
+                & (frame["created_at"] < _to_timestamp(end) + timedelta(days=1)))
+        sites, agents = list(sites), list(agents)
+        if sites:
+            mask &= frame["site"].isin(sites)
+        if agents:
+            mask &= frame["agent_id"].isin(agents)
+        return frame[mask]
+
+    def _memoized(self, name: str, start: date, end: date, sites: Iterable[str],
+                  agents: Iterable[str], compute, *extra):
+        """Compute a rollup once per distinct filter combination"""
+        key = (name, start, end, tuple(sorted(sites)), tuple(sorted(agents))) + extra
+        if key not in self._rollups:
+            self._rollups[key] = compute(self._select(start, end, sites, agents))
+        return self._rollups[key]
+
+    def sites(self) -> List[str]:
+        """Sites present in the loaded data"""
+        return sorted(self.frame["site"].dropna().unique().tolist())
+
+    def summary(self, start: date, end: date, sites: Iterable[str] = (),
+                agents: Iterable[str] = ()) -> Dict[str, Any]:
+        """Check-ins sent, response rate, average sentiment and churn alerts"""
+        def compute(rows: pd.DataFrame) -> Dict[str, Any]:
+            sent = len(rows)
+            return {
+                "check_ins_sent": sent,
+                "response_rate": float(rows["responded"].mean()) if sent else 0.0,
+                "avg_sentiment": float(rows["sentiment_score"].mean()) if rows["sentiment_score"].notna().any() else 0.0,
+                "churn_alerts": int(rows["churn_alert"].sum())
+            }
+        return self._memoized("summary", start, end, sites, agents, compute)
+
+    def sentiment_distribution(self, start: date, end: date, sites: Iterable[str] = (),
+                               agents: Iterable[str] = ()) -> pd.Series:
+        """Count of responses per sentiment label"""
+        def compute(rows: pd.DataFrame) -> pd.Series:
+            counts = rows["sentiment"].value_counts()
+            return counts.reindex(["positive", "neutral", "negative"], fill_value=0).rename(str.title)
+        return self._memoized("sentiment", start, end, sites, agents, compute)
+
+    def response_rate_trend(self, start: date, end: date, sites: Iterable[str] = (),
+                            agents: Iterable[str] = (), freq: str = "W") -> pd.Series:
+        """Response rate (%) per period, vectorized with a time group-by"""
+        def compute(rows: pd.DataFrame) -> pd.Series:
+            grouped = rows.groupby(pd.Grouper(key="created_at", freq=freq))["responded"].mean()
+            return (grouped * 100).round(1).dropna()
+        return self._memoized("trend", start, end, sites, agents, compute, freq)
+
+    def breakdown(self, by: str, start: date, end: date, sites: Iterable[str] = (),
+                  agents: Iterable[str] = ()) -> pd.DataFrame:
+        """Per-site or per-agent check-ins, response rate and churn alerts"""
+        def compute(rows: pd.DataFrame) -> pd.DataFrame:
+            return rows.groupby(by, observed=True).agg(
+                check_ins=("id", "size"),
+                response_rate=("responded", "mean"),
+                avg_sentiment=("sentiment_score", "mean"),
+                churn_alerts=("churn_alert", "sum")
+            ).sort_values("check_ins", ascending=False)
+        return self._memoized("breakdown", start, end, sites, agents, compute, by)
+
+    def churn_alerts(self, start: date, end: date, sites: Iterable[str] = (),
+                     agents: Iterable[str] = ()) -> pd.DataFrame:
+        """Check-ins that raised a churn alert, newest first"""
+        def compute(rows: pd.DataFrame) -> pd.DataFrame:
+            alerts = rows[rows["churn_alert"]]
+            return alerts.sort_values("created_at", ascending=False)[
+                ["created_at", "employee_id", "agent_id", "site", "sentiment_score", "flow_name"]
+            ]
+        return self._memoized("churn", start, end, sites, agents, compute)
@@ -1,8 +1,23 @@
 import requests
+from requests.adapters import HTTPAdapter
+from http.cookiejar import DefaultCookiePolicy
 import json
-from typing import Optional, Dict, Any, List
+import re
+import base64
+import gzip
+import hashlib
+import math
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Hashable, Iterator
 import streamlit as st
 import os
+from http_cache import HTTPCache, CachingAdapter
+from cassette import Cassette, RecordingAdapter, ReplayAdapter
+from metrics import api_metrics, current_page, endpoint_template, run_in_page
+from auth import TokenManager
+import json_codec
+import profiling
 
 # API base URL - use environment variable or default to production
 API_BASE_URL = os.getenv(
@@ -10,19 +25,233 @@ API_BASE_URL = os.getenv(
     "https://cxai-backend-prod-6e43ca701a40.herokuapp.com/v1"
 )
 
+# Upper bound on parallel requests issued by one fan-out call
+MAX_CONCURRENT_REQUESTS = 8
+
+# Optional on-disk cache of GET responses (e.g. ".cxai_data/http_cache.sqlite3"); off when unset
+HTTP_CACHE_PATH = os.getenv("API_HTTP_CACHE")
+
+# Gzip JSON request bodies at least this large (opt-in: the backend must accept Content-Encoding: gzip)
+COMPRESS_REQUESTS = os.getenv("API_COMPRESS_REQUESTS") == "1"
+COMPRESS_MIN_BYTES = 16 * 1024
+
+# Rows per request to the bulk employee endpoint; batches go out in parallel
+BULK_BATCH_SIZE = 500
+
+# Documents fetched per page when syncing the local document index
+DOCUMENT_PAGE_SIZE = 500
+
+# Optional record/replay of all API traffic, for reproducible offline benchmarks
+CASSETTE_PATH = os.getenv("API_CASSETTE")
+CASSETTE_MODE = os.getenv("API_CASSETTE_MODE", "replay")
+CASSETTE_LATENCY = os.getenv("API_CASSETTE_LATENCY", "recorded")
+
+
+def run_concurrently(calls: Dict[Hashable, Callable[[], Any]],
+                     max_workers: int = MAX_CONCURRENT_REQUESTS) -> Dict[Hashable, Any]:
+    """Run zero-argument calls in parallel; each result is the return value or the raised exception"""
+    results = {}
+    if not calls:
+        return results
+    page = current_page.get()
+    with profiling.phase("api"), ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+        futures = {key: executor.submit(run_in_page, page, call) for key, call in calls.items()}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = e
+    return results
+
+
+class APISession(requests.Session):
+    """Session that encodes JSON bodies with json_codec and times calls as API wait.
+
+    Bodies of COMPRESS_MIN_BYTES or more are gzipped when compress_requests
+    is set. Responses are compressed whenever the backend supports it, since
+    requests already sends Accept-Encoding: gzip, deflate (plus br when
+    brotli is installed).
+    """
+
+    def __init__(self, compress_requests: bool = COMPRESS_REQUESTS):
+        super().__init__()
+        self.compress_requests = compress_requests
+
+    def request(self, method, url, json=None, data=None, headers=None, **kwargs):
+        if json is not None:
+            data = json_codec.dumps(json)
+            headers = dict(headers or {}, **{"Content-Type": "application/json"})
+            if self.compress_requests and len(data) >= COMPRESS_MIN_BYTES:
+                data = gzip.compress(data, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+        with profiling.phase("api"):
+            return super().request(method, url, data=data, headers=headers, **kwargs)
+
+
+class NDJSONBody:
+    """Streamed request body of one JSON document per line, optionally gzipped.
+
+    Encoded lazily as it is sent (chunked transfer encoding) and can be
+    iterated again, so a request carrying it can be re-sent after a 401.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], compress: bool = False, rows_per_chunk: int = 100):
+        self.rows = rows
+        self.compress = compress
+        self.rows_per_chunk = rows_per_chunk
+        self.bytes_sent = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.bytes_sent = 0
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if self.compress else None
+        for start in range(0, len(self.rows), self.rows_per_chunk):
+            chunk = b"".join(json_codec.dumps(row) + b"\n" for row in self.rows[start:start + self.rows_per_chunk])
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                self.bytes_sent += len(chunk)
+                yield chunk
+        if compressor:
+            tail = compressor.flush()
+            self.bytes_sent += len(tail)
+            yield tail
+
+
+class BulkNotSupported(Exception):
+    """The backend has no bulk employee endpoint"""
+
+
+def decode_token_claims(token: str) -> Dict[str, Any]:
+    """Read a JWT's payload without verifying it (the backend does that); {} if not a JWT"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims if isinstance(claims, dict) else {}
+    except Exception:
+        return {}
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Unix time a JWT expires at, from its exp claim (None if absent)"""
+    exp = decode_token_claims(token).get("exp")
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def tenant_id(token: str) -> str:
+    """Stable id of the tenant a token belongs to, safe for use in file names"""
+    claims = decode_token_claims(token)
+    tenant = claims.get("customer_id") or claims.get("tenant_id") or claims.get("sub") or token
+    return hashlib.sha256(str(tenant).encode()).hexdigest()[:16]
+
+
+def _same_value(old: Any, new: Any) -> bool:
+    if isinstance(old, float) or isinstance(new, float):
+        try:
+            return math.isclose(float(old), float(new), abs_tol=1e-9)
+        except (TypeError, ValueError):
+            return False
+    # A field the backend left unset matches an empty form value
+    if old in (None, "", [], {}) and new in (None, "", [], {}):
+        return True
+    return old == new
+
+
+def changed_fields(current: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of updates whose values differ from the record as last fetched"""
+    return {field: value for field, value in updates.items() if not _same_value(current.get(field), value)}
+
+
+def employee_identity(employee: Dict[str, Any]) -> str:
+    """Key identifying a person across agents: phone digits, then email, then record id"""
+    phone = re.sub(r"\D", "", str(employee.get("phone") or ""))
+    if phone:
+        return f"phone:{phone}"
+    email = str(employee.get("email") or "").strip().lower()
+    if email:
+        return f"email:{email}"
+    return f"id:{employee.get('id')}"
+
+
 class APIClient:
     """Client for calling FastAPI backend"""
 
-    def __init__(self, base_url: str = API_BASE_URL):
+    def __init__(self, base_url: str = API_BASE_URL, cache_path: Optional[str] = HTTP_CACHE_PATH):
         self.base_url = base_url
+        self.http_cache = HTTPCache(cache_path) if cache_path else None
+
+        # One pooled session for all calls; sized for prefetch/fan-out concurrency
+        self.session = APISession()
+        # The client is shared by every tenant on the server - never carry cookies between them
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        pool_size = MAX_CONCURRENT_REQUESTS * 2
+        if self.http_cache:
+            adapter = CachingAdapter(self.http_cache, tenant_of=tenant_id, pool_connections=pool_size,
+                                     pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.metrics = api_metrics
+        self.session.hooks["response"].append(self._retry_unauthorized)
+        self.session.hooks["response"].append(self.metrics.hook)
+
+        # Access tokens are renewed ahead of expiry; callers can keep passing the one they logged in with
+        self.tokens = TokenManager(self.refresh_access_token, token_expiry)
+
+        # Whether POST /employees/bulk exists; None until the first bulk call finds out
+        self.bulk_supported: Optional[bool] = None
+
+        if CASSETTE_PATH:
+            self.use_cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY)
+
+    def use_cassette(self, path: str, mode: str = "replay", latency: str = "recorded",
+                     latency_ms: float = 0, jitter_ms: float = 0) -> Cassette:
+        """Record all traffic to, or replay it from, a cassette file.
+
+        "record" still talks to the backend and appends each scrubbed exchange;
+        "replay" never touches the network. See cassette.ReplayAdapter for the
+        latency options.
+        """
+        cassette = Cassette(path, self.base_url)
+        if mode == "record":
+            adapter = RecordingAdapter(cassette, self.session.get_adapter(self.base_url))
+        elif mode == "replay":
+            adapter = ReplayAdapter(cassette, latency, latency_ms, jitter_ms)
+            # Replayed tokens keep their recorded expiry and are never checked - renewing would add calls
+            self.tokens.enabled = False
+        else:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        return cassette
 
     def get_headers(self, token: Optional[str] = None) -> Dict[str, str]:
         """Get headers with auth token"""
         headers = {"Content-Type": "application/json"}
         if token:
-            headers["Authorization"] = f"Bearer {token}"
+            headers["Authorization"] = f"Bearer {self.tokens.current(token)}"
         return headers
 
+    def _retry_unauthorized(self, response, *args, **kwargs):
+        """Response hook: on 401, renew the token and resend the request once"""
+        auth = response.request.headers.get("Authorization", "")
+        if response.status_code != 401 or not auth.startswith("Bearer "):
+            return response
+        token = self.tokens.renew_after_rejection(auth[len("Bearer "):])
+        if not token:
+            return response
+
+        self.metrics.record_retry(response.request.method, endpoint_template(response.request.url))
+        response.content
+        response.close()
+        retry = response.request.copy()
+        retry.headers["Authorization"] = f"Bearer {token}"
+        retried = response.connection.send(retry, **kwargs)
+        retried.history.append(response)
+        retried.request = retry
+        return retried
+
     def _get_error_message(self, response_data: Dict[str, Any], default: str) -> str:
         """Extract error message from response"""
         # Try "error" field first (from FastAPI exception handler)
@@ -43,7 +272,7 @@ class APIClient:
                timezone: str, industry: str, employee_count: int) -> Dict[str, Any]:
         """Sign up new customer"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/auth/signup",
                 headers=self.get_headers(),
                 json={
@@ -56,84 +285,108 @@ class APIClient:
                 }
             )
             if response.status_code == 200:
-                return response.json()
+                return self.tokens.register(json_codec.loads(response.content))
             else:
-                raise Exception(self._get_error_message(response.json(), "Signup failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Signup failed"))
         except Exception as e:
             raise Exception(f"Signup error: {str(e)}")
     
     def login(self, email: str, password: str) -> Dict[str, Any]:
         """Login customer"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/auth/login",
                 headers=self.get_headers(),
                 json={"email": email, "password": password}
             )
             if response.status_code == 200:
-                return response.json()
+                return self.tokens.register(json_codec.loads(response.content))
             else:
-                raise Exception(self._get_error_message(response.json(), "Login failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Login failed"))
         except Exception as e:
             raise Exception(f"Login error: {str(e)}")
+
+    def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
+        """Exchange a refresh token for a new access token"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/auth/refresh",
+                headers=self.get_headers(),
+                json={"refresh_token": refresh_token}
+            )
+            if response.status_code == 200:
+                return json_codec.loads(response.content)
+            else:
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Token refresh failed"))
+        except Exception as e:
+            raise Exception(f"Refresh token error: {str(e)}")
+
+    def logout(self, token: Optional[str]):
+        """Forget a login's tokens"""
+        self.tokens.forget(token)
     
     # ============ AGENTS ============
     
     def create_agent(self, token: str, agent_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create new agent"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/agents",
                 headers=self.get_headers(token),
                 json=agent_data
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Agent creation failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Agent creation failed"))
         except Exception as e:
             raise Exception(f"Create agent error: {str(e)}")
     
     def get_agents(self, token: str) -> List[Dict[str, Any]]:
         """Get all agents"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/agents",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json().get("agents", [])
+                return json_codec.loads(response.content).get("agents", [])
             else:
-                raise Exception(self._get_error_message(response.json(), "Failed to get agents"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Failed to get agents"))
         except Exception as e:
             raise Exception(f"Get agents error: {str(e)}")
     
-    def update_agent(self, token: str, agent_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Update agent"""
+    def update_agent(self, token: str, agent_id: str, updates: Dict[str, Any],
+                     current: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Update agent; given its current record, only changed fields are sent (nothing, if none changed)"""
+        if current is not None:
+            updates = changed_fields(current, updates)
+            if not updates:
+                return current
         try:
-            response = requests.patch(
+            response = self.session.patch(
                 f"{self.base_url}/agents/{agent_id}",
                 headers=self.get_headers(token),
                 json=updates
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Agent update failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Agent update failed"))
         except Exception as e:
             raise Exception(f"Update agent error: {str(e)}")
     
     def activate_agent(self, token: str, agent_id: str) -> Dict[str, Any]:
         """Activate agent"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/agents/{agent_id}/activate",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Agent activation failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Agent activation failed"))
         except Exception as e:
             raise Exception(f"Activate agent error: {str(e)}")
     
@@ -142,38 +395,196 @@ class APIClient:
     def add_employee(self, token: str, agent_id: str, employee_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add single employee"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/employees?agent_id={agent_id}",
                 headers=self.get_headers(token),
                 json=employee_data
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Employee creation failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Employee creation failed"))
         except Exception as e:
             raise Exception(f"Add employee error: {str(e)}")
     
+    def add_employees_bulk(self, token: str, agent_id: str, employees: List[Dict[str, Any]],
+                           mode: str = "ndjson", batch_size: int = BULK_BATCH_SIZE) -> Dict[str, Any]:
+        """Create or update many employees; one result per row, in input order.
+
+        Rows go to POST /employees/bulk in parallel batches, streamed as
+        NDJSON (mode="ndjson") or sent as a JSON array (mode="json"); the
+        backend upserts them by phone. Against a backend without the bulk
+        endpoint, rows are posted one at a time, concurrently. Each result is
+        {"index", "ok", "action" ("created"/"updated"), "employee", "error"}.
+        """
+        if mode not in ("ndjson", "json"):
+            raise ValueError(f"Unknown bulk mode: {mode}")
+        batches = {start: employees[start:start + batch_size] for start in range(0, len(employees), batch_size)}
+        results: Dict[int, Dict[str, Any]] = {}
+        single = list(range(len(employees)))
+
+        if self.bulk_supported is not False:
+            starts = sorted(batches)
+            # Until the endpoint is known to exist, try one batch before sending the rest
+            rounds = [starts[:1], starts[1:]] if self.bulk_supported is None else [starts]
+            outcomes = {}
+            for round_starts in rounds:
+                if self.bulk_supported is False:
+                    outcomes.update({start: BulkNotSupported() for start in round_starts})
+                    continue
+                outcomes.update(run_concurrently({
+                    start: (lambda rows=batches[start]: self._post_employees_bulk(token, agent_id, rows, mode))
+                    for start in round_starts
+                }))
+                if starts and isinstance(outcomes[starts[0]], BulkNotSupported):
+                    self.bulk_supported = False
+            single = []
+            for start, outcome in outcomes.items():
+                if isinstance(outcome, BulkNotSupported):
+                    self.bulk_supported = False
+                    single.extend(range(start, start + len(batches[start])))
+                    continue
+                # Only a bulk call that worked proves the endpoint; a 5xx or timeout proves nothing either way
+                if not isinstance(outcome, Exception):
+                    self.bulk_supported = True
+                for i in range(len(batches[start])):
+                    if isinstance(outcome, Exception):
+                        results[start + i] = {"index": start + i, "ok": False, "action": None,
+                                              "employee": None, "error": str(outcome)}
+                    else:
+                        results[start + i] = dict(outcome[i], index=start + i)
+
+        posted = run_concurrently({
+            i: (lambda i=i: self.add_employee(token, agent_id, employees[i])) for i in single
+        })
+        for i, outcome in posted.items():
+            failed = isinstance(outcome, Exception)
+            results[i] = {"index": i, "ok": not failed, "action": None if failed else "created",
+                          "employee": None if failed else outcome, "error": str(outcome) if failed else None}
+
+        ordered = [results[i] for i in range(len(employees))]
+        return {
+            "results": ordered,
+            "created": sum(1 for r in ordered if r["action"] == "created"),
+            "updated": sum(1 for r in ordered if r["action"] == "updated"),
+            "failed": sum(1 for r in ordered if not r["ok"]),
+            "bulk": not single
+        }
+
+    def _post_employees_bulk(self, token: str, agent_id: str, rows: List[Dict[str, Any]],
+                             mode: str) -> List[Dict[str, Any]]:
+        """Send one batch to the bulk endpoint; per-row results in batch order"""
+        headers = self.get_headers(token)
+        if mode == "ndjson":
+            body = NDJSONBody(rows, compress=self.session.compress_requests)
+            headers["Content-Type"] = "application/x-ndjson"
+            if body.compress:
+                headers["Content-Encoding"] = "gzip"
+            request = {"data": body}
+        else:
+            request = {"json": {"employees": rows}}
+        try:
+            response = self.session.post(
+                f"{self.base_url}/employees/bulk?agent_id={agent_id}",
+                headers=headers,
+                **request
+            )
+            # Unknown route: only trusted before the endpoint has been seen to work
+            if response.status_code in (404, 405, 501) and self.bulk_supported is not True:
+                raise BulkNotSupported()
+            if response.status_code != 200:
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Bulk import failed"))
+            data = json_codec.loads(response.content)
+        except BulkNotSupported:
+            raise
+        except Exception as e:
+            raise Exception(f"Bulk add employees error: {str(e)}")
+
+        by_index = {r.get("index"): r for r in data.get("results", [])}
+        results = []
+        for i in range(len(rows)):
+            r = by_index.get(i)
+            if r is None:
+                results.append({"ok": False, "action": None, "employee": None, "error": "No result from backend"})
+            else:
+                ok = r.get("status") in ("created", "updated")
+                results.append({"ok": ok, "action": r["status"] if ok else None, "employee": r.get("employee"),
+                                "error": None if ok else r.get("error", "Rejected by backend")})
+        return results
+
     def get_employees(self, token: str, agent_id: str, page: int = 1, limit: int = 50) -> Dict[str, Any]:
         """Get employees for agent"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/employees?agent_id={agent_id}&page={page}&limit={limit}",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Failed to get employees"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Failed to get employees"))
         except Exception as e:
             raise Exception(f"Get employees error: {str(e)}")
     
+    def get_all_employees(self, token: str, agent_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get every employee for agent, fetching pages after the first in parallel"""
+        first = self.get_employees(token, agent_id, page=1, limit=limit)
+        employees = list(first.get("employees", []))
+        total = first.get("total", len(employees))
+        pages = -(-total // limit) if limit else 1
+
+        results = run_concurrently({
+            page: (lambda page=page: self.get_employees(token, agent_id, page=page, limit=limit))
+            for page in range(2, pages + 1)
+        })
+        for page in sorted(results):
+            if isinstance(results[page], Exception):
+                raise results[page]
+            employees.extend(results[page].get("employees", []))
+        return employees
+
+    def get_employee_directory(self, token: str, agent_ids: List[str],
+                               include_employees: bool = False) -> Dict[str, Any]:
+        """Get employees across all agents, deduplicated by person.
+
+        Agents are fetched in parallel. The same person added under several
+        agents (matched by phone, then email) is counted once in "total";
+        "assignments" is the raw sum over agents. Pass include_employees to
+        also get the merged directory, each entry listing its "agent_ids" and
+        the per-agent record "employee_ids".
+        """
+        results = run_concurrently({
+            agent_id: (lambda agent_id=agent_id: self.get_all_employees(token, agent_id))
+            for agent_id in agent_ids
+        })
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        per_agent: Dict[str, int] = {}
+        for agent_id in agent_ids:
+            if isinstance(results[agent_id], Exception):
+                raise Exception(f"Get employee directory error: {str(results[agent_id])}")
+            per_agent[agent_id] = len(results[agent_id])
+            for employee in results[agent_id]:
+                entry = merged.setdefault(employee_identity(employee),
+                                          dict(employee, agent_ids=[], employee_ids=[]))
+                entry["agent_ids"].append(agent_id)
+                entry["employee_ids"].append(employee.get("id"))
+
+        directory = {
+            "total": len(merged),
+            "assignments": sum(per_agent.values()),
+            "per_agent": per_agent
+        }
+        if include_employees:
+            directory["employees"] = list(merged.values())
+        return directory
+
     # ============ CHECK-INS ============
     
     def create_checkin(self, token: str, agent_id: str, employee_id: str, flow_name: str) -> Dict[str, Any]:
         """Trigger check-in"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/check-ins",
                 headers=self.get_headers(token),
                 json={
@@ -183,30 +594,30 @@ class APIClient:
                 }
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Check-in creation failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Check-in creation failed"))
         except Exception as e:
             raise Exception(f"Create check-in error: {str(e)}")
     
     def get_checkin(self, token: str, checkin_id: str) -> Dict[str, Any]:
         """Get check-in details"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/check-ins/{checkin_id}",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Failed to get check-in"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Failed to get check-in"))
         except Exception as e:
             raise Exception(f"Get check-in error: {str(e)}")
     
     def send_message(self, token: str, checkin_id: str, user_message: str, source: str = "web") -> Dict[str, Any]:
         """Send message in check-in"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/check-ins/{checkin_id}/message",
                 headers=self.get_headers(token),
                 json={
@@ -215,23 +626,59 @@ class APIClient:
                 }
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
-                raise Exception(self._get_error_message(response.json(), "Message send failed"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Message send failed"))
         except Exception as e:
             raise Exception(f"Send message error: {str(e)}")
+
+    def get_checkins(self, token: str, agent_id: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None, page: int = 1, limit: int = 500) -> Dict[str, Any]:
+        """Get a page of raw check-in records, optionally filtered by agent and created_at range"""
+        params = {"page": page, "limit": limit}
+        if agent_id:
+            params["agent_id"] = agent_id
+        if since:
+            params["since"] = since
+        if until:
+            params["until"] = until
+        try:
+            response = self.session.get(
+                f"{self.base_url}/check-ins",
+                headers=self.get_headers(token),
+                params=params
+            )
+            if response.status_code == 200:
+                return json_codec.loads(response.content)
+            else:
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Failed to get check-ins"))
+        except Exception as e:
+            raise Exception(f"Get check-ins error: {str(e)}")
+
+    def iter_checkins(self, token: str, agent_id: Optional[str] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, limit: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Yield check-in records page by page until the backend runs out"""
+        page = 1
+        while True:
+            data = self.get_checkins(token, agent_id=agent_id, since=since, until=until, page=page, limit=limit)
+            records = data.get("check_ins", [])
+            if records:
+                yield records
+            if len(records) < limit or page * limit >= data.get("total", float("inf")):
+                return
+            page += 1
     
     # ============ ANALYTICS ============
     
     def get_dashboard_summary(self, token: str) -> Dict[str, Any]:
         """Get dashboard summary"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/dashboard/summary",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
                 raise Exception("Failed to get summary")
         except Exception as e:
@@ -240,12 +687,12 @@ class APIClient:
     def get_sentiment_breakdown(self, token: str) -> Dict[str, Any]:
         """Get sentiment breakdown"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/dashboard/sentiment",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
                 raise Exception("Failed to get sentiment")
         except Exception as e:
@@ -254,12 +701,12 @@ class APIClient:
     def get_roi_metrics(self, token: str) -> Dict[str, Any]:
         """Get ROI metrics"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/dashboard/roi",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json()
+                return json_codec.loads(response.content)
             else:
                 raise Exception("Failed to get ROI")
         except Exception as e:
@@ -270,16 +717,48 @@ class APIClient:
     def get_documents(self, token: str) -> List[Dict[str, Any]]:
         """Get available documents (PDFs)"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/documents",
                 headers=self.get_headers(token)
             )
             if response.status_code == 200:
-                return response.json().get("documents", [])
+                return json_codec.loads(response.content).get("documents", [])
             else:
-                raise Exception(self._get_error_message(response.json(), "Failed to get documents"))
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Failed to get documents"))
         except Exception as e:
             raise Exception(f"Get documents error: {str(e)}")
 
+    def get_documents_page(self, token: str, page: int = 1, limit: int = DOCUMENT_PAGE_SIZE,
+                           updated_since: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of document metadata, least recently updated first"""
+        params = {"page": page, "limit": limit}
+        if updated_since:
+            params["updated_since"] = updated_since
+        try:
+            response = self.session.get(
+                f"{self.base_url}/documents",
+                headers=self.get_headers(token),
+                params=params
+            )
+            if response.status_code == 200:
+                return json_codec.loads(response.content)
+            else:
+                raise Exception(self._get_error_message(json_codec.loads(response.content), "Failed to get documents"))
+        except Exception as e:
+            raise Exception(f"Get documents error: {str(e)}")
+
+    def iter_documents(self, token: str, updated_since: Optional[str] = None,
+                       limit: int = DOCUMENT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Yield document metadata page by page (a backend that doesn't page sends everything at once)"""
+        page = 1
+        while True:
+            data = self.get_documents_page(token, page=page, limit=limit, updated_since=updated_since)
+            documents = data.get("documents", [])
+            if documents:
+                yield documents
+            if "total" not in data or len(documents) < limit or page * limit >= data["total"]:
+                return
+            page += 1
+
 # Create global API client instance
 api_client = APIClient()
@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Renew an access token this many seconds before its exp claim (at most half its lifetime)
+REFRESH_MARGIN = 120
+
+# After a failed renewal, keep using the current token this long before trying again
+RETRY_BACKOFF = 30
+
+# A login whose token has expired, or that nothing has used for this long, is forgotten (seconds)
+LOGIN_IDLE_SECONDS = 3600
+
+
+class Login:
+    """One logged-in session's current access token and refresh token"""
+
+    def __init__(self, refresh_token: Optional[str]):
+        self.access_token = ""
+        self.expires_at: Optional[float] = None
+        self.renew_at: Optional[float] = None
+        self.refresh_token = refresh_token
+        self.retry_at = 0.0
+        self.used_at = time.time()
+        self.lock = threading.Lock()
+
+    def use(self, access_token: str, expires_at: Optional[float], margin: float):
+        now = time.time()
+        self.access_token = access_token
+        self.expires_at = expires_at
+        self.renew_at = None if expires_at is None else expires_at - min(margin, (expires_at - now) / 2)
+
+
+class TokenManager:
+    """Tracks the expiry of access tokens and renews them with the backend's refresh token.
+
+    Passwords are never kept, so a login without a refresh token ends when
+    its access token expires. Only each login's current token is tracked:
+    anything that holds on to a login across renewals (a session, a
+    background job) should use follow(). Logins whose token has expired,
+    or that were not used for LOGIN_IDLE_SECONDS, are forgotten.
+    Concurrent callers share a single renewal.
+    """
+
+    def __init__(self, refresh: Callable[[str], Dict[str, Any]],
+                 decode_expiry: Callable[[str], Optional[float]], margin: float = REFRESH_MARGIN):
+        self._refresh = refresh
+        self._decode_expiry = decode_expiry
+        self.margin = margin
+        self.enabled = True
+        self._logins: Dict[str, Login] = {}
+        self._lock = threading.Lock()
+
+    def register(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Track the tokens from a login/signup response; returns the response unchanged"""
+        token = response.get("access_token")
+        if token:
+            login = Login(response.get("refresh_token"))
+            login.use(token, self._decode_expiry(token), self.margin)
+            with self._lock:
+                self._prune()
+                self._logins[token] = login
+        return response
+
+    def _prune(self):
+        """Forget expired and idle logins (call with the lock held)"""
+        now = time.time()
+        for token, login in list(self._logins.items()):
+            expired = login.expires_at is not None and login.expires_at < now
+            if expired or now - login.used_at > LOGIN_IDLE_SECONDS:
+                del self._logins[token]
+
+    def forget(self, token: Optional[str]):
+        """Drop a login (on logout)"""
+        with self._lock:
+            login = self._logins.get(token)
+            if login is not None:
+                login.refresh_token = None
+                self._logins.pop(login.access_token, None)
+
+    def expires_in(self, token: str) -> Optional[float]:
+        """Seconds until the current token for this login expires (None if unknown or not tracked)"""
+        if not self.enabled:
+            return None
+        login = self._logins.get(token)
+        expires_at = login.expires_at if login else self._decode_expiry(token)
+        return None if expires_at is None else expires_at - time.time()
+
+    def current(self, token: str) -> str:
+        """Newest access token for the login a token belongs to, renewed first if about to expire"""
+        login = self._logins.get(token)
+        if login is None:
+            return token
+        return self._current(login)
+
+    def _current(self, login: Login) -> str:
+        login.used_at = time.time()
+        if self.enabled and login.renew_at is not None and time.time() >= login.renew_at:
+            self._renew(login, login.access_token)
+        return login.access_token
+
+    def follow(self, token: str) -> Callable[[], str]:
+        """A function returning the newest access token of the login a token belongs to, renewing it when due.
+
+        Holders keep the login alive (its refresh token, not its password)
+        for as long as they keep the function.
+        """
+        login = self._logins.get(token)
+        if login is None:
+            return lambda: token
+        return lambda: self._current(login)
+
+    def renew_after_rejection(self, token: str) -> Optional[str]:
+        """New token after the backend rejected `token`, or None if it can't be renewed"""
+        login = self._logins.get(token)
+        if login is None or not self.enabled:
+            return None
+        self._renew(login, token, force=True)
+        return login.access_token if login.access_token != token else None
+
+    def _renew(self, login: Login, stale: str, force: bool = False):
+        with login.lock:
+            # Someone else renewed while we waited for the lock
+            if login.access_token != stale:
+                return
+            if not force and time.time() < login.retry_at:
+                return
+            response = None
+            if login.refresh_token:
+                try:
+                    response = self._refresh(login.refresh_token)
+                except Exception as e:
+                    logger.warning(f"Token renewal failed: {str(e)}")
+
+            token = (response or {}).get("access_token")
+            if not token:
+                login.retry_at = time.time() + RETRY_BACKOFF
+                return
+            login.use(token, self._decode_expiry(token), self.margin)
+            login.refresh_token = response.get("refresh_token", login.refresh_token)
+            with self._lock:
+                self._logins.pop(stale, None)
+                self._prune()
+                self._logins[token] = login
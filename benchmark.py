@@ -0,0 +1,285 @@
+"""End-to-end benchmarks of the app's API usage against the local stub backend.
+
+Each page scenario issues the same APIClient calls its show_*_page makes on a
+cold session cache; imports measure employee rows per second, one call per
+row and through the bulk endpoint.
+
+    python benchmark.py --iterations 30 --latency-ms 40 --jitter-ms 15
+    python benchmark.py --base-url http://localhost:8000/v1   # an already-running backend
+    python benchmark.py --codecs --iterations 5               # also JSON codecs and compression
+
+Record once, then replay offline with identical bytes on every run:
+
+    python benchmark.py --cassette bench.jsonl --cassette-mode record --as-of 2026-01-31
+    python benchmark.py --cassette bench.jsonl --cassette-mode replay --as-of 2026-01-31
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+import json_codec
+from api_client import APIClient
+from analytics_engine import CheckinAnalytics
+from rollup_store import RollupStore
+from stub_server import add_backend_arguments, backend_options, start_stub_server
+
+
+# Date the analytics window ends on; fixed via --as-of so replayed runs issue identical requests
+AS_OF = date.today()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+# ============ PAGE SCENARIOS ============
+
+def load_dashboard(client: APIClient, token: str):
+    agents = client.get_agents(token)
+    client.get_dashboard_summary(token)
+    client.get_employee_directory(token, [a['id'] for a in agents])
+
+
+def load_agent_configuration(client: APIClient, token: str):
+    client.get_agents(token)
+    client.get_documents(token)
+
+
+def load_agents(client: APIClient, token: str):
+    client.get_agents(token)
+
+
+def load_employees(client: APIClient, token: str):
+    agents = client.get_agents(token)
+    client.get_employees(token, agents[0]['id'], 1, 50)
+
+
+def load_analytics(client: APIClient, token: str):
+    agents = client.get_agents(token)
+    directory = client.get_employee_directory(token, [a['id'] for a in agents], True)
+    sites = {eid: e.get('site_location') for e in directory['employees'] for eid in e['employee_ids']}
+    engine = CheckinAnalytics(token, client, sites)
+    end = AS_OF
+    start = end - timedelta(days=30)
+    engine.summary(start, end)
+    engine.sentiment_distribution(start, end)
+    engine.response_rate_trend(start, end)
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = RollupStore(token, client, data_dir)
+        store.update(sites)
+        store.trend("weekly", start=end - timedelta(days=365), end=end)
+    client.get_roi_metrics(token)
+
+
+PAGES: Dict[str, Callable[[APIClient, str], None]] = {
+    "dashboard": load_dashboard,
+    "agent_configuration": load_agent_configuration,
+    "agents": load_agents,
+    "employees": load_employees,
+    "analytics": load_analytics,
+}
+
+
+def bench_pages(client: APIClient, token: str, iterations: int) -> Dict[str, List[float]]:
+    """Wall-clock seconds per page load, per page"""
+    timings = {name: [] for name in PAGES}
+    for _ in range(iterations):
+        for name, load in PAGES.items():
+            started = time.perf_counter()
+            load(client, token)
+            timings[name].append(time.perf_counter() - started)
+    return timings
+
+
+# Import paths compared by bench_import, in the order they run
+IMPORT_METHODS = ("add_employee", "ndjson", "json")
+
+
+def import_rows(rows: int, start: int = 0) -> List[Dict[str, str]]:
+    """Import rows numbered from start; the backend upserts by phone, so distinct ranges create distinct people"""
+    return [
+        {"first_name": "Bench", "last_name": f"Row{i}", "phone": f"+1666{i:07d}",
+         "email": f"bench{i}@example.com", "hire_date": "2024-01-01", "manager_name": "Sam",
+         "site_location": "Main Site", "department": "Operations"}
+        for i in range(start, start + rows)
+    ]
+
+
+def bench_import(client: APIClient, token: str, rows: int, method: str = "add_employee") -> Dict[str, float]:
+    """Rows per second for one import path: "add_employee" (one call per row), "ndjson" or "json" (bulk).
+
+    Each path imports its own range of phone numbers, so every run creates
+    employees rather than updating the previous run's.
+    """
+    agent_id = client.get_agents(token)[0]['id']
+    employees = import_rows(rows, IMPORT_METHODS.index(method) * rows)
+    started = time.perf_counter()
+    if method == "add_employee":
+        for employee in employees:
+            client.add_employee(token, agent_id, employee)
+    else:
+        client.add_employees_bulk(token, agent_id, employees, mode=method)
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+
+
+# ============ CODECS ============
+
+def codec_payloads(client: APIClient, token: str) -> Dict[str, bytes]:
+    """Bodies the employees and analytics pages download, and a bulk import's request body"""
+    agent_id = client.get_agents(token)[0]['id']
+    paths = {
+        "employees page (50)": f"/employees?agent_id={agent_id}&page=1&limit=50",
+        "employees page (100)": f"/employees?agent_id={agent_id}&page=1&limit=100",
+        "check-ins page (500)": "/check-ins?page=1&limit=500",
+    }
+    payloads = {}
+    for name, path in paths.items():
+        payloads[name] = client.session.get(f"{client.base_url}{path}", headers=client.get_headers(token)).content
+    payloads["import body (500 rows)"] = json.dumps(import_rows(500)).encode()
+    return payloads
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def bench_codecs(payloads: Dict[str, bytes], repeat: int = 20) -> Dict[str, Dict[str, float]]:
+    """Size after compression and encode/decode time per JSON codec, per payload"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    active = json_codec.name
+    available = [codec for codec in json_codec.CODECS if codec != "orjson" or json_codec.orjson is not None]
+    results = {}
+    try:
+        for name, body in payloads.items():
+            packed = gzip.compress(body, compresslevel=6)
+            result = {
+                "kb": len(body) / 1024,
+                "gzip_kb": len(packed) / 1024,
+                "gzip_ms": _best_ms(lambda: gzip.compress(body, compresslevel=6), repeat),
+                "gunzip_ms": _best_ms(lambda: gzip.decompress(packed), repeat),
+            }
+            if brotli is not None:
+                result["br_kb"] = len(brotli.compress(body, quality=4)) / 1024
+            for codec in available:
+                json_codec.use(codec)
+                data = json_codec.loads(body)
+                result[f"{codec}_loads_ms"] = _best_ms(lambda: json_codec.loads(body), repeat)
+                result[f"{codec}_dumps_ms"] = _best_ms(lambda: json_codec.dumps(data), repeat)
+            results[name] = result
+    finally:
+        json_codec.use(active)
+    return results
+
+
+class ResponseDigest:
+    """Order-independent digest of every response body, to confirm replays are byte-identical"""
+
+    def __init__(self):
+        self.value = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def hook(self, response, *args, **kwargs):
+        digest = int.from_bytes(hashlib.sha256(response.url.encode() + b"\0" + response.content).digest(), "big")
+        with self._lock:
+            self.value ^= digest
+            self.count += 1
+
+    def hexdigest(self) -> str:
+        return f"{self.value:064x}"[:16]
+
+
+def print_report(timings: Dict[str, List[float]], imports: Dict[str, Dict[str, float]]):
+    print(f"\n{'page':<22}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, values in timings.items():
+        print(f"{name:<22}{len(values):>5}"
+              f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 95) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}")
+    print(f"\n{'import':<22}{'rows':>8}{'seconds':>10}{'rows/s':>10}")
+    for name, result in imports.items():
+        print(f"{name:<22}{result['rows']:>8}{result['seconds']:>10.2f}{result['rows_per_second']:>10.1f}")
+
+
+def print_codec_report(results: Dict[str, Dict[str, float]]):
+    codecs = [c for c in json_codec.CODECS if any(f"{c}_loads_ms" in r for r in results.values())]
+    header = f"\n{'payload':<24}{'KB':>8}{'gzip KB':>9}{'br KB':>7}{'gzip ms':>9}{'gunzip ms':>10}"
+    print(header + "".join(f"{c + ' loads':>14}{c + ' dumps':>14}" for c in codecs))
+    for name, r in results.items():
+        br = f"{r['br_kb']:>7.1f}" if "br_kb" in r else f"{'-':>7}"
+        print(f"{name:<24}{r['kb']:>8.1f}{r['gzip_kb']:>9.1f}{br}{r['gzip_ms']:>9.2f}{r['gunzip_ms']:>10.2f}"
+              + "".join(f"{r[f'{c}_loads_ms']:>14.2f}{r[f'{c}_dumps_ms']:>14.2f}" for c in codecs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page loads and bulk import")
+    parser.add_argument("--base-url", help="Benchmark this backend instead of starting a stub")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--import-rows", type=int, default=500)
+    parser.add_argument("--codecs", action="store_true",
+                        help="Also benchmark JSON codecs and compression on real page payloads")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench")
+    parser.add_argument("--cassette", help="Cassette file for --cassette-mode")
+    parser.add_argument("--cassette-mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--replay-latency", choices=["recorded", "synthetic", "none"], default="recorded")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(),
+                        help="End date of the analytics window (YYYY-MM-DD)")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    global AS_OF
+    AS_OF = args.as_of
+
+    server = None
+    base_url = args.base_url
+    replaying = args.cassette and args.cassette_mode == "replay"
+    if replaying:
+        base_url = base_url or "http://replay.invalid/v1"
+    elif not base_url:
+        server, base_url = start_stub_server(**backend_options(args))
+
+    try:
+        client = APIClient(base_url, cache_path=os.getenv("API_HTTP_CACHE"))
+        if args.cassette:
+            client.use_cassette(args.cassette, args.cassette_mode, args.replay_latency,
+                                args.latency_ms, args.jitter_ms)
+        digest = ResponseDigest()
+        client.session.hooks["response"].append(digest.hook)
+
+        token = client.login(args.email, args.password)['access_token']
+        timings = bench_pages(client, token, args.iterations)
+        imports = {f"bulk ({method})" if method != "add_employee" else method:
+                   bench_import(client, token, args.import_rows, method)
+                   for method in IMPORT_METHODS}
+        print_report(timings, imports)
+        if args.codecs:
+            print_codec_report(bench_codecs(codec_payloads(client, token)))
+        print(f"\n{digest.count} responses, digest {digest.hexdigest()}")
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
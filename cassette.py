@@ -0,0 +1,242 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# JSON keys whose values are credentials - replaced outright
+SECRET_KEYS = {"password", "access_token", "refresh_token"}
+
+# JSON keys whose values identify a person - replaced with stable pseudonyms
+PII_KEYS = {"email", "phone", "first_name", "last_name", "manager_name", "user_message", "sub"}
+
+# Response headers worth keeping in a cassette
+KEPT_HEADERS = {"content-type", "etag", "last-modified", "cache-control"}
+
+LATENCY_MODES = ("recorded", "synthetic", "none")
+
+# Replayed in place of a body that couldn't be scrubbed, repeated to its recorded length
+OPAQUE_FILLER = b"?"
+
+
+def _pseudonym(key: str, value: Any) -> Any:
+    """Deterministic stand-in for a PII value, so the same person maps to the same fake everywhere"""
+    if value is None or value == "":
+        return value
+    digest = hashlib.sha256(f"{key}:{value}".encode()).hexdigest()
+    if key == "email" or key == "sub":
+        return f"user-{digest[:10]}@example.invalid"
+    if key == "phone":
+        return "+1555" + str(int(digest[:12], 16))[-7:].zfill(7)
+    return f"{key}-{digest[:8]}"
+
+
+def _scrub_token(token: str) -> str:
+    """Replace a JWT with an unsigned one keeping only its timing claims"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except Exception:
+        return "<REDACTED>"
+    kept = {k: claims[k] for k in ("exp", "iat", "nbf") if k in claims}
+    for key in ("customer_id", "tenant_id", "sub"):
+        if key in claims:
+            kept[key] = _pseudonym(key, claims[key])
+
+    def encode(data: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data, sort_keys=True).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(kept)}.scrubbed"
+
+
+def scrub(data: Any) -> Any:
+    """Recursively strip credentials and pseudonymize PII in decoded JSON"""
+    if isinstance(data, dict):
+        cleaned = {}
+        for key, value in data.items():
+            if key in SECRET_KEYS:
+                cleaned[key] = _scrub_token(value) if key.endswith("_token") and isinstance(value, str) else "<REDACTED>"
+            elif key in PII_KEYS and not isinstance(value, (dict, list)):
+                cleaned[key] = _pseudonym(key, value)
+            else:
+                cleaned[key] = scrub(value)
+        return cleaned
+    if isinstance(data, list):
+        return [scrub(item) for item in data]
+    return data
+
+
+def _scrub_body(body: Optional[bytes]) -> str:
+    """Scrubbed, canonical text form of a JSON or NDJSON body (opaque bodies are hashed)"""
+    if not body:
+        return ""
+    try:
+        return json.dumps(scrub(json.loads(body)), sort_keys=True, separators=(",", ":"))
+    except (ValueError, UnicodeDecodeError):
+        pass
+    try:
+        # NDJSON: one document per line
+        lines = [json.loads(line) for line in body.splitlines() if line.strip()]
+        return "\n".join(json.dumps(scrub(line), sort_keys=True, separators=(",", ":")) for line in lines)
+    except (ValueError, UnicodeDecodeError):
+        return "sha256:" + hashlib.sha256(body).hexdigest()
+
+
+class Cassette:
+    """Recorded request/response pairs in a JSONL file, keyed for replay.
+
+    Requests are matched on method, URL relative to the API base and scrubbed
+    body; the n-th identical request replays the n-th recording (the last one
+    repeats once they run out), so replays don't depend on call timing.
+    Bodies that aren't JSON or NDJSON (HTML error pages, CSV, text) can't be
+    scrubbed, so only their sha256 and length are kept; replay answers with
+    that many OPAQUE_FILLER bytes.
+    """
+
+    def __init__(self, path: str, base_url: str):
+        self.path = path
+        self.base_url = base_url.rstrip("/")
+        self.interactions: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self._served: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.interactions.setdefault(self._key_of(entry["request"]), []).append(entry)
+
+    @staticmethod
+    def _key_of(request: Dict[str, str]) -> Tuple[str, str, str]:
+        return request["method"], request["path"], request["body"]
+
+    def _request_record(self, request) -> Dict[str, str]:
+        url = request.url
+        path = url[len(self.base_url):] if url.startswith(self.base_url) else url
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        if body is not None and not isinstance(body, bytes):
+            # Streamed body (e.g. api_client.NDJSONBody) - re-iterable, so it can be read again here
+            body = b"".join(body)
+        # Match gzipped request bodies on their content, not the compressed bytes
+        if body and request.headers.get("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return {"method": request.method, "path": path, "body": _scrub_body(body)}
+
+    def record(self, request, response: Response, latency: float):
+        """Append one scrubbed interaction to the cassette file"""
+        content = response.content
+        scrubbed = _scrub_body(content)
+        opaque = scrubbed.startswith("sha256:")
+        entry = {
+            "request": self._request_record(request),
+            "response": {
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": {k: v for k, v in sorted(response.headers.items()) if k.lower() in KEPT_HEADERS},
+                "body": "" if opaque else scrubbed,
+                "body_sha256": scrubbed[len("sha256:"):] if opaque else None,
+                "body_length": len(content) if opaque else None
+            },
+            "latency": round(latency, 6)
+        }
+        line = json.dumps(entry, sort_keys=True)
+        with self._lock:
+            self.interactions.setdefault(self._key_of(entry["request"]), []).append(entry)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def next_for(self, request) -> Tuple[Dict[str, Any], int]:
+        """Recording to replay for a request, and how many times its key was served before"""
+        key = self._key_of(self._request_record(request))
+        with self._lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                raise LookupError(f"No recorded interaction for {key[0]} {key[1]}")
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        return entries[min(served, len(entries) - 1)], served
+
+
+class RecordingAdapter(BaseAdapter):
+    """Passes requests to a real adapter and writes each exchange to a cassette"""
+
+    def __init__(self, cassette: Cassette, inner: BaseAdapter):
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        response = self.inner.send(request, **kwargs)
+        self.cassette.record(request, response, time.perf_counter() - started)
+        # Requests re-sent from response hooks (401 retries) go back through the cassette
+        response.connection = self
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Answers requests from a cassette without touching the network.
+
+    latency="recorded" sleeps for each interaction's captured latency,
+    "synthetic" for latency_ms +/- jitter_ms from a RNG seeded by the request,
+    and "none" not at all. Either way the bytes returned are the recorded ones.
+    """
+
+    def __init__(self, cassette: Cassette, latency: str = "recorded",
+                 latency_ms: float = 0, jitter_ms: float = 0):
+        super().__init__()
+        if latency not in LATENCY_MODES:
+            raise ValueError(f"Unknown latency mode: {latency}")
+        self.cassette = cassette
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def _delay(self, entry: Dict[str, Any], served: int) -> float:
+        if self.latency == "recorded":
+            return entry["latency"]
+        if self.latency == "synthetic":
+            request = entry["request"]
+            rng = random.Random(f"{request['method']} {request['path']} {request['body']} {served}")
+            return max(0.0, (self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+        return 0.0
+
+    def send(self, request, **kwargs):
+        entry, served = self.cassette.next_for(request)
+        delay = self._delay(entry, served)
+        if delay:
+            time.sleep(delay)
+
+        recorded = entry["response"]
+        response = Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded["reason"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        if recorded.get("body_length"):
+            response._content = OPAQUE_FILLER * recorded["body_length"]
+        elif recorded.get("body_b64"):
+            # Written before opaque bodies were withheld
+            response._content = base64.b64decode(recorded["body_b64"])
+        else:
+            response._content = recorded["body"].encode()
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=delay)
+        response.from_cache = False
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,293 @@
+"""Render the demo scenes without a browser.
+
+Every scene in the scene library becomes a standalone HTML file that plays
+the conversation with CSS animations, and/or a numbered PNG frame sequence
+at a fixed viewport, with the same message timing as demo_generator.py.
+Scenes are rendered in parallel processes:
+
+    python demo_export.py --out demo_assets
+    python demo_export.py --formats frames --fps 60 --width 540 --height 960 --scenes staffing/resolution
+
+Turn a frame sequence into a video with, for example:
+
+    ffmpeg -framerate 30 -i demo_assets/staffing/resolution/frame_%05d.png -pix_fmt yuv420p resolution.mp4
+"""
+import argparse
+import html
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from demo_scenes import CSS, MESSAGE_INTERVAL, SCENE_DIR, load_scenes
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+# How long the finished conversation stays on screen (seconds)
+HOLD_SECONDS = 2.0
+
+# Matches the slideIn keyframes in demo_scenes.CSS
+SLIDE_SECONDS = 0.3
+SLIDE_PX = 10
+
+FONT_PATHS = {
+    "regular": ["DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "Arial.ttf"],
+    "bold": ["DejaVuSans-Bold.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", "Arial Bold.ttf"],
+}
+
+COLORS = {
+    "background": (255, 255, 255),
+    "title": (0, 122, 255),
+    "description": (110, 110, 110),
+    "rule": (225, 225, 225),
+    "ai": ((232, 232, 232), (0, 0, 0)),
+    "worker": ((0, 122, 255), (255, 255, 255)),
+}
+
+
+# ============ HTML ============
+
+def scene_html(scene: Dict[str, Any], interval: float = MESSAGE_INTERVAL) -> str:
+    """A self-contained page that plays the scene once when opened"""
+    delays = "\n".join(
+        f"        .message:nth-of-type({i}) {{ animation-delay: {i * interval:.3f}s; }}"
+        for i in range(1, len(scene["messages"]) + 1)
+    )
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(scene['title'])}</title>
+{CSS}
+    <style>
+        body {{ font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; margin: 24px; }}
+        .chat-container {{ display: block; max-width: 640px; margin: 0 auto; }}
+        .message {{ animation-fill-mode: both; }}
+{delays}
+    </style>
+</head>
+<body class="main">
+    <div class="scene-title">{html.escape(scene['title'])}</div>
+    <p style="text-align: center;"><em>{html.escape(scene['description'])}</em></p>
+    <div class="chat-container">{scene['html']}</div>
+</body>
+</html>
+"""
+
+
+# ============ FRAMES ============
+
+def _font(style: str, size: int):
+    for path in FONT_PATHS[style]:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _wrap(draw, text: str, font, width: float) -> List[str]:
+    """Split text into lines no wider than width (long words are left whole)"""
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and draw.textlength(candidate, font=font) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    return lines + [line] if line else lines
+
+
+class FrameRenderer:
+    """Draws a scene at a fixed viewport, following the demo page's CSS sizes.
+
+    Sizes are CSS pixels multiplied by `scale`. Bubbles are laid out once;
+    a frame only places and fades the ones that are due.
+    """
+
+    def __init__(self, scene: Dict[str, Any], width: int, height: int, scale: float, interval: float):
+        if Image is None:
+            raise RuntimeError("Frame export needs Pillow (pip install pillow)")
+        self.scene = scene
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.interval = interval
+        self.fonts = {
+            "title": _font("bold", self._px(18)),
+            "description": _font("regular", self._px(14)),
+            "bubble": _font("regular", self._px(14)),
+        }
+        self._measure = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+        self.header_height = self._px(110)
+        self.bubbles = self._layout()
+
+    def _px(self, css_px: float) -> int:
+        return int(round(css_px * self.scale))
+
+    def _layout(self) -> List[Dict[str, Any]]:
+        """Size and stack every bubble of the scene"""
+        font = self.fonts["bubble"]
+        margin, pad_x, pad_y = self._px(20), self._px(14), self._px(10)
+        line_height = self._px(14 * 1.4)
+        max_text = (self.width - 2 * margin) * 0.7 - 2 * pad_x
+        bubbles, y = [], 0
+        for sender, text in self.scene["messages"]:
+            lines = _wrap(self._measure, text, font, max_text)
+            text_width = max((self._measure.textlength(line, font=font) for line in lines), default=0)
+            w, h = int(text_width) + 2 * pad_x, len(lines) * line_height + 2 * pad_y
+            x = margin if sender == "ai" else self.width - margin - w
+            bubbles.append({"sender": sender, "lines": lines, "x": x, "y": y, "w": w, "h": h})
+            y += h + self._px(20)
+        return bubbles
+
+    def duration(self, hold: float) -> float:
+        return len(self.bubbles) * self.interval + SLIDE_SECONDS + hold
+
+    def state(self, t: float) -> Tuple[Tuple[int, float], ...]:
+        """(bubble, animation progress) for every bubble visible at time t; equal states draw equal frames"""
+        visible = []
+        for i in range(len(self.bubbles)):
+            elapsed = t - (i + 1) * self.interval
+            if elapsed < 0:
+                break
+            visible.append((i, round(min(1.0, elapsed / SLIDE_SECONDS), 3)))
+        return tuple(visible)
+
+    def render(self, state: Tuple[Tuple[int, float], ...]):
+        frame = Image.new("RGB", (self.width, self.height), COLORS["background"])
+        draw = ImageDraw.Draw(frame)
+        cx = self.width / 2
+        draw.text((cx, self._px(28)), self.scene["title"], font=self.fonts["title"], fill=COLORS["title"], anchor="mm")
+        draw.text((cx, self._px(62)), self.scene["description"], font=self.fonts["description"],
+                  fill=COLORS["description"], anchor="mm")
+        draw.line([(self._px(20), self._px(90)), (self.width - self._px(20), self._px(90))],
+                  fill=COLORS["rule"], width=max(1, self._px(1)))
+
+        # Like a chat window, scroll so the newest bubble stays in view
+        chat_top = self.header_height
+        if state:
+            last = self.bubbles[state[-1][0]]
+            overflow = last["y"] + last["h"] - (self.height - chat_top - self._px(20))
+            chat_top -= max(0, overflow)
+
+        for i, progress in state:
+            bubble = self.bubbles[i]
+            eased = 1 - (1 - progress) ** 3
+            y = chat_top + bubble["y"] + (1 - eased) * self._px(SLIDE_PX)
+            fill, text_color = COLORS[bubble["sender"] if bubble["sender"] == "ai" else "worker"]
+            layer = Image.new("RGBA", (bubble["w"], bubble["h"]), (0, 0, 0, 0))
+            layer_draw = ImageDraw.Draw(layer)
+            layer_draw.rounded_rectangle([0, 0, bubble["w"] - 1, bubble["h"] - 1], radius=self._px(12), fill=fill)
+            line_height = self._px(14 * 1.4)
+            for n, line in enumerate(bubble["lines"]):
+                layer_draw.text((self._px(14), self._px(10) + n * line_height + line_height / 2), line,
+                                font=self.fonts["bubble"], fill=text_color, anchor="lm")
+            if eased < 1:
+                layer.putalpha(layer.getchannel("A").point(lambda a: int(a * eased)))
+            frame.paste(layer, (int(bubble["x"]), int(round(y))), layer)
+        return frame
+
+
+def export_frames(scene: Dict[str, Any], directory: str, width: int, height: int, scale: float,
+                  fps: int, interval: float, hold: float) -> int:
+    """Write frame_00001.png... for one scene; returns the number of frames"""
+    os.makedirs(directory, exist_ok=True)
+    renderer = FrameRenderer(scene, width, height, scale, interval)
+    frames = int(round(renderer.duration(hold) * fps))
+    # Most frames repeat the one before (nothing is animating), so only changed frames are drawn
+    previous, png = None, b""
+    for n in range(frames):
+        state = renderer.state(n / fps)
+        if state != previous:
+            buffer = io.BytesIO()
+            renderer.render(state).save(buffer, format="PNG", compress_level=1)
+            previous, png = state, buffer.getvalue()
+        with open(os.path.join(directory, f"frame_{n + 1:05d}.png"), "wb") as f:
+            f.write(png)
+    return frames
+
+
+# ============ BATCH ============
+
+def export_scene(scene: Dict[str, Any], out_dir: str, formats: List[str], width: int, height: int, scale: float,
+                 fps: int, interval: float, hold: float) -> Dict[str, Any]:
+    """Render one scene (runs in a worker process)"""
+    started = time.perf_counter()
+    # "staffing/hook" -> <out>/staffing/hook.html and <out>/staffing/hook/frame_*.png
+    base = os.path.join(out_dir, *scene["id"].split("/"))
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    result: Dict[str, Any] = {"scene": scene["id"], "files": []}
+    if "html" in formats:
+        with open(f"{base}.html", "w", encoding="utf-8") as f:
+            f.write(scene_html(scene, interval))
+        result["files"].append(f"{base}.html")
+    if "frames" in formats:
+        result["frames"] = export_frames(scene, base, width, height, scale, fps, interval, hold)
+        result["files"].append(base)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def select_scenes(library: Dict[str, Dict[str, Any]], selectors: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Scenes matching any selector: a scene id ("staffing/hook") or a whole file ("staffing")"""
+    if not selectors:
+        return list(library.values())
+    unknown = [s for s in selectors if s not in library and not any(i.startswith(f"{s}/") for i in library)]
+    if unknown:
+        raise ValueError(f"Unknown scenes: {unknown}")
+    return [scene for scene_id, scene in library.items()
+            if any(scene_id == s or scene_id.startswith(f"{s}/") for s in selectors)]
+
+
+def export_all(out_dir: str, scenes: Optional[List[str]] = None, formats: Tuple[str, ...] = ("html", "frames"),
+               width: int = 405, height: int = 720, scale: float = 2.0, fps: int = 30,
+               interval: float = MESSAGE_INTERVAL, hold: float = HOLD_SECONDS,
+               workers: Optional[int] = None, scene_dir: str = SCENE_DIR) -> List[Dict[str, Any]]:
+    """Render scenes in parallel processes; width/height are in CSS pixels"""
+    selected = select_scenes(load_scenes(scene_dir), scenes)
+    if "frames" in formats and Image is None:
+        raise RuntimeError("Frame export needs Pillow (pip install pillow)")
+
+    size = (int(width * scale), int(height * scale))
+    with ProcessPoolExecutor(max_workers=workers or min(len(selected), os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(export_scene, scene, out_dir, list(formats), size[0], size[1], scale, fps,
+                               interval, hold) for scene in selected]
+        return [f.result() for f in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render demo scenes to animated HTML and PNG frames")
+    parser.add_argument("--out", default="demo_assets", help="Output directory")
+    parser.add_argument("--scenes", nargs="+",
+                        help="Scene ids (staffing/hook) or library files (staffing); default: all")
+    parser.add_argument("--scene-dir", default=SCENE_DIR, help="Scene library directory")
+    parser.add_argument("--formats", nargs="+", choices=["html", "frames"], default=["html", "frames"])
+    parser.add_argument("--width", type=int, default=405, help="Viewport width in CSS pixels")
+    parser.add_argument("--height", type=int, default=720, help="Viewport height in CSS pixels")
+    parser.add_argument("--scale", type=float, default=2.0, help="Device pixels per CSS pixel")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=MESSAGE_INTERVAL, help="Seconds between messages")
+    parser.add_argument("--hold", type=float, default=HOLD_SECONDS, help="Seconds to hold the last frame")
+    parser.add_argument("--workers", type=int, help="Processes (default: one per scene, up to the CPU count)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = export_all(args.out, args.scenes, tuple(args.formats), args.width, args.height, args.scale,
+                         args.fps, args.interval, args.hold, args.workers, args.scene_dir)
+    for r in results:
+        frames = f", {r['frames']} frames" if "frames" in r else ""
+        print(f"Scene {r['scene']}: {r['seconds']:.2f}s{frames} -> {', '.join(r['files'])}")
+    print(f"Done in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
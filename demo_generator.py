@@ -1,6 +1,7 @@
 import streamlit as st
 import time
-from datetime import datetime
+from typing import Any, Dict
+from demo_scenes import CSS, MESSAGE_INTERVAL, load_scenes
 
 # Set page config
 st.set_page_config(
@@ -11,147 +12,56 @@ st.set_page_config(
 )
 
 # Custom CSS for WhatsApp-like styling
-st.markdown("""
-    <style>
-        /* Main container */
-        .main {
-            background: linear-gradient(135deg, #f5f5f5 0%, #ffffff 100%);
-        }
-
-        /* Chat container */
-        .chat-container {
-            background: #ffffff;
-            border-radius: 12px;
-            padding: 20px;
-            box-shadow: 0 2px 12px rgba(0,0,0,0.1);
-            height: 600px;
-            overflow-y: auto;
-            display: flex;
-            flex-direction: column;
-            gap: 12px;
-        }
-
-        /* Message bubbles */
-        .message {
-            display: flex;
-            margin-bottom: 8px;
-            animation: slideIn 0.3s ease-out;
-        }
-
-        .message.ai {
-            justify-content: flex-start;
-        }
-
-        .message.worker {
-            justify-content: flex-end;
-        }
-
-        .bubble {
-            max-width: 70%;
-            padding: 10px 14px;
-            border-radius: 12px;
-            font-size: 14px;
-            line-height: 1.4;
-            word-wrap: break-word;
-        }
-
-        .bubble.ai {
-            background: #e8e8e8;
-            color: #000;
-            border-bottom-left-radius: 4px;
-        }
-
-        .bubble.worker {
-            background: #007AFF;
-            color: #fff;
-            border-bottom-right-radius: 4px;
-        }
-
-        .timestamp {
-            font-size: 12px;
-            color: #999;
-            text-align: center;
-            margin: 8px 0;
-        }
-
-        @keyframes slideIn {
-            from {
-                opacity: 0;
-                transform: translateY(10px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-
-        /* Scene title */
-        .scene-title {
-            text-align: center;
-            color: #007AFF;
-            font-size: 18px;
-            font-weight: bold;
-            margin-bottom: 20px;
-        }
-
-        /* Controls */
-        .controls {
-            display: flex;
-            gap: 10px;
-            justify-content: center;
-            margin-top: 20px;
-        }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(CSS, unsafe_allow_html=True)
+
+# Scene library (loaded once, reloaded when a file in scenes/ changes)
+SCENES = load_scenes()
+SCENE_IDS = list(SCENES)
 
 # Initialize session state
-if "current_scene" not in st.session_state:
-    st.session_state.current_scene = 1
+if st.session_state.get("current_scene") not in SCENES:
+    st.session_state.current_scene = SCENE_IDS[0]
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "animating" not in st.session_state:
     st.session_state.animating = False
 
-# Define scenes with conversations
-SCENES = {
-    1: {
-        "title": "Scene 1: The Hook (0-15s)",
-        "description": "Proactive AI outreach vs. worker engagement",
-        "messages": [
-            ("ai", "Hey, saw you clocked out at 9:15pm today. That's rough—you doing okay at the site?"),
-        ]
-    },
-    2: {
-        "title": "Scene 2: The Retention Check-in (15-25s)",
-        "description": "Real conversation vs. generic satisfaction survey",
-        "messages": [
-            ("ai", "Hey, saw you clocked out at 9:15pm today. That's rough—you doing okay at the site?"),
-            ("worker", "Honestly, my feet are killing me."),
-            ("ai", "Got it. Anything else I should know?"),
-            ("worker", "Yeah, no break today."),
-        ]
-    },
-    3: {
-        "title": "Scene 3: The Resolution (25-35s)",
-        "description": "Action-driven AI vs. dead-end form response",
-        "messages": [
-            ("ai", "Hey, saw you clocked out at 9:15pm today. That's rough—you doing okay at the site?"),
-            ("worker", "Honestly, my feet are killing me."),
-            ("ai", "Got it. Anything else I should know?"),
-            ("worker", "Yeah, no break today."),
-            ("ai", "I've flagged this with your manager. Help's on the way."),
-        ]
-    }
-}
+# Auto-play engine
+def autoplay(placeholder, scene: Dict[str, Any], interval: float = MESSAGE_INTERVAL):
+    """Play a scene into one placeholder within this script run.
+
+    Bubbles already shown are drawn at once; each remaining one is appended
+    when it falls due. Due times are fixed offsets from the start, so time
+    spent rendering never pushes later messages back. Progress is kept in
+    session state: a button click stops the run and the next one resumes.
+    """
+    messages, bubbles = scene["messages"], scene["bubbles"]
+    shown = len(st.session_state.messages)
+    started = time.monotonic()
+    with placeholder.container():
+        if shown:
+            st.markdown("".join(bubbles[:shown]), unsafe_allow_html=True)
+        for i, bubble in enumerate(bubbles[shown:], start=1):
+            time.sleep(max(0.0, started + i * interval - time.monotonic()))
+            st.markdown(bubble, unsafe_allow_html=True)
+            st.session_state.messages = list(messages[:shown + i])
 
 # Sidebar navigation
 st.sidebar.title("Demo Scenes")
 st.sidebar.markdown("---")
-for scene_num in [1, 2, 3]:
-    if st.sidebar.button(f"Scene {scene_num}", key=f"scene_{scene_num}"):
-        st.session_state.current_scene = scene_num
-        st.session_state.messages = []
-        st.rerun()
+industries = list(dict.fromkeys(s["industry"] for s in SCENES.values()))
+industry = st.sidebar.selectbox("Industry", industries,
+                                index=industries.index(SCENES[st.session_state.current_scene]["industry"]))
+industry_scenes = [scene_id for scene_id in SCENE_IDS if SCENES[scene_id]["industry"] == industry]
+picked = st.sidebar.selectbox(
+    "Scene", industry_scenes,
+    index=industry_scenes.index(st.session_state.current_scene) if st.session_state.current_scene in industry_scenes else 0,
+    format_func=lambda scene_id: SCENES[scene_id]["title"]
+)
+if picked != st.session_state.current_scene:
+    st.session_state.current_scene = picked
+    st.session_state.messages = []
+position = industry_scenes.index(st.session_state.current_scene)
 
 # Main content
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -168,40 +78,17 @@ st.markdown(f"<div class='scene-title'>{scene['title']}</div>", unsafe_allow_htm
 st.markdown(f"*{scene['description']}*", unsafe_allow_html=True)
 st.markdown("---")
 
-# Chat container
+# Chat container - filled after the controls are drawn, so they work while a scene plays
 with st.container():
-    st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
-
-    # Initialize chat with auto-play
-    if len(st.session_state.messages) < len(scene["messages"]):
-        # Auto-play messages with delay
-        for i in range(len(st.session_state.messages), len(scene["messages"])):
-            time.sleep(0.8)  # Delay between messages for screen recording
-            st.session_state.messages.append(scene["messages"][i])
-            st.rerun()
-
-    # Display all messages
-    for sender, text in st.session_state.messages:
-        message_class = "ai" if sender == "ai" else "worker"
-        sender_label = "AI Agent" if sender == "ai" else "Worker"
-
-        st.markdown(f"""
-            <div class="message {message_class}">
-                <div class="bubble {message_class}">
-                    {text}
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    st.markdown("</div>", unsafe_allow_html=True)
+    chat_placeholder = st.empty()
 
 # Controls
 st.markdown("---")
 col1, col2, col3 = st.columns([1, 1, 1])
 
 with col1:
-    if st.button("← Prev Scene", disabled=(st.session_state.current_scene == 1)):
-        st.session_state.current_scene -= 1
+    if st.button("← Prev Scene", disabled=(position == 0)):
+        st.session_state.current_scene = industry_scenes[position - 1]
         st.session_state.messages = []
         st.rerun()
 
@@ -211,8 +98,8 @@ with col2:
         st.rerun()
 
 with col3:
-    if st.button("Next Scene →", disabled=(st.session_state.current_scene == 3)):
-        st.session_state.current_scene += 1
+    if st.button("Next Scene →", disabled=(position == len(industry_scenes) - 1)):
+        st.session_state.current_scene = industry_scenes[position + 1]
         st.session_state.messages = []
         st.rerun()
 
@@ -222,5 +109,11 @@ st.markdown("""
 **Recording Tips:**
 - Use the "Reset" button to start fresh before recording
 - Auto-play shows messages with 0.8s delay for smooth screen recording
+- Messages land on a fixed schedule from the first one, so timing is the same on every take
 - Works best in a fixed window size for consistent video editing
+- Or skip recording: `python demo_export.py` renders every scene to HTML and PNG frames
+- Add or edit conversations in `scenes/*.json`; a scene can extend a `parent` scene's messages
 """)
+
+# Auto-play the scene last, so everything above is already on screen
+autoplay(chat_placeholder, scene)
@@ -0,0 +1,212 @@
+import html
+import json
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+# Pause between messages when a scene plays back (seconds)
+MESSAGE_INTERVAL = 0.8
+
+# Scene library: one JSON file per industry
+SCENE_DIR = os.getenv("CXAI_SCENE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenes"))
+
+SENDERS = ("ai", "worker")
+
+# Resolved libraries by directory, with the file signature they were built from
+_libraries: Dict[str, Tuple[Tuple, Dict[str, Dict[str, Any]]]] = {}
+_lock = threading.Lock()
+
+# WhatsApp-like styling for the chat bubbles
+CSS = """
+    <style>
+        /* Main container */
+        .main {
+            background: linear-gradient(135deg, #f5f5f5 0%, #ffffff 100%);
+        }
+
+        /* Chat container */
+        .chat-container {
+            background: #ffffff;
+            border-radius: 12px;
+            padding: 20px;
+            box-shadow: 0 2px 12px rgba(0,0,0,0.1);
+            height: 600px;
+            overflow-y: auto;
+            display: flex;
+            flex-direction: column;
+            gap: 12px;
+        }
+
+        /* Message bubbles */
+        .message {
+            display: flex;
+            margin-bottom: 8px;
+            animation: slideIn 0.3s ease-out;
+        }
+
+        .message.ai {
+            justify-content: flex-start;
+        }
+
+        .message.worker {
+            justify-content: flex-end;
+        }
+
+        .bubble {
+            max-width: 70%;
+            padding: 10px 14px;
+            border-radius: 12px;
+            font-size: 14px;
+            line-height: 1.4;
+            word-wrap: break-word;
+        }
+
+        .bubble.ai {
+            background: #e8e8e8;
+            color: #000;
+            border-bottom-left-radius: 4px;
+        }
+
+        .bubble.worker {
+            background: #007AFF;
+            color: #fff;
+            border-bottom-right-radius: 4px;
+        }
+
+        .timestamp {
+            font-size: 12px;
+            color: #999;
+            text-align: center;
+            margin: 8px 0;
+        }
+
+        @keyframes slideIn {
+            from {
+                opacity: 0;
+                transform: translateY(10px);
+            }
+            to {
+                opacity: 1;
+                transform: translateY(0);
+            }
+        }
+
+        /* Scene title */
+        .scene-title {
+            text-align: center;
+            color: #007AFF;
+            font-size: 18px;
+            font-weight: bold;
+            margin-bottom: 20px;
+        }
+
+        /* Controls */
+        .controls {
+            display: flex;
+            gap: 10px;
+            justify-content: center;
+            margin-top: 20px;
+        }
+    </style>
+"""
+
+def bubble_html(sender: str, text: str) -> str:
+    """One chat bubble; AI messages on the left, worker replies on the right"""
+    message_class = "ai" if sender == "ai" else "worker"
+    return f"""
+            <div class="message {message_class}">
+                <div class="bubble {message_class}">
+                    {html.escape(text, quote=False)}
+                </div>
+            </div>
+        """
+
+
+
+# ============ SCENE LIBRARY ============
+
+def _signature(directory: str) -> Tuple:
+    files = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            stat = os.stat(os.path.join(directory, name))
+            files.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(files)
+
+
+def load_scenes(directory: str = SCENE_DIR) -> Dict[str, Dict[str, Any]]:
+    """Every scene in the library by id ("<file>/<scene>"), in file order.
+
+    A library file looks like:
+
+        {"industry": "Staffing", "scenes": [
+            {"id": "hook", "title": "...", "description": "...", "messages": [["ai", "Hi!"]]},
+            {"id": "follow-up", "parent": "hook", "title": "...", "messages": [["worker", "Hey"]]}
+        ]}
+
+    A scene with a parent (an id in the same file, or "<file>/<scene>")
+    plays the parent's messages and then its own, and inherits its title
+    and description unless it sets them. Each resolved scene carries its
+    bubble HTML, built once per distinct message; the library is kept
+    until one of its files changes.
+    """
+    signature = _signature(directory)
+    with _lock:
+        cached = _libraries.get(directory)
+        if cached is None or cached[0] != signature:
+            cached = _libraries[directory] = (signature, _build(_read(directory)))
+        return cached[1]
+
+
+def _read(directory: str) -> Dict[str, Dict[str, Any]]:
+    """Raw scene entries by qualified id"""
+    entries: Dict[str, Dict[str, Any]] = {}
+    for name, _, _ in _signature(directory):
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            library = json.load(f)
+        prefix = os.path.splitext(name)[0]
+        for entry in library.get("scenes", []):
+            scene_id = f"{prefix}/{entry['id']}"
+            if scene_id in entries:
+                raise ValueError(f"Duplicate scene {scene_id} in {name}")
+            parent = entry.get("parent")
+            entries[scene_id] = dict(entry, id=scene_id, industry=library.get("industry", prefix.title()),
+                                     parent=f"{prefix}/{parent}" if parent and "/" not in parent else parent)
+    return entries
+
+
+def _build(entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Resolve parents and precompile bubbles"""
+    bubbles: Dict[Tuple[str, str], str] = {}
+    scenes: Dict[str, Dict[str, Any]] = {}
+
+    def resolve(scene_id: str, chain: List[str]) -> Dict[str, Any]:
+        if scene_id in scenes:
+            return scenes[scene_id]
+        if scene_id in chain:
+            raise ValueError(f"Scene parents form a cycle: {' -> '.join(chain + [scene_id])}")
+        if scene_id not in entries:
+            raise ValueError(f"Scene {chain[-1]} has unknown parent {scene_id}")
+        entry = entries[scene_id]
+        parent = resolve(entry["parent"], chain + [scene_id]) if entry["parent"] else None
+
+        messages = []
+        for sender, text in entry.get("messages", []):
+            if sender not in SENDERS:
+                raise ValueError(f"Scene {scene_id}: sender must be one of {SENDERS}, got {sender!r}")
+            messages.append((sender, text))
+        scene = {
+            "id": scene_id,
+            "industry": entry["industry"],
+            "parent": entry["parent"],
+            "title": entry.get("title") or (parent["title"] if parent else scene_id),
+            "description": entry.get("description") or (parent["description"] if parent else ""),
+            "messages": (parent["messages"] if parent else ()) + tuple(messages),
+            "bubbles": (parent["bubbles"] if parent else ()) + tuple(
+                bubbles.setdefault(m, bubble_html(*m)) for m in messages)
+        }
+        scene["html"] = "".join(scene["bubbles"])
+        scenes[scene_id] = scene
+        return scene
+
+    return {scene_id: resolve(scene_id, []) for scene_id in entries}
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from api_client import api_client, APIClient, tenant_id
+
+# Where per-tenant document indexes live
+DATA_DIR = os.getenv("CXAI_DATA_DIR", ".cxai_data")
+
+# Incremental syncs only see documents added or changed, so re-list everything
+# this often (seconds) to drop deleted ones
+FULL_SYNC_INTERVAL = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY, filename TEXT NOT NULL, size_bytes INTEGER, tags TEXT, updated_at TEXT,
+    synced INTEGER
+);
+CREATE INDEX IF NOT EXISTS documents_filename ON documents (filename COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# One lock per database file so concurrent sessions of a tenant don't sync at once
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def _like(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def document_label(document: Dict[str, Any]) -> str:
+    """Filename with size and tags, for pickers"""
+    parts = [document["filename"]]
+    if document.get("size_bytes"):
+        parts.append(f"{document['size_bytes'] / 2 ** 20:.1f} MB")
+    if document.get("tags"):
+        parts.append(", ".join(document["tags"]))
+    return " · ".join(parts)
+
+
+class DocumentIndex:
+    """Knowledge-base document metadata (filename, size, tags, updated time) in SQLite.
+
+    sync() pages through documents updated since the last one it saw, so a
+    tenant with thousands of PDFs is downloaded once and then kept current
+    with small requests. search() and labels() read the local copy.
+    """
+
+    def __init__(self, token: str, client: APIClient = api_client, data_dir: str = DATA_DIR):
+        os.makedirs(data_dir, exist_ok=True)
+        self.token = token
+        self.client = client
+        self.path = os.path.join(data_dir, f"documents_{tenant_id(token)}.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _meta(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, full: bool = False) -> int:
+        """Fetch documents changed since the last sync (all of them if full); returns how many"""
+        with _lock_for(self.path):
+            with self._connect() as conn:
+                watermark = self._meta(conn, "watermark")
+                full_synced_at = float(self._meta(conn, "full_synced_at") or 0)
+            full = full or watermark is None or time.time() - full_synced_at > FULL_SYNC_INTERVAL
+            generation = time.time_ns()
+
+            fetched = 0
+            newest = watermark
+            for documents in self.client.iter_documents(self.token, updated_since=None if full else watermark):
+                with self._connect() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO documents (id, filename, size_bytes, tags, updated_at, synced) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [(d["id"], d.get("filename") or d["id"], d.get("size_bytes"),
+                          "|" + "|".join(d.get("tags") or []) + "|", d.get("updated_at"), generation)
+                         for d in documents]
+                    )
+                fetched += len(documents)
+                stamps = [d["updated_at"] for d in documents if d.get("updated_at")]
+                if stamps:
+                    newest = max([newest] + stamps) if newest else max(stamps)
+
+            with self._connect() as conn:
+                if full:
+                    conn.execute("DELETE FROM documents WHERE synced != ?", (generation,))
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('full_synced_at', ?)",
+                                 (str(time.time()),))
+                if newest:
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('watermark', ?)", (newest,))
+            return fetched
+
+    @staticmethod
+    def _row(row: Tuple) -> Dict[str, Any]:
+        doc_id, filename, size_bytes, tags, updated_at = row
+        return {"id": doc_id, "filename": filename, "size_bytes": size_bytes,
+                "tags": [t for t in (tags or "").split("|") if t], "updated_at": updated_at}
+
+    def search(self, query: str = "", limit: int = 100, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Documents whose filename or a tag contains every word of the query, by filename; plus the match count"""
+        clauses, params = [], []
+        for term in query.split():
+            clauses.append("(filename LIKE ? ESCAPE '\\' OR tags LIKE ? ESCAPE '\\')")
+            params += [_like(term), _like(term)]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM documents {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT id, filename, size_bytes, tags, updated_at FROM documents {where} "
+                f"ORDER BY filename COLLATE NOCASE, id LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [self._row(r) for r in rows], total
+
+    def get(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Indexed documents by id (ids not in the index are left out)"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, filename, size_bytes, tags, updated_at FROM documents "
+                f"WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {r[0]: self._row(r) for r in rows}
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
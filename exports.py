@@ -0,0 +1,211 @@
+import contextvars
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from api_client import api_client, APIClient, run_concurrently, tenant_id
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+# Where prepared exports are written before download, one directory per session
+EXPORT_DIR = os.path.join(os.getenv("CXAI_DATA_DIR", ".cxai_data"), "exports")
+
+# Prepared exports older than this are deleted by prune(), which the session sweep runs (seconds)
+EXPORT_MAX_AGE = 24 * 3600
+
+# Rows fetched per request, and rows buffered per Parquet row group
+EXPORT_PAGE_SIZE = 1000
+ROW_GROUP_ROWS = 50_000
+
+# Column layout (pandas dtype) of each export, so every page has the same schema
+EMPLOYEE_COLUMNS = {
+    "id": "string", "agent_id": "string", "first_name": "string", "last_name": "string", "phone": "string",
+    "email": "string", "hire_date": "string", "manager_name": "string", "site_location": "string",
+    "department": "string", "created_at": "datetime64[ns, UTC]"
+}
+CHECKIN_COLUMNS = {
+    "id": "string", "agent_id": "string", "employee_id": "string", "flow_name": "string", "status": "string",
+    "sentiment": "string", "sentiment_score": "float64", "churn_risk": "float64", "escalated": "boolean",
+    "site_location": "string", "created_at": "datetime64[ns, UTC]", "responded_at": "datetime64[ns, UTC]"
+}
+
+MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+Progress = Callable[[int, Optional[int]], None]
+
+
+def formats() -> List[str]:
+    """Export formats available here (Parquet needs pyarrow)"""
+    return ["parquet", "csv"] if pyarrow is not None else ["csv"]
+
+
+def records_frame(records: List[Dict[str, Any]], columns: Dict[str, str]) -> pd.DataFrame:
+    """One page of API records in a fixed column layout; unknown fields are left out"""
+    raw = pd.DataFrame.from_records(records, columns=list(columns))
+    frame = pd.DataFrame(index=raw.index)
+    for name, dtype in columns.items():
+        if dtype.startswith("datetime64"):
+            frame[name] = pd.to_datetime(raw[name], utc=True, errors="coerce", format="ISO8601").astype(dtype)
+        elif dtype == "float64":
+            frame[name] = pd.to_numeric(raw[name], errors="coerce").astype("float64")
+        elif dtype == "boolean":
+            frame[name] = raw[name].map(lambda v: v if isinstance(v, bool) else pd.NA).astype("boolean")
+        else:
+            frame[name] = raw[name].astype(dtype)
+    return frame
+
+
+def _pages(fetch: Callable[[int, int], Dict[str, Any]], key: str,
+           limit: int = EXPORT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield records page by page, fetching the next page while the caller writes this one"""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page = 1
+        future = executor.submit(contextvars.copy_context().run, fetch, page, limit)
+        while future is not None:
+            data = future.result()
+            records = data.get(key, [])
+            more = len(records) == limit and page * limit < data.get("total", float("inf"))
+            page += 1
+            future = executor.submit(contextvars.copy_context().run, fetch, page, limit) if more else None
+            if records:
+                yield records
+
+
+def write(pages: Iterable[List[Dict[str, Any]]], columns: Dict[str, str], fmt: str, out: BinaryIO,
+          total: Optional[int] = None, progress: Optional[Progress] = None) -> int:
+    """Write pages of records to out as CSV or Parquet, one page in memory at a time; returns rows written.
+
+    Parquet row groups buffer up to ROW_GROUP_ROWS rows before they are
+    compressed and written.
+    """
+    if fmt not in MIME_TYPES:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet" and pyarrow is None:
+        raise ValueError("Parquet export needs pyarrow installed")
+
+    rows = 0
+    if fmt == "csv":
+        records_frame([], columns).to_csv(out, index=False)
+        for records in pages:
+            frame = records_frame(records, columns)
+            frame.to_csv(out, index=False, header=False)
+            rows += len(frame)
+            if progress:
+                progress(rows, total)
+        return rows
+
+    schema = pyarrow.Schema.from_pandas(records_frame([], columns), preserve_index=False)
+    buffered: List[pd.DataFrame] = []
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        def flush():
+            if buffered:
+                table = pyarrow.Table.from_pandas(pd.concat(buffered, ignore_index=True), schema=schema,
+                                                  preserve_index=False)
+                writer.write_table(table)
+                buffered.clear()
+
+        for records in pages:
+            frame = records_frame(records, columns)
+            buffered.append(frame)
+            rows += len(frame)
+            if sum(len(f) for f in buffered) >= ROW_GROUP_ROWS:
+                flush()
+            if progress:
+                progress(rows, total)
+        flush()
+    return rows
+
+
+# ============ EXPORTS ============
+
+def _export(sources: Dict[Any, Callable[[int, int], Dict[str, Any]]], key: str, columns: Dict[str, str],
+            fmt: str, out: BinaryIO, progress: Optional[Progress]) -> int:
+    """Stream every page of each source (a page fetcher) to out, after asking each for its total"""
+    totals = run_concurrently({name: (lambda fetch=fetch: fetch(1, 1)) for name, fetch in sources.items()})
+    for result in totals.values():
+        if isinstance(result, Exception):
+            raise result
+    total = sum(result.get("total", 0) for result in totals.values())
+
+    def pages():
+        for fetch in sources.values():
+            yield from _pages(fetch, key)
+
+    return write(pages(), columns, fmt, out, total, progress)
+
+
+def export_employees(token: str, agent_ids: List[str], fmt: str, out: BinaryIO,
+                     progress: Optional[Progress] = None, client: APIClient = api_client) -> int:
+    """Stream every employee of the given agents (one row per agent assignment) to out"""
+    sources = {
+        agent_id: (lambda page, limit, agent_id=agent_id: client.get_employees(token, agent_id, page, limit))
+        for agent_id in agent_ids
+    }
+    try:
+        return _export(sources, "employees", EMPLOYEE_COLUMNS, fmt, out, progress)
+    except Exception as e:
+        raise Exception(f"Export employees error: {str(e)}")
+
+
+def export_checkins(token: str, fmt: str, out: BinaryIO, since: Optional[str] = None, until: Optional[str] = None,
+                    agent_ids: Iterable[str] = (), progress: Optional[Progress] = None,
+                    client: APIClient = api_client) -> int:
+    """Stream raw check-ins created in [since, until) to out, for the given agents (all if none)"""
+    sources = {
+        agent_id: (lambda page, limit, agent_id=agent_id: client.get_checkins(
+            token, agent_id=agent_id, since=since, until=until, page=page, limit=limit))
+        for agent_id in list(agent_ids) or [None]
+    }
+    try:
+        return _export(sources, "check_ins", CHECKIN_COLUMNS, fmt, out, progress)
+    except Exception as e:
+        raise Exception(f"Export check-ins error: {str(e)}")
+
+
+# ============ FILES ============
+
+def export_path(token: str, name: str, fmt: str) -> str:
+    """A new file for an export, in this session's directory under EXPORT_DIR"""
+    ctx = get_script_run_ctx()
+    directory = os.path.join(EXPORT_DIR, ctx.session_id if ctx else "shared")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{name}_{tenant_id(token)}_{uuid.uuid4().hex[:8]}.{fmt}")
+
+
+def discard(path: str):
+    """Delete a prepared export, if it is still there"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_session(session_id: str):
+    """Delete every export prepared by a session"""
+    shutil.rmtree(os.path.join(EXPORT_DIR, session_id), ignore_errors=True)
+
+
+def prune():
+    """Delete prepared exports older than EXPORT_MAX_AGE, and session directories left empty by them"""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - EXPORT_MAX_AGE
+    for directory in os.scandir(EXPORT_DIR):
+        if not directory.is_dir():
+            continue
+        for entry in os.scandir(directory.path):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                discard(entry.path)
+        if directory.stat().st_mtime < cutoff:
+            try:
+                os.rmdir(directory.path)
+            except OSError:
+                pass
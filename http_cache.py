@@ -0,0 +1,159 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from requests.adapters import HTTPAdapter
+
+# Default cap on stored response bodies (bytes)
+DEFAULT_MAX_BYTES = int(os.getenv("API_HTTP_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    tenant TEXT NOT NULL, url TEXT NOT NULL,
+    etag TEXT, last_modified TEXT, content_type TEXT,
+    body BLOB NOT NULL, size INTEGER NOT NULL,
+    stored_at REAL NOT NULL, accessed_at REAL NOT NULL,
+    PRIMARY KEY (tenant, url)
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at);
+"""
+
+
+def tenant_key(authorization: Optional[str], tenant_of: Optional[Callable[[str], str]] = None) -> str:
+    """Partition of the cache a request uses, so cached bodies never cross tenants.
+
+    With tenant_of, a bearer token maps to its tenant, so renewed tokens
+    keep the same entries; otherwise the whole header is hashed.
+    """
+    if tenant_of and authorization and authorization.startswith("Bearer "):
+        return tenant_of(authorization[len("Bearer "):])
+    return hashlib.sha256((authorization or "").encode()).hexdigest()
+
+
+class HTTPCache:
+    """Size-bounded SQLite store of GET response bodies and their validators.
+
+    Entries are keyed by (tenant, URL) and evicted least-recently-used once
+    the stored bodies exceed max_bytes. Safe to share between threads and
+    between server processes pointing at the same file.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, tenant: str, url: str) -> Optional[Dict[str, Any]]:
+        """Stored entry for tenant and URL, or None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, content_type, body FROM responses WHERE tenant = ? AND url = ?",
+                (tenant, url)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_type": row[2], "body": row[3]}
+
+    def touch(self, tenant: str, url: str):
+        """Mark an entry as just used (for LRU eviction)"""
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE tenant = ? AND url = ?",
+                         (time.time(), tenant, url))
+
+    def put(self, tenant: str, url: str, body: bytes, etag: Optional[str],
+            last_modified: Optional[str], content_type: Optional[str]):
+        """Store a response body, then evict old entries if over the size cap"""
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(tenant, url, etag, last_modified, content_type, body, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tenant, url, etag, last_modified, content_type, body, len(body), now, now)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for entry_tenant, entry_url, size in conn.execute(
+                        "SELECT tenant, url, size FROM responses ORDER BY accessed_at").fetchall():
+                    conn.execute("DELETE FROM responses WHERE tenant = ? AND url = ?", (entry_tenant, entry_url))
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+
+    def delete(self, tenant: str, url: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE tenant = ? AND url = ?", (tenant, url))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count and stored bytes"""
+        with self._lock, self._connect() as conn:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter that revalidates GETs against an HTTPCache.
+
+    A cached URL is re-requested with If-None-Match/If-Modified-Since; on 304
+    the stored body is returned as a 200 without downloading it again. Only
+    responses carrying an ETag or Last-Modified are stored, since anything
+    else could not be revalidated.
+    """
+
+    def __init__(self, cache: HTTPCache, tenant_of: Optional[Callable[[str], str]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.tenant_of = tenant_of
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        tenant = tenant_key(request.headers.get("Authorization"), self.tenant_of)
+        entry = self.cache.get(tenant, request.url)
+        if entry:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, **kwargs)
+        response.from_cache = False
+
+        if response.status_code == 304 and entry:
+            response.status_code = 200
+            response.reason = "OK"
+            response._content = entry["body"]
+            response._content_consumed = True
+            response.headers.pop("Content-Encoding", None)
+            response.headers["Content-Length"] = str(len(entry["body"]))
+            if entry["content_type"]:
+                response.headers["Content-Type"] = entry["content_type"]
+            response.from_cache = True
+            self.cache.touch(tenant, request.url)
+        elif response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if "no-store" in response.headers.get("Cache-Control", ""):
+                self.cache.delete(tenant, request.url)
+            elif etag or last_modified:
+                self.cache.put(tenant, request.url, response.content, etag, last_modified,
+                               response.headers.get("Content-Type"))
+        return response
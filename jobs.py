@@ -0,0 +1,350 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from api_client import (api_client, BULK_BATCH_SIZE, MAX_CONCURRENT_REQUESTS, changed_fields, run_concurrently,
+                        tenant_id)
+from metrics import run_in_page
+from shared_cache import shared_cache
+
+# Where job state is kept
+DATA_DIR = os.getenv("CXAI_DATA_DIR", ".cxai_data")
+
+# Jobs this server process runs at once; the rest wait queued
+MAX_JOB_WORKERS = int(os.getenv("CXAI_JOB_WORKERS", "2"))
+
+# Finished jobs older than this are deleted at startup and whenever a job is submitted (seconds)
+JOB_RETENTION = 7 * 24 * 3600
+
+# Each runner stamps its heartbeat this often; unfinished jobs of a runner silent
+# for HEARTBEAT_STALE are marked interrupted by any other runner (seconds)
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_STALE = 60
+
+# Progress is saved, and cancellation checked, at most this often while a job runs (seconds)
+CHECK_INTERVAL = 0.5
+
+FINISHED = ("succeeded", "failed", "cancelled", "interrupted")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, tenant TEXT NOT NULL, user TEXT, kind TEXT NOT NULL, title TEXT, status TEXT NOT NULL,
+    params TEXT, result TEXT, error TEXT, done INTEGER DEFAULT 0, total INTEGER, cancel_requested INTEGER DEFAULT 0,
+    retry_of TEXT, runner TEXT, created_at REAL, started_at REAL, finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_tenant ON jobs (tenant, created_at);
+CREATE TABLE IF NOT EXISTS runners (id TEXT PRIMARY KEY, heartbeat_at REAL NOT NULL);
+"""
+
+_COLUMNS = ("id, tenant, user, kind, title, status, result, error, done, total, cancel_requested, retry_of, "
+            "created_at, started_at, finished_at")
+
+
+def _columns(with_params: bool = False) -> str:
+    return _COLUMNS + (", params" if with_params else ", NULL AS params")
+
+
+# Job kind -> fn(job, **params) returning a JSON-serializable result; job.token() gives the access token
+JOB_KINDS: Dict[str, Callable[..., Any]] = {}
+
+
+def job_kind(name: str):
+    """Register a function as a job kind"""
+    def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+        JOB_KINDS[name] = fn
+        return fn
+    return register
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class Job:
+    """Handle a running job uses to report progress and notice cancellation"""
+
+    def __init__(self, runner: "JobRunner", job_id: str, token: Callable[[], str]):
+        self.runner = runner
+        self.id = job_id
+        self.token = token
+        self.done = 0
+        self.total: Optional[int] = None
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    def progress(self, done: int, total: Optional[int] = None):
+        """Set rows done (and the total, if known); saved at most every CHECK_INTERVAL"""
+        with self._lock:
+            self.done = done
+            self.total = self.total if total is None else total
+        self._save()
+
+    def advance(self, count: int = 1):
+        """Add to rows done; safe to call from worker threads"""
+        with self._lock:
+            self.done += count
+        self._save()
+
+    def _save(self):
+        now = time.time()
+        if now - self._saved_at >= CHECK_INTERVAL:
+            self._saved_at = now
+            self.runner._update(self.id, done=self.done, total=self.total)
+
+    def check(self):
+        """Raise JobCancelled if the job was cancelled; call between units of work"""
+        if self.runner._cancel_requested(self.id):
+            raise JobCancelled()
+
+
+class JobRunner:
+    """Runs long operations on a thread pool owned by the server process, not a session.
+
+    Jobs survive reruns, navigation and closed tabs. Their state, progress
+    and result are kept in SQLite, so any session of the tenant can follow
+    them. Cancellation is cooperative: a job stops at its next check().
+    Several server processes may share the store. Each runner has an id
+    and a heartbeat; jobs whose runner stopped beating (its process
+    exited) are marked interrupted by whichever runner notices first, and
+    can be retried. Tokens are never stored; a retry uses the token of
+    whoever retries it, who must belong to the job's tenant.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, max_workers: int = MAX_JOB_WORKERS):
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, "jobs.sqlite3")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cxai-job")
+        self._last_check: Dict[str, float] = {}
+        self.id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            if "runner" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN runner TEXT")
+            self._beat(conn)
+            self._prune(conn)
+        threading.Thread(target=self._heartbeat, name="cxai-job-heartbeat", daemon=True).start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _beat(self, conn: sqlite3.Connection):
+        """Stamp this runner's heartbeat, then interrupt the unfinished jobs of runners that have gone quiet"""
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO runners (id, heartbeat_at) VALUES (?, ?)", (self.id, now))
+        conn.execute("UPDATE jobs SET status = 'interrupted', finished_at = ? "
+                     "WHERE status IN ('queued', 'running') "
+                     "AND (runner IS NULL OR runner NOT IN (SELECT id FROM runners WHERE heartbeat_at >= ?))",
+                     (now, now - HEARTBEAT_STALE))
+        conn.execute("DELETE FROM runners WHERE heartbeat_at < ?", (now - HEARTBEAT_STALE,))
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                with self._connect() as conn:
+                    self._beat(conn)
+            except sqlite3.Error:
+                # Store busy or briefly unavailable; the next beat is well within HEARTBEAT_STALE
+                continue
+
+    @staticmethod
+    def _prune(conn: sqlite3.Connection):
+        conn.execute(f"DELETE FROM jobs WHERE status IN {FINISHED} AND finished_at < ?",
+                     (time.time() - JOB_RETENTION,))
+
+    def _update(self, job_id: str, **fields: Any):
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                         list(fields.values()) + [job_id])
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        now = time.time()
+        if now - self._last_check.get(job_id, 0) < CHECK_INTERVAL:
+            return False
+        self._last_check[job_id] = now
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def submit(self, kind: str, token: str, params: Dict[str, Any], title: str, user: str = "",
+               retry_of: Optional[str] = None) -> str:
+        """Queue a job; returns its id"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            self._prune(conn)
+            conn.execute(
+                "INSERT INTO jobs (id, tenant, user, kind, title, status, params, retry_of, runner, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, tenant_id(token), user, kind, title, json.dumps(params), retry_of, self.id, time.time())
+            )
+        # Follow the login across renewals, so queued and long jobs outlive the token they were given
+        self._executor.submit(run_in_page, "job", self._run, job_id, kind, api_client.tokens.follow(token), params)
+        return job_id
+
+    def _run(self, job_id: str, kind: str, token: Callable[[], str], params: Dict[str, Any]):
+        with self._connect() as conn:
+            started = conn.execute("UPDATE jobs SET status = 'running', started_at = ? "
+                                   "WHERE id = ? AND status = 'queued'", (time.time(), job_id)).rowcount
+        if not started:
+            return
+        job = Job(self, job_id, token)
+        try:
+            result = JOB_KINDS[kind](job, **params)
+            status, error = "succeeded", None
+        except JobCancelled:
+            result, status, error = None, "cancelled", None
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+        # Parameters (e.g. every imported row) are only needed to retry, and a succeeded job isn't retried
+        fields = {"params": None} if status == "succeeded" else {}
+        self._update(job_id, status=status, error=error, result=json.dumps(result), done=job.done,
+                     total=job.total, finished_at=time.time(), **fields)
+        self._last_check.pop(job_id, None)
+
+    def cancel(self, job_id: str):
+        """Cancel a queued job now, or ask a running one to stop"""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                         (time.time(), job_id))
+
+    def retry(self, job_id: str, token: str, user: str = "") -> str:
+        """Run a failed, cancelled or interrupted job again with the same parameters; returns the new job's id"""
+        job = self.get(job_id, with_params=True)
+        if job is None or job["tenant"] != tenant_id(token):
+            raise ValueError(f"Unknown job: {job_id}")
+        if job["params"] is None:
+            raise ValueError(f"Job {job_id} succeeded and can't be retried")
+        return self.submit(job["kind"], token, job["params"], job["title"], user=user, retry_of=job_id)
+
+    # ============ VIEWS ============
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["params"] = json.loads(job["params"]) if job["params"] else None
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        end = job["finished_at"] or time.time()
+        elapsed = end - job["started_at"] if job["started_at"] else 0.0
+        job["elapsed_s"] = round(elapsed, 1)
+        job["rate"] = round(job["done"] / elapsed, 1) if elapsed > 0 else 0.0
+        remaining = (job["total"] or 0) - job["done"]
+        job["eta_s"] = round(remaining / job["rate"]) if job["status"] == "running" and job["rate"] else None
+        return job
+
+    def get(self, job_id: str, with_params: bool = False) -> Optional[Dict[str, Any]]:
+        """One job (its parameters, e.g. every imported row, only if asked for)"""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {_columns(with_params)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def jobs(self, tenant: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """A tenant's most recent jobs, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {_columns()} FROM jobs WHERE tenant = ? ORDER BY created_at DESC LIMIT ?",
+                                (tenant, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def counts(self, tenant: str) -> Dict[str, int]:
+        """Jobs per status for a tenant"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs WHERE tenant = ? GROUP BY status",
+                                (tenant,)).fetchall()
+        return {status: count for status, count in rows}
+
+
+# ============ JOB KINDS ============
+
+# Rows sent per chunk of an import; progress and cancellation are checked between chunks
+IMPORT_CHUNK_ROWS = BULK_BATCH_SIZE * MAX_CONCURRENT_REQUESTS
+
+# Failed rows kept in an import's result
+MAX_REPORTED_FAILURES = 500
+
+
+@job_kind("import_employees")
+def import_employees(job: Job, agent_id: str, employees: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bulk-import employees chunk by chunk; failures are reported by CSV row"""
+    summary = {"created": 0, "updated": 0, "failed": 0, "failures": []}
+    job.progress(0, len(employees))
+    try:
+        for start in range(0, len(employees), IMPORT_CHUNK_ROWS):
+            job.check()
+            result = api_client.add_employees_bulk(job.token(), agent_id, employees[start:start + IMPORT_CHUNK_ROWS])
+            for key in ("created", "updated", "failed"):
+                summary[key] += result[key]
+            failures = [{"index": start + r["index"], "error": r["error"]} for r in result["results"] if not r["ok"]]
+            summary["failures"] += failures[:MAX_REPORTED_FAILURES - len(summary["failures"])]
+            job.progress(start + len(result["results"]))
+    finally:
+        # Even a cancelled or failed import may have added rows; every session of the tenant refetches
+        shared_cache.invalidate(tenant_id(job.token()), lambda key: key[0] == "get_employee_directory")
+    return summary
+
+
+@job_kind("bulk_agent_action")
+def bulk_agent_action(job: Job, agents: List[Dict[str, Any]], action: str, flows: Dict[str, bool],
+                      voice: Optional[str], tone: Optional[float]) -> List[Dict[str, Any]]:
+    """Apply one action to several agents concurrently; one result row per agent"""
+    token = job.token()
+    calls = {}
+    skipped = {}
+    for agent in agents:
+        if action == "Activate":
+            if agent['status'] == 'active':
+                skipped[agent['id']] = "➖ Already active"
+                continue
+            calls[agent['id']] = lambda agent=agent: api_client.activate_agent(token, agent['id'])
+            continue
+
+        if action == "Set Flows":
+            # PATCH replaces flows_enabled as a whole, so merge into each agent's current flows
+            updates = {"flows_enabled": dict(agent.get('flows_enabled') or {}, **flows)}
+        else:
+            updates = {}
+            if voice:
+                updates["voice_name"] = voice
+            if tone is not None:
+                updates["tone_score"] = tone
+        if not changed_fields(agent, updates):
+            skipped[agent['id']] = "➖ No change"
+            continue
+        calls[agent['id']] = lambda agent=agent, updates=updates: api_client.update_agent(
+            token, agent['id'], updates, current=agent)
+
+    def counted(call: Callable[[], Any]) -> Callable[[], Any]:
+        def run():
+            try:
+                return call()
+            finally:
+                job.advance()
+        return run
+
+    job.progress(len(skipped), len(agents))
+    job.check()
+    outcomes = run_concurrently({agent_id: counted(call) for agent_id, call in calls.items()})
+    shared_cache.invalidate(tenant_id(token), lambda key: key[0] == "get_agents")
+
+    results = []
+    for agent in agents:
+        outcome = outcomes.get(agent['id'])
+        if agent['id'] in skipped:
+            result = skipped[agent['id']]
+        elif isinstance(outcome, Exception):
+            result = f"❌ {str(outcome)}"
+        else:
+            result = "✅ Done"
+        results.append({"Agent": agent['name'], "Action": action, "Result": result})
+    return results
+
+
+# Server-wide runner shared by every session
+job_runner = JobRunner()
@@ -0,0 +1,53 @@
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# "orjson", "stdlib", or "auto" (orjson when installed)
+JSON_CODEC = os.getenv("CXAI_JSON_CODEC", "auto")
+
+CODECS = ("orjson", "stdlib")
+
+name = "stdlib"
+
+
+def use(codec: str = "auto") -> str:
+    """Select the codec used by loads/dumps; returns the one in effect"""
+    global name
+    if codec == "auto":
+        codec = "orjson" if orjson is not None else "stdlib"
+    if codec not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {codec}")
+    if codec == "orjson" and orjson is None:
+        raise ValueError("orjson is not installed")
+    name = codec
+    return name
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document"""
+    if name == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to compact UTF-8 JSON.
+
+    orjson also handles numpy scalars (e.g. values read from a CSV with
+    pandas) and writes NaN as null; anything it can't encode, such as
+    integers wider than 64 bits, goes through the stdlib encoder instead.
+    """
+    if name == "orjson":
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, allow_nan=False).encode()
+
+
+use(JSON_CODEC)
@@ -0,0 +1,281 @@
+"""Concurrent-session load test of the Streamlit app against the local stub backend.
+
+Each simulated user is a headless session of main.py (Streamlit's AppTest)
+that logs in as its own tenant, visits every page and imports a CSV through
+the Employees page. All sessions share one process, and so one APIClient and
+session-cache executor, as they would on a real Streamlit server. For each
+concurrency level it reports throughput, rerun latency percentiles, peak
+thread count and memory growth:
+
+    python loadtest.py --users 1 4 16 --latency-ms 40 --jitter-ms 15
+    python loadtest.py --users 8 --rounds 3 --import-rows 200 --think-ms 500
+"""
+import argparse
+import gc
+import os
+import resource
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from stub_server import add_backend_arguments, backend_options, start_stub_server
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def share_server_state():
+    """Make concurrent AppTest sessions share what one Streamlit server shares.
+
+    AppTest was written for one app at a time. Each run compiles the script
+    afresh (a server compiles it once, and concurrent compiles trip a CPython
+    3.11 ast.parse race) and sets, then clears, the process-wide Runtime
+    singleton while other sessions' runs may still need it.
+    """
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    fallback = MagicMock(spec=Runtime)
+    fallback.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    fallback.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or fallback)
+
+    compiled: Dict[str, Any] = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_get_bytecode(self, script_path: str) -> Any:
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+    ScriptCache.get_bytecode = shared_get_bytecode
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def employees_csv(user: int, rows: int) -> bytes:
+    lines = ["first_name,last_name,phone,email,hire_date,manager_name,site_location"]
+    for i in range(rows):
+        lines.append(f"Load,User{user}Row{i},+1777{user:03d}{i:04d},load{user}.{i}@example.com,"
+                     f"2024-01-01,Sam,Main Site")
+    return ("\n".join(lines) + "\n").encode()
+
+
+class Sampler:
+    """Samples thread count and RSS on a background thread while a level runs"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loadtest-sampler", daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class UserSession:
+    """One simulated user driving a headless session of the app"""
+
+    def __init__(self, user: int, email: str, import_rows: int, think: float, timeout: float):
+        from streamlit.testing.v1 import AppTest
+
+        self.user = user
+        self.email = email
+        self.import_rows = import_rows
+        self.think = think
+        self.timeout = timeout
+        self.app = AppTest.from_file(MAIN_SCRIPT, default_timeout=timeout)
+        self.timings: List[Tuple[str, float]] = []
+        self.errors: List[str] = []
+
+    def _step(self, name: str, action):
+        """Run one interaction (a rerun of the script) and time it"""
+        started = time.perf_counter()
+        try:
+            action()
+        except Exception as e:
+            self.errors.append(f"{name}: {str(e)}")
+            return
+        finally:
+            self.timings.append((name, time.perf_counter() - started))
+        problems = [e.value for e in self.app.exception] + [e.value for e in self.app.error]
+        if problems:
+            self.errors.append(f"{name}: {problems[0]}")
+        if self.think:
+            time.sleep(self.think)
+
+    def run(self):
+        app = self.app
+        self._step("open", app.run)
+
+        def login():
+            app.text_input(key="login_email").input(self.email)
+            app.text_input(key="login_password").input("loadtest")
+            app.button(key="login_btn").click().run()
+        self._step("login", login)
+        if not app.sidebar.radio:
+            self.errors.append("login: no navigation after logging in")
+            return
+
+        nav = app.sidebar.radio[0]
+        pages = list(nav.options)
+        for page in pages:
+            self._step(page, lambda: app.sidebar.radio[0].set_value(page).run())
+
+        employees_page = next((p for p in pages if "Employees" in p), None)
+        if employees_page and self.import_rows:
+            self._step(employees_page, lambda: app.sidebar.radio[0].set_value(employees_page).run())
+            csv = employees_csv(self.user, self.import_rows)
+            self._step("upload", lambda: app.file_uploader[0].set_value(("employees.csv", csv, "text/csv")).run())
+            self._step("import", self._import)
+
+    def _import(self):
+        """Start the import, then wait for its background job to finish"""
+        from jobs import job_runner, FINISHED
+
+        app = self.app
+        next(b for b in app.button if b.label == "✅ Import").click().run()
+        if "import_job" not in app.session_state:
+            raise Exception("no import job was started")
+        job_id = app.session_state["import_job"]
+        deadline = time.monotonic() + self.timeout
+        job = job_runner.get(job_id)
+        while job["status"] not in FINISHED:
+            if time.monotonic() > deadline:
+                raise Exception(f"import job still {job['status']} after {self.timeout:.0f}s")
+            time.sleep(0.05)
+            job = job_runner.get(job_id)
+        if job["status"] != "succeeded":
+            raise Exception(f"import job {job['status']}" + (f": {job['error']}" if job["error"] else ""))
+
+
+def run_level(users: int, rounds: int, import_rows: int, think: float, timeout: float) -> Dict[str, Any]:
+    """Run `users` concurrent sessions, `rounds` times over, and summarize"""
+    from benchmark import percentile
+
+    gc.collect()
+    rss_before = rss_mb()
+    threads_before = threading.active_count()
+    timings: List[Tuple[str, float]] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    def worker(user: int):
+        for r in range(rounds):
+            session = UserSession(user, f"load-{users}-{user}-{r}@example.com", import_rows, think, timeout)
+            session.run()
+            with lock:
+                timings.extend(session.timings)
+                errors.extend(session.errors)
+
+    with Sampler() as sampler:
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(u,), name=f"loadtest-user-{u}") for u in range(users)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - started
+
+    gc.collect()
+    seconds = [t for _, t in timings]
+    by_step: Dict[str, List[float]] = {}
+    for name, t in timings:
+        by_step.setdefault(name, []).append(t)
+    return {
+        "users": users,
+        "sessions": users * rounds,
+        "interactions": len(timings),
+        "seconds": elapsed,
+        "sessions_per_second": users * rounds / elapsed if elapsed else 0.0,
+        "reruns_per_second": len(timings) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(seconds, 50) * 1000,
+        "p95_ms": percentile(seconds, 95) * 1000,
+        "p99_ms": percentile(seconds, 99) * 1000,
+        "step_p95_ms": {name: percentile(values, 95) * 1000 for name, values in by_step.items()},
+        "threads_before": threads_before,
+        "peak_threads": sampler.peak_threads,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": sampler.peak_rss_mb,
+        "rss_after_mb": rss_mb(),
+        "errors": errors
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"\n{'users':>6}{'sessions':>9}{'reruns/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'threads':>9}{'peak MB':>9}{'+MB kept':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['users']:>6}{r['sessions']:>9}{r['reruns_per_second']:>10.1f}"
+              f"{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}{r['p99_ms']:>9.0f}"
+              f"{r['peak_threads']:>9}{r['peak_rss_mb']:>9.0f}{r['rss_after_mb'] - r['rss_before_mb']:>+10.1f}"
+              f"{len(r['errors']):>8}")
+
+    steps = list(results[0]["step_p95_ms"]) if results else []
+    print(f"\n{'p95 ms by step':<28}" + "".join(f"{str(r['users']) + ' users':>10}" for r in results))
+    for step in steps:
+        print(f"{step:<28}" + "".join(f"{r['step_p95_ms'].get(step, 0.0):>10.0f}" for r in results))
+
+    for r in results:
+        for error in r["errors"][:3]:
+            print(f"  [{r['users']} users] {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test concurrent app sessions against the stub backend")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Concurrency levels to run, in order")
+    parser.add_argument("--rounds", type=int, default=1, help="Sessions each user runs back to back")
+    parser.add_argument("--import-rows", type=int, default=20, help="Rows in each user's CSV import (0 to skip)")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pause after each interaction")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed for one rerun")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    # main.py reads these when api_client is first imported, so nothing above may import it;
+    # every session then shares the one module-level APIClient
+    server, base_url = start_stub_server(**backend_options(args))
+    os.environ["API_BASE_URL"] = base_url
+    os.environ.setdefault("CXAI_DATA_DIR", tempfile.mkdtemp(prefix="cxai-loadtest-"))
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+    share_server_state()
+    try:
+        results = []
+        for users in args.users:
+            result = run_level(users, args.rounds, args.import_rows, args.think_ms / 1000, args.timeout)
+            results.append(result)
+            print(f"{users} users: {result['interactions']} reruns in {result['seconds']:.1f}s")
+        print_report(results)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,25 @@
 import streamlit as st
-from api_client import api_client
+from api_client import api_client, changed_fields, tenant_id
+import session_cache
+import session_memory
+from session_cache import cached_call, EMPLOYEE_PAGE_SIZE
+from analytics_engine import CheckinAnalytics
+from rollup_store import RollupStore
+from document_index import DocumentIndex, document_label
+from metrics import api_metrics, page_context
+from shared_cache import shared_cache
+import exports
+from jobs import job_runner, FINISHED
+import profiling
+from profiling import phase, profile_page
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, date, timedelta
+import time
+import os
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+# Show the Diagnostics page (API metrics) in the sidebar
+ADMIN_MODE = os.getenv("CXAI_ADMIN_MODE") == "1"
 
 # Page config
 st.set_page_config(
@@ -20,6 +38,25 @@ if "logged_in" not in st.session_state:
 
 # ============ AUTHENTICATION ============
 
+def same_tenant(token: str) -> bool:
+    """Whether a token held by a session object belongs to the logged-in tenant (renewals keep the tenant)"""
+    return tenant_id(token) == tenant_id(st.session_state.token)
+
+def log_out(message: Optional[str] = None):
+    """End the session; message is shown on the login page"""
+    api_client.logout(st.session_state.token)
+    st.session_state.logged_in = False
+    st.session_state.token = None
+    st.session_state.pop("token_source", None)
+    st.session_state.api_error = message
+    session_cache.clear()
+    for key in ("analytics_engine", "import_job", "bulk_agent_job", "watched_jobs"):
+        st.session_state.pop(key, None)
+    for name in ("employees", "checkins"):
+        prepared = st.session_state.pop(f"{name}_export", None)
+        if prepared:
+            exports.discard(prepared["path"])
+
 def show_login_page():
     col1, col2, col3 = st.columns([1, 2, 1])
     
@@ -28,6 +65,9 @@ def show_login_page():
         st.markdown("### Replace Forms. Retain Workers. Grow Your Business.")
         st.markdown("---")
         
+        if st.session_state.api_error:
+            st.warning(st.session_state.api_error)
+        
         tab1, tab2 = st.tabs(["Sign Up", "Log In"])
         
         with tab1:
@@ -53,13 +93,16 @@ def show_login_page():
                             )
                         
                         st.session_state.logged_in = True
+                        st.session_state.api_error = None
                         st.session_state.token = response['access_token']
+                        st.session_state.token_source = api_client.tokens.follow(st.session_state.token)
                         st.session_state.customer = {
                             "email": email,
                             "company_name": company_name,
                             "industry": industry,
                             "employee_count": employee_count
                         }
+                        session_cache.prefetch(st.session_state.token)
                         st.success("✅ Account created! Welcome!")
                         st.rerun()
                     except Exception as e:
@@ -79,11 +122,14 @@ def show_login_page():
                             response = api_client.login(email, password)
                         
                         st.session_state.logged_in = True
+                        st.session_state.api_error = None
                         st.session_state.token = response['access_token']
+                        st.session_state.token_source = api_client.tokens.follow(st.session_state.token)
                         st.session_state.customer = {
                             "email": email,
                             "company_name": "Your Company"
                         }
+                        session_cache.prefetch(st.session_state.token)
                         st.success("✅ Logged in!")
                         st.rerun()
                     except Exception as e:
@@ -94,6 +140,14 @@ def show_login_page():
 # ============ MAIN APP ============
 
 def show_dashboard():
+    # The client renews the token ahead of expiry; keep the stored one current
+    token_source = st.session_state.get("token_source") or api_client.tokens.follow(st.session_state.token)
+    st.session_state.token = token_source()
+    remaining = api_client.tokens.expires_in(st.session_state.token)
+    if remaining is not None and remaining <= 0:
+        log_out("⏰ Your session expired. Please log in again.")
+        st.rerun()
+    
     # Sidebar
     with st.sidebar:
         st.markdown(f"### 👤 {st.session_state.customer['company_name']}")
@@ -101,29 +155,23 @@ def show_dashboard():
         st.markdown("---")
         
         st.markdown("### 📍 Navigation")
+        pages = list(PAGES.keys()) + (["🛠️ Diagnostics"] if ADMIN_MODE else [])
         page = st.radio("",
-                        ["🏠 Onboarding", "🤖 Agent Configuration", "🤖 Agents", "👥 Employees", "⚙️ Settings", "📊 Analytics"],
+                        pages,
                         label_visibility="collapsed")
         
         st.markdown("---")
         if st.button("🚪 Log Out"):
-            st.session_state.logged_in = False
-            st.session_state.token = None
+            log_out()
             st.rerun()
     
-    # Main content
-    if page == "🏠 Onboarding":
-        show_dashboard_page()
-    elif page == "🤖 Agent Configuration":
-        show_agent_configuration_page()
-    elif page == "🤖 Agents":
-        show_agents_page()
-    elif page == "👥 Employees":
-        show_employees_page()
-    elif page == "⚙️ Settings":
-        show_settings_page()
-    elif page == "📊 Analytics":
-        show_analytics_page()
+    notify_finished_jobs()
+    
+    # Main content - API calls made while rendering are attributed to the page
+    page_fn = show_diagnostics_page if page == "🛠️ Diagnostics" else PAGES[page]
+    with page_context(page_fn.__name__), profile_page(page_fn.__name__):
+        page_fn()
+    session_memory.track()
 
 # ============ DASHBOARD PAGE ============
 
@@ -133,7 +181,7 @@ def show_dashboard_page():
     
     # Get agents
     try:
-        agents = api_client.get_agents(st.session_state.token)
+        agents = cached_call(api_client.get_agents, st.session_state.token)
     except Exception as e:
         st.error(f"Failed to load agents: {str(e)}")
         agents = []
@@ -148,7 +196,7 @@ def show_dashboard_page():
     
     # Summary Cards
     try:
-        summary = api_client.get_dashboard_summary(st.session_state.token)
+        summary = cached_call(api_client.get_dashboard_summary, st.session_state.token)
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -157,8 +205,10 @@ def show_dashboard_page():
         
         with col2:
             try:
-                employee_data = api_client.get_employees(st.session_state.token, agents[0]['id'])
-                st.metric("Employees", employee_data.get('total', 0))
+                directory = cached_call(api_client.get_employee_directory, st.session_state.token,
+                                        tuple(a['id'] for a in agents))
+                st.metric("Employees", directory.get('total', 0),
+                          help=f"Unique people across {len(agents)} agent(s)")
             except:
                 st.metric("Employees", "N/A")
         
@@ -194,13 +244,70 @@ def show_dashboard_page():
 
 # ============ AGENT CONFIGURATION PAGE ============
 
+# Search matches offered by the knowledge base picker at once
+DOCUMENT_PICKER_LIMIT = 100
+
+def get_document_index() -> DocumentIndex:
+    """Session handle on the tenant's on-disk document index, synced at most once per cache TTL"""
+    index = st.session_state.get("document_index")
+    if index is not None and same_tenant(index.token):
+        index.token = st.session_state.token
+    else:
+        index = DocumentIndex(st.session_state.token)
+        st.session_state.document_index = index
+        st.session_state.documents_synced_at = 0
+    if time.time() - st.session_state.documents_synced_at > session_cache.CACHE_TTL:
+        with phase("api"):
+            index.sync()
+        st.session_state.documents_synced_at = time.time()
+    return index
+
+def document_picker(key: str, default_ids: List[str]) -> List[str]:
+    """Knowledge base multiselect backed by a search of the document index.
+
+    Only the current selection and the first matches of the search are
+    offered, so the widget stays small however many documents there are.
+    """
+    index = get_document_index()
+    # A different starting selection (another agent) starts the picker over
+    if st.session_state.get(f"{key}_default") != list(default_ids):
+        st.session_state[f"{key}_default"] = list(default_ids)
+        st.session_state.pop(key, None)
+    selected = list(st.session_state.get(key, default_ids))
+
+    query = st.text_input("Search documents", key=f"{key}_search", placeholder="Filename or tag, e.g. payroll")
+    with phase("process"):
+        matches, total = index.search(query, limit=DOCUMENT_PICKER_LIMIT)
+        labels = {doc_id: document_label(doc) for doc_id, doc in index.get(selected).items()}
+        labels.update({doc["id"]: document_label(doc) for doc in matches})
+        chosen = set(selected)
+        options = selected + [doc["id"] for doc in matches if doc["id"] not in chosen]
+
+    if not options:
+        if query:
+            st.info("No documents match your search.")
+        else:
+            st.info("📋 No documents available. Upload PDFs in the Onboarding section first.")
+        return selected
+
+    picked = st.multiselect(
+        "Select Knowledge Base Documents",
+        options=options,
+        default=selected,
+        format_func=lambda x: labels.get(x, f"Unknown document ({x[:8]})"),
+        key=key
+    )
+    if total > len(matches):
+        st.caption(f"Showing {len(matches)} of {total:,} matching documents - search to narrow the list.")
+    return picked
+
 def show_agent_configuration_page():
     st.markdown("# 🤖 Agent Configuration")
     st.markdown("Define your AI agent's persona, instructions, and knowledge base.")
 
     # Get existing agents
     try:
-        agents = api_client.get_agents(st.session_state.token)
+        agents = cached_call(api_client.get_agents, st.session_state.token)
     except Exception as e:
         st.error(f"Failed to load agents: {str(e)}")
         agents = []
@@ -243,19 +350,7 @@ def show_agent_configuration_page():
         st.markdown("*Select PDFs that the AI should reference when responding.*")
 
         try:
-            documents = api_client.get_documents(st.session_state.token)
-
-            if documents:
-                doc_options = {doc['id']: doc['filename'] for doc in documents}
-                selected_doc_ids = st.multiselect(
-                    "Select Knowledge Base Documents",
-                    options=list(doc_options.keys()),
-                    format_func=lambda x: doc_options[x],
-                    key="config_kb"
-                )
-            else:
-                st.info("📋 No documents available. Upload PDFs in the Onboarding section first.")
-                selected_doc_ids = []
+            selected_doc_ids = document_picker("config_kb", [])
         except Exception as e:
             st.error(f"Failed to load documents: {str(e)}")
             selected_doc_ids = []
@@ -281,6 +376,7 @@ def show_agent_configuration_page():
                             }
                         }
                         result = api_client.create_agent(st.session_state.token, agent_data)
+                    session_cache.invalidate("get_agents")
 
                     st.success(f"✅ Agent '{agent_name}' created with configuration!")
                     st.rerun()
@@ -330,18 +426,9 @@ def show_agent_configuration_page():
                 st.markdown("---")
 
                 st.subheader("Knowledge Base")
+                current_kb = selected_agent.get('knowledge_base_ids') or []
                 try:
-                    documents = api_client.get_documents(st.session_state.token)
-                    doc_options = {doc['id']: doc['filename'] for doc in documents}
-                    current_kb = selected_agent.get('knowledge_base_ids', [])
-
-                    edited_doc_ids = st.multiselect(
-                        "Select Knowledge Base Documents",
-                        options=list(doc_options.keys()),
-                        default=current_kb,
-                        format_func=lambda x: doc_options[x],
-                        key="edit_kb"
-                    )
+                    edited_doc_ids = document_picker("edit_kb", current_kb)
                 except Exception as e:
                     st.error(f"Failed to load documents: {str(e)}")
                     edited_doc_ids = current_kb
@@ -349,25 +436,81 @@ def show_agent_configuration_page():
                 st.markdown("---")
 
                 if st.button("💾 Save Changes", key="save_config"):
-                    try:
-                        with st.spinner("Updating agent configuration..."):
-                            updates = {
-                                "name": edited_name,
-                                "description": edited_desc,
-                                "tone_score": edited_tone,
-                                "voice_name": edited_voice,
-                                "instructions": edited_instructions,
-                                "knowledge_base_ids": edited_doc_ids
-                            }
-                            api_client.update_agent(st.session_state.token, selected_agent['id'], updates)
+                    updates = {
+                        "name": edited_name,
+                        "description": edited_desc,
+                        "tone_score": edited_tone,
+                        "voice_name": edited_voice,
+                        "instructions": edited_instructions,
+                        "knowledge_base_ids": edited_doc_ids
+                    }
+                    if not changed_fields(selected_agent, updates):
+                        st.info("No changes to save.")
+                    else:
+                        try:
+                            with st.spinner("Updating agent configuration..."):
+                                # Only the fields that differ from the cached agent are sent
+                                api_client.update_agent(st.session_state.token, selected_agent['id'], updates,
+                                                        current=selected_agent)
+                            session_cache.invalidate("get_agents")
 
-                        st.success("✅ Agent configuration updated!")
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"Failed to update agent: {str(e)}")
+                            st.success("✅ Agent configuration updated!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Failed to update agent: {str(e)}")
 
 # ============ AGENTS PAGE ============
 
+VOICES = ["Adam", "Sarah", "Dorothy", "Josh", "Maya", "Chris", "James"]
+
+FLOW_LABELS = {
+    "retention_checkin": "📊 Retention Check-in",
+    "payroll_help": "💰 Payroll Help",
+    "safety_report": "⚠️ Safety Reports"
+}
+
+def show_bulk_agent_actions(agents: List[Dict]):
+    job = job_runner.get(st.session_state.bulk_agent_job) if st.session_state.get("bulk_agent_job") else None
+    with st.expander("⚡ Bulk Actions", expanded=job is not None):
+        if job:
+            show_job(job, "bulk_agent_job")
+        
+        names = {a['id']: a['name'] for a in agents}
+        selected_ids = st.multiselect("Agents", options=list(names.keys()), format_func=lambda x: names[x],
+                                      key="bulk_agent_ids")
+        action = st.radio("Action", ["Activate", "Set Flows", "Change Voice / Tone"], horizontal=True,
+                          key="bulk_agent_action")
+        
+        flows: Dict[str, bool] = {}
+        voice = None
+        tone = None
+        if action == "Set Flows":
+            cols = st.columns(len(FLOW_LABELS))
+            for col, (flow, label) in zip(cols, FLOW_LABELS.items()):
+                with col:
+                    choice = st.selectbox(label, ["Leave as is", "Enable", "Disable"], key=f"bulk_flow_{flow}")
+                if choice != "Leave as is":
+                    flows[flow] = choice == "Enable"
+        elif action == "Change Voice / Tone":
+            col1, col2 = st.columns(2)
+            with col1:
+                voice = st.selectbox("Voice", ["Leave as is"] + VOICES, key="bulk_voice")
+                voice = None if voice == "Leave as is" else voice
+            with col2:
+                if st.checkbox("Change tone", key="bulk_change_tone"):
+                    tone = st.slider("Tone", min_value=0.0, max_value=1.0, step=0.1, value=0.7,
+                                     help="0=Professional, 1=Friendly", key="bulk_tone")
+        
+        nothing_to_change = (action == "Set Flows" and not flows) or \
+                            (action == "Change Voice / Tone" and voice is None and tone is None)
+        if st.button(f"Apply to {len(selected_ids)} agent(s)", key="bulk_agent_apply",
+                     disabled=not selected_ids or nothing_to_change):
+            selected = [a for a in agents if a['id'] in selected_ids]
+            st.session_state.bulk_agent_job = submit_job(
+                "bulk_agent_action", f"{action}: {len(selected)} agent(s)",
+                {"agents": selected, "action": action, "flows": flows, "voice": voice, "tone": tone})
+            st.rerun()
+
 def show_agents_page():
     st.markdown("# 🤖 Agents")
     
@@ -375,11 +518,13 @@ def show_agents_page():
     
     with tab1:
         try:
-            agents = api_client.get_agents(st.session_state.token)
+            agents = cached_call(api_client.get_agents, st.session_state.token)
             
             if not agents:
                 st.info("No agents yet. Create one in the 'Create New' tab!")
             else:
+                show_bulk_agent_actions(agents)
+                
                 for agent in agents:
                     col1, col2, col3 = st.columns([2, 2, 1])
                     
@@ -401,6 +546,7 @@ def show_agents_page():
                             if st.button("✅ Activate", key=f"activate_{agent['id']}"):
                                 try:
                                     api_client.activate_agent(st.session_state.token, agent['id'])
+                                    session_cache.invalidate("get_agents")
                                     st.success("Agent activated!")
                                     st.rerun()
                                 except Exception as e:
@@ -456,12 +602,55 @@ def show_agents_page():
                         }
                     }
                     result = api_client.create_agent(st.session_state.token, agent_data)
+                session_cache.invalidate("get_agents")
                 
                 st.success(f"✅ Agent '{agent_name}' created!")
                 st.rerun()
             except Exception as e:
                 st.error(f"Failed to create agent: {str(e)}")
 
+# ============ EXPORTS ============
+
+def show_export(name: str, run: Callable[[str, BinaryIO, Callable[[int, Optional[int]], None]], int]):
+    """Format picker and a button that streams an export to disk with progress, then offers it for download.
+
+    run(fmt, out, progress) writes the export to out and returns its row count.
+    """
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox("Format", exports.formats(), key=f"{name}_export_format", format_func=str.upper)
+    with col2:
+        st.markdown("&nbsp;")
+        prepare = st.button("📦 Prepare Export", key=f"{name}_export_btn")
+    
+    if prepare:
+        path = exports.export_path(st.session_state.token, name, fmt)
+        bar = st.progress(0.0, text="Starting export...")
+        
+        def progress(rows: int, total: Optional[int]):
+            text = f"Exported {rows:,} of {total:,} rows" if total else f"Exported {rows:,} rows"
+            bar.progress(min(rows / total, 1.0) if total else 0.0, text=text)
+        
+        try:
+            with open(path, "wb") as out:
+                rows = run(fmt, out, progress)
+            previous = st.session_state.get(f"{name}_export")
+            if previous:
+                exports.discard(previous["path"])
+            st.session_state[f"{name}_export"] = {"path": path, "fmt": fmt, "rows": rows}
+        except Exception as e:
+            exports.discard(path)
+            st.error(f"Export failed: {str(e)}")
+        bar.empty()
+    
+    prepared = st.session_state.get(f"{name}_export")
+    if prepared and os.path.exists(prepared["path"]):
+        size_mb = os.path.getsize(prepared["path"]) / 2 ** 20
+        with open(prepared["path"], "rb") as f:
+            st.download_button(f"⬇️ Download {prepared['rows']:,} rows ({prepared['fmt'].upper()}, {size_mb:.1f} MB)",
+                               f, file_name=f"{name}_{date.today():%Y%m%d}.{prepared['fmt']}",
+                               mime=exports.MIME_TYPES[prepared['fmt']], key=f"{name}_export_download")
+
 # ============ EMPLOYEES PAGE ============
 
 def show_employees_page():
@@ -469,7 +658,7 @@ def show_employees_page():
     
     # Get agents
     try:
-        agents = api_client.get_agents(st.session_state.token)
+        agents = cached_call(api_client.get_agents, st.session_state.token)
     except Exception as e:
         st.error(f"Failed to load agents: {str(e)}")
         agents = []
@@ -484,25 +673,26 @@ def show_employees_page():
     
     st.markdown("---")
     
-    tab1, tab2, tab3 = st.tabs(["Directory", "Add Manually", "Upload CSV"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Directory", "Add Manually", "Upload CSV", "Export"])
     
     with tab1:
         st.subheader("Employee Directory")
         
         try:
-            employee_data = api_client.get_employees(st.session_state.token, agent_id)
+            employee_data = cached_call(api_client.get_employees, st.session_state.token, agent_id, 1, EMPLOYEE_PAGE_SIZE)
             employees = employee_data.get('employees', [])
             
             if employees:
-                emp_list = []
-                for emp in employees:
-                    emp_list.append({
-                        "Name": emp['first_name'] + " " + emp['last_name'],
-                        "Phone": emp['phone'],
-                        "Hire Date": emp['hire_date'],
-                        "Site": emp.get('site_location', 'N/A'),
-                        "Status": "✅ Active"
-                    })
+                with phase("process"):
+                    emp_list = []
+                    for emp in employees:
+                        emp_list.append({
+                            "Name": emp['first_name'] + " " + emp['last_name'],
+                            "Phone": emp['phone'],
+                            "Hire Date": emp['hire_date'],
+                            "Site": emp.get('site_location', 'N/A'),
+                            "Status": "✅ Active"
+                        })
                 
                 st.dataframe(emp_list, use_container_width=True)
             else:
@@ -541,6 +731,7 @@ def show_employees_page():
                             "department": "Operations"
                         }
                         api_client.add_employee(st.session_state.token, agent_id, employee_data_dict)
+                    session_cache.invalidate("get_employees", "get_employee_directory")
                     
                     st.success("✅ Employee added!")
                     st.rerun()
@@ -553,33 +744,49 @@ def show_employees_page():
         st.subheader("Upload CSV")
         st.markdown("**Expected columns:** first_name, last_name, phone, email, hire_date, manager_name, site_location")
         
-        uploaded_file = st.file_uploader("Choose CSV file", type="csv")
+        # A new key after each import clears the uploader, releasing the file it holds
+        uploaded_file = st.file_uploader("Choose CSV file", type="csv",
+                                         key=f"employee_csv_{st.session_state.get('imports', 0)}")
         
         if uploaded_file:
-            df = pd.read_csv(uploaded_file)
+            with phase("process"):
+                # As text: keeps phone numbers' leading "+" and zeros
+                df = pd.read_csv(uploaded_file, dtype=str)
             st.write("Preview:")
             st.dataframe(df.head())
             
             if st.button("✅ Import"):
-                try:
-                    with st.spinner(f"Importing {len(df)} employees..."):
-                        for idx, row in df.iterrows():
-                            employee_dict = {
-                                "first_name": row.get('first_name', ''),
-                                "last_name": row.get('last_name', ''),
-                                "phone": row.get('phone', ''),
-                                "email": row.get('email', ''),
-                                "hire_date": str(row.get('hire_date', '')),
-                                "manager_name": row.get('manager_name', ''),
-                                "site_location": row.get('site_location', ''),
-                                "department": row.get('department', 'Operations')
-                            }
-                            api_client.add_employee(st.session_state.token, agent_id, employee_dict)
-                    
-                    st.success(f"✅ Imported {len(df)} employees!")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Failed to import: {str(e)}")
+                with phase("process"):
+                    # Empty cells are NaN in pandas; send them as missing, not as "nan"
+                    records = df.astype(object).where(pd.notna(df), None).to_dict("records")
+                    employees = [{
+                        "first_name": row.get('first_name') or '',
+                        "last_name": row.get('last_name') or '',
+                        "phone": str(row.get('phone') or ''),
+                        "email": row.get('email') or '',
+                        "hire_date": str(row.get('hire_date') or ''),
+                        "manager_name": row.get('manager_name') or '',
+                        "site_location": row.get('site_location') or '',
+                        "department": row.get('department') or 'Operations'
+                    } for row in records]
+                agent_name = next(a['name'] for a in agents if a['id'] == agent_id)
+                st.session_state.import_job = submit_job(
+                    "import_employees", f"Import {len(employees):,} employees into {agent_name}",
+                    {"agent_id": agent_id, "employees": employees})
+                st.session_state.imports = st.session_state.get('imports', 0) + 1
+                st.rerun()
+        
+        job = job_runner.get(st.session_state.import_job) if st.session_state.get("import_job") else None
+        if job:
+            show_job(job, "import_job")
+    
+    with tab4:
+        st.subheader("Export Employees")
+        all_agents = st.checkbox("All agents", value=True, key="employees_export_all")
+        agent_ids = [a['id'] for a in agents] if all_agents else [agent_id]
+        st.caption("One row per employee per agent, fetched page by page and written straight to the file.")
+        show_export("employees", lambda fmt, out, progress: exports.export_employees(
+            st.session_state.token, agent_ids, fmt, out, progress))
 
 # ============ SETTINGS PAGE ============
 
@@ -609,12 +816,72 @@ def show_settings_page():
 
 # ============ ANALYTICS PAGE ============
 
+def get_analytics_engine(agents):
+    """Session-scoped check-in analytics engine (rebuilt when the tenant changes)"""
+    engine = st.session_state.get("analytics_engine")
+    if engine is not None and same_tenant(engine.token):
+        engine.token = st.session_state.token
+    else:
+        try:
+            directory = cached_call(api_client.get_employee_directory, st.session_state.token,
+                                    tuple(a['id'] for a in agents), True)
+            employee_sites = {
+                employee_id: emp.get('site_location')
+                for emp in directory.get('employees', [])
+                for employee_id in emp.get('employee_ids', [])
+                if emp.get('site_location')
+            }
+        except Exception:
+            employee_sites = {}
+        engine = CheckinAnalytics(st.session_state.token, employee_sites=employee_sites)
+        st.session_state.analytics_engine = engine
+    return engine
+
+def get_rollup_store(engine):
+    """Session handle on the tenant's on-disk rollups, brought up to date at most once per cache TTL"""
+    store = st.session_state.get("rollup_store")
+    if store is not None and same_tenant(store.token):
+        store.token = st.session_state.token
+    else:
+        store = RollupStore(st.session_state.token)
+        st.session_state.rollup_store = store
+        st.session_state.rollups_updated_at = 0
+    if time.time() - st.session_state.rollups_updated_at > session_cache.CACHE_TTL:
+        store.update(engine.employee_sites)
+        st.session_state.rollups_updated_at = time.time()
+    return store
+
+def show_backend_analytics_summary():
+    """Pre-aggregated 30-day summary from the backend, used when raw check-ins can't be loaded"""
+    try:
+        summary = cached_call(api_client.get_dashboard_summary, st.session_state.token)
+        sentiment = cached_call(api_client.get_sentiment_breakdown, st.session_state.token)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Check-ins Sent", summary.get('check_ins_sent_30d', 0))
+        with col2:
+            response_rate = int(summary.get('response_rate', 0) * 100)
+            st.metric("Response Rate", f"{response_rate}%")
+        with col3:
+            st.metric("Churn Alerts", summary.get('churn_alerts_this_month', 0))
+        
+        st.subheader("Sentiment Distribution")
+        st.bar_chart({
+            "Positive": sentiment.get('positive', {}).get('count', 0),
+            "Neutral": sentiment.get('neutral', {}).get('count', 0),
+            "Negative": sentiment.get('negative', {}).get('count', 0)
+        })
+    except Exception as e:
+        st.error(f"Failed to load analytics: {str(e)}")
+
 def show_analytics_page():
     st.markdown("# 📊 Analytics & Results")
     
     # Get agents
     try:
-        agents = api_client.get_agents(st.session_state.token)
+        agents = cached_call(api_client.get_agents, st.session_state.token)
     except Exception as e:
         st.error(f"Failed to load agents: {str(e)}")
         agents = []
@@ -623,73 +890,377 @@ def show_analytics_page():
         st.info("Create an agent to see analytics.")
         return
     
+    engine = get_analytics_engine(agents)
+    agent_names = {a['id']: a['name'] for a in agents}
+    
+    # Filters (changing them re-slices locally loaded data; only a wider date range refetches)
+    today = date.today()
+    col1, col2, col3 = st.columns([2, 2, 2])
+    with col1:
+        date_range = st.date_input("Date Range", value=(today - timedelta(days=30), today), max_value=today)
+    with col2:
+        selected_agents = st.multiselect("Agents", options=list(agent_names.keys()),
+                                         format_func=lambda x: agent_names[x])
+    with col3:
+        site_placeholder = st.empty()
+    
+    if len(date_range) != 2:
+        st.info("Select a start and end date.")
+        return
+    start, end = date_range
+    
+    try:
+        with phase("process"):
+            engine.ensure_loaded(start, end)
+            sites = engine.sites()
+        selected_sites = site_placeholder.multiselect("Sites", options=sites)
+        with phase("process"):
+            stats = engine.summary(start, end, selected_sites, selected_agents)
+            distribution = engine.sentiment_distribution(start, end, selected_sites, selected_agents)
+            trend = engine.response_rate_trend(start, end, selected_sites, selected_agents)
+            by_site = engine.breakdown("site", start, end, selected_sites, selected_agents)
+            alerts = engine.churn_alerts(start, end, selected_sites, selected_agents)
+    except Exception as e:
+        st.warning(f"Raw check-ins unavailable ({str(e)}); showing backend 30-day aggregates.")
+        show_backend_analytics_summary()
+        return
+    
     # Summary cards
-    st.subheader("Summary (Last 30 Days)")
+    st.subheader(f"Summary ({start:%b %d} – {end:%b %d})")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Check-ins Sent", stats['check_ins_sent'])
+    with col2:
+        st.metric("Response Rate", f"{stats['response_rate'] * 100:.0f}%")
+    with col3:
+        avg_sentiment = stats['avg_sentiment']
+        st.metric("Avg Sentiment", f"{avg_sentiment:+.2f}", "↑ Positive" if avg_sentiment >= 0 else "↓ Negative")
+    with col4:
+        st.metric("Churn Alerts", stats['churn_alerts'])
+    
+    st.markdown("---")
+    
+    # Charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Sentiment Distribution")
+        st.bar_chart(distribution)
+    
+    with col2:
+        st.subheader("Response Rate Trend")
+        st.line_chart(trend)
+    
+    st.markdown("---")
+    
+    # Breakdowns
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📍 By Site")
+        st.dataframe(by_site, use_container_width=True)
+    
+    with col2:
+        st.subheader("⚠️ Churn Alerts")
+        if alerts.empty:
+            st.info("No churn alerts in this range.")
+        else:
+            st.dataframe(alerts.assign(agent_id=alerts['agent_id'].map(agent_names)),
+                         use_container_width=True, hide_index=True)
+    
+    st.markdown("---")
+    
+    # Long-range trends come from pre-aggregated weekly rollups, not the raw frame
+    st.subheader("📈 12-Month Trend")
+    
+    try:
+        with phase("process"):
+            store = get_rollup_store(engine)
+            weekly = store.trend("weekly", start=today - timedelta(days=365), end=today,
+                                 agents=selected_agents, sites=selected_sites)
+        if weekly.empty:
+            st.info("No check-in history yet.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Weekly Response Rate (%)**")
+                st.line_chart(weekly["response_rate"])
+            with col2:
+                st.markdown("**Weekly Sentiment**")
+                st.area_chart(weekly[["positive", "neutral", "negative"]])
+    except Exception as e:
+        st.warning(f"Could not load trend history: {str(e)}")
+    
+    st.markdown("---")
+    
+    # ROI
+    st.subheader("💰 Estimated Impact")
     
     try:
-        summary = api_client.get_dashboard_summary(st.session_state.token)
-        sentiment = api_client.get_sentiment_breakdown(st.session_state.token)
-        roi = api_client.get_roi_metrics(st.session_state.token)
+        roi = cached_call(api_client.get_roi_metrics, st.session_state.token)
         
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Check-ins Sent", summary.get('check_ins_sent_30d', 0), "+45%")
+            st.metric("Time Saved", f"{roi.get('time_saved_hours', 0):.0f} hours", "Admin work")
         with col2:
-            response_rate = int(summary.get('response_rate', 0) * 100)
-            st.metric("Response Rate", f"{response_rate}%", "+12%")
+            improvement = int(roi.get('response_rate_improvement_pct', 0))
+            st.metric("Response Improvement", f"+{improvement}%", "vs. forms")
         with col3:
-            st.metric("Avg Sentiment", "+0.42", "↑ Positive")
-        with col4:
-            st.metric("Churn Alerts", summary.get('churn_alerts_this_month', 0), "⚠️ High")
-        
+            savings = roi.get('estimated_savings', 0)
+            st.metric("Est. Savings", f"${savings:,.0f}", "Replacement costs")
+    
+    except Exception as e:
+        st.error(f"Failed to load analytics: {str(e)}")
+    
+    st.markdown("---")
+    
+    # Raw records stream from the backend to the file; the loaded frame is not used
+    st.subheader("📤 Export Raw Check-ins")
+    st.caption(f"Every check-in from {start:%b %d} to {end:%b %d}"
+               f"{' for the selected agents' if selected_agents else ''}.")
+    show_export("checkins", lambda fmt, out, progress: exports.export_checkins(
+        st.session_state.token, fmt, out, since=pd.Timestamp(start).isoformat(),
+        until=pd.Timestamp(end + timedelta(days=1)).isoformat(), agent_ids=selected_agents, progress=progress))
+
+# ============ JOBS PAGE ============
+
+JOB_STATUS_LABELS = {
+    "queued": "⏳ Queued",
+    "running": "🔄 Running",
+    "succeeded": "✅ Done",
+    "failed": "❌ Failed",
+    "cancelled": "⏹️ Cancelled",
+    "interrupted": "⚠️ Interrupted"
+}
+
+# Session cache entries each job kind makes stale once it finishes
+JOB_INVALIDATES = {
+    "import_employees": ("get_employees", "get_employee_directory"),
+    "bulk_agent_action": ("get_agents",)
+}
+
+# How often the Jobs page refreshes while jobs are queued or running (seconds)
+JOBS_REFRESH_SECONDS = 2
+
+def submit_job(kind: str, title: str, params: Dict) -> str:
+    """Start a background job for this session and watch it until it finishes"""
+    job_id = job_runner.submit(kind, st.session_state.token, params, title, user=st.session_state.customer['email'])
+    st.session_state.setdefault("watched_jobs", {})[job_id] = kind
+    return job_id
+
+def notify_finished_jobs():
+    """Refresh data changed by this session's jobs once they finish, with a toast"""
+    watched = st.session_state.get("watched_jobs") or {}
+    for job_id in list(watched):
+        job = job_runner.get(job_id)
+        if job is not None and job['status'] not in FINISHED:
+            continue
+        kind = watched.pop(job_id)
+        session_cache.invalidate(*JOB_INVALIDATES[kind])
+        if job is not None:
+            st.toast(f"{job['title']}: {JOB_STATUS_LABELS[job['status']]}")
+
+def show_job_result(job: Dict):
+    result = job['result']
+    if job['kind'] == "import_employees":
+        imported = result['created'] + result['updated']
+        st.success(f"✅ Imported {imported} employees "
+                   f"({result['created']} new, {result['updated']} updated)!")
+        if result['failed']:
+            st.warning(f"⚠️ {result['failed']} row(s) were not imported:")
+            st.dataframe([{"Row": r['index'] + 1, "Error": r['error']} for r in result['failures']],
+                         use_container_width=True, hide_index=True)
+    elif job['kind'] == "bulk_agent_action":
+        failed = sum(1 for r in result if r['Result'].startswith("❌"))
+        if failed:
+            st.warning(f"{len(result) - failed} of {len(result)} agents updated; {failed} failed.")
+        else:
+            st.success(f"✅ {result[0]['Action']} applied to {len(result)} agent(s).")
+        st.dataframe(result, use_container_width=True, hide_index=True)
+
+def show_job(job: Dict, key: str):
+    """A job's status, progress and throughput, its result once done, and cancel/retry buttons"""
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.markdown(f"**{job['title']}** · {JOB_STATUS_LABELS[job['status']]} · "
+                    f"{datetime.fromtimestamp(job['created_at']):%b %d %H:%M} by {job['user'] or 'unknown'}")
+        if job['total'] and job['status'] != "succeeded":
+            text = f"{job['done']:,} of {job['total']:,}"
+            if job['rate']:
+                text += f" · {job['rate']:,.0f}/s"
+            if job['eta_s'] is not None:
+                text += f" · about {job['eta_s']}s left"
+            st.progress(min(job['done'] / job['total'], 1.0), text=text)
+        if job['error']:
+            st.error(job['error'])
+    with col2:
+        if job['status'] in ("queued", "running"):
+            if st.button("⏹️ Cancel", key=f"{key}_cancel", disabled=bool(job['cancel_requested'])):
+                job_runner.cancel(job['id'])
+                st.rerun()
+        elif job['status'] != "succeeded":
+            if st.button("🔁 Retry", key=f"{key}_retry"):
+                new_id = job_runner.retry(job['id'], st.session_state.token, user=st.session_state.customer['email'])
+                st.session_state.setdefault("watched_jobs", {})[new_id] = job['kind']
+                st.rerun()
+    if job['status'] == "succeeded" and job['result'] is not None:
+        show_job_result(job)
+
+def show_job_list():
+    tenant = tenant_id(st.session_state.token)
+    counts = job_runner.counts(tenant)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Running", counts.get("running", 0))
+    col2.metric("Queued", counts.get("queued", 0))
+    col3.metric("Done", counts.get("succeeded", 0))
+    col4.metric("Failed", counts.get("failed", 0) + counts.get("interrupted", 0))
+    
+    jobs = job_runner.jobs(tenant)
+    if not jobs:
+        st.info("No jobs yet. CSV imports and bulk agent actions show up here.")
+    for job in jobs:
         st.markdown("---")
+        show_job(job, f"job_{job['id']}")
+
+def show_jobs_page():
+    st.markdown("# ⏳ Jobs")
+    st.markdown("CSV imports and bulk agent actions run in the background on the server. "
+                "They keep going if you leave the page or close the tab.")
+    
+    # Re-render just the list every few seconds while anything is in flight (fragments need Streamlit 1.37+)
+    counts = job_runner.counts(tenant_id(st.session_state.token))
+    active = counts.get("running", 0) + counts.get("queued", 0)
+    if active and hasattr(st, "fragment"):
+        st.fragment(show_job_list, run_every=JOBS_REFRESH_SECONDS)()
+    else:
+        show_job_list()
+        if st.button("🔄 Refresh"):
+            st.rerun()
+
+# ============ DIAGNOSTICS PAGE ============
+
+def show_diagnostics_page():
+    st.markdown("# 🛠️ Diagnostics")
+    st.markdown(f"API calls made by this server process since "
+                f"{datetime.fromtimestamp(api_metrics.started_at):%Y-%m-%d %H:%M:%S}.")
+    
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["By Page", "By Endpoint", "OpenMetrics", "Page Profiles",
+                                                  "Shared Cache", "Sessions"])
+    
+    with tab1:
+        pages = api_metrics.by_page()
+        if not pages:
+            st.info("No API calls recorded yet.")
+        else:
+            st.subheader("Time Waiting on the API")
+            st.bar_chart({page: stats['total_ms'] for page, stats in pages.items()})
+            st.dataframe(pd.DataFrame.from_dict(pages, orient="index"), use_container_width=True)
         
-        # Charts
+        hits = api_metrics.session_hit_rows()
+        if hits:
+            st.subheader("Session Cache Hits")
+            st.dataframe(hits, use_container_width=True, hide_index=True)
+    
+    with tab2:
+        st.subheader("Endpoints")
+        st.dataframe(api_metrics.endpoints(), use_container_width=True, hide_index=True)
+        st.subheader("Detail (per status and page)")
+        st.dataframe(api_metrics.rows(), use_container_width=True, hide_index=True)
+    
+    with tab3:
+        exposition = api_metrics.to_openmetrics()
+        st.download_button("⬇️ Download metrics.txt", exposition, file_name="metrics.txt",
+                           mime="application/openmetrics-text")
+        st.code(exposition, language="text")
+    
+    with tab4:
         col1, col2 = st.columns(2)
-        
         with col1:
-            st.subheader("Sentiment Distribution")
-            sentiment_data = {
-                "Positive": sentiment.get('positive', {}).get('count', 0),
-                "Neutral": sentiment.get('neutral', {}).get('count', 0),
-                "Negative": sentiment.get('negative', {}).get('count', 0)
-            }
-            st.bar_chart(sentiment_data)
-        
+            profiling.enabled = st.toggle("Profile page reruns", value=profiling.enabled)
         with col2:
-            st.subheader("Response Rate Trend")
-            trend_data = {
-                "Week 1": 65,
-                "Week 2": 70,
-                "Week 3": 76,
-                "Week 4": int(summary.get('response_rate', 0) * 100)
-            }
-            st.line_chart(trend_data)
+            profiling.capture_cprofile = st.toggle("Keep cProfile traces of the slowest reruns",
+                                                   value=profiling.capture_cprofile)
         
-        st.markdown("---")
+        rows = profiling.summary()
+        if not rows:
+            st.info("No profiled reruns yet. Enable profiling and visit some pages.")
+        else:
+            st.subheader("Rerun Time Breakdown (avg ms)")
+            st.bar_chart(pd.DataFrame(rows).set_index("page")[["avg_api_ms", "avg_process_ms", "avg_render_ms"]])
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+            
+            page = st.selectbox("Rerun history", options=[r['page'] for r in rows])
+            st.line_chart(pd.DataFrame(profiling.history(page))[["api_ms", "process_ms", "render_ms"]])
         
-        # ROI
-        st.subheader("💰 Estimated Impact")
+        for trace in profiling.slowest_traces():
+            if trace['prof_path'] and os.path.exists(trace['prof_path']):
+                with open(trace['prof_path'], "rb") as f:
+                    st.download_button(f"⬇️ {trace['page']} – {trace['total_ms']:.0f} ms", f.read(),
+                                       file_name=os.path.basename(trace['prof_path']),
+                                       key=f"prof_{trace['prof_path']}")
+    
+    with tab5:
+        stats = shared_cache.stats()
+        st.markdown("Agents, documents and dashboard data, kept once per company for all of its sessions.")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Memory", f"{stats['bytes'] / 2 ** 20:.1f} MB", f"of {stats['max_bytes'] / 2 ** 20:.0f} MB",
+                    delta_color="off")
+        col2.metric("Entries", stats['entries'], f"{stats['tenants']} tenants", delta_color="off")
+        col3.metric("Hit Rate", f"{stats['hit_rate']:.0%}", f"{stats['misses']} loads", delta_color="off")
+        col4.metric("Evictions", stats['evictions'])
         
-        col1, col2, col3 = st.columns(3)
+        rows = shared_cache.tenant_rows()
+        if rows:
+            st.caption(f"Each tenant may use up to {stats['tenant_max_bytes'] / 2 ** 20:.0f} MB. "
+                       f"Waits are lookups that joined a load already in flight.")
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        if st.button("🗑️ Clear Shared Cache"):
+            shared_cache.clear()
+            st.rerun()
+    
+    with tab6:
+        totals = session_memory.totals()
+        st.markdown(f"Memory held in each browser session's state. Sessions over {totals['budget_mb']:.0f} MB, "
+                    f"or idle for {totals['idle_minutes']:.0f} minutes, spill loaded check-ins to disk "
+                    f"and drop cached API responses.")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Sessions", totals['sessions'])
+        col2.metric("Held", f"{totals['mb']:.1f} MB")
+        col3.metric("Spilled", f"{totals['spilled_mb']:.1f} MB")
+        col4.metric("Dropped", f"{totals['dropped_mb']:.1f} MB")
         
-        with col1:
-            st.metric("Time Saved", f"{roi.get('time_saved_hours', 0):.0f} hours", "Admin work")
-        with col2:
-            improvement = int(roi.get('response_rate_improvement_pct', 0))
-            st.metric("Response Improvement", f"+{improvement}%", "vs. forms")
-        with col3:
-            savings = roi.get('estimated_savings', 0)
-            st.metric("Est. Savings", f"${savings:,.0f}", "Replacement costs")
+        rows = session_memory.session_rows()
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        if st.button("🧹 Reclaim Idle Sessions Now"):
+            session_memory.sweep(force=True)
+            st.rerun()
     
-    except Exception as e:
-        st.error(f"Failed to load analytics: {str(e)}")
+    if st.button("🔄 Reset Metrics"):
+        api_metrics.reset()
+        profiling.reset()
+        st.rerun()
 
 # ============ MAIN ============
 
+# Sidebar label -> page function
+PAGES = {
+    "🏠 Onboarding": show_dashboard_page,
+    "🤖 Agent Configuration": show_agent_configuration_page,
+    "🤖 Agents": show_agents_page,
+    "👥 Employees": show_employees_page,
+    "⚙️ Settings": show_settings_page,
+    "📊 Analytics": show_analytics_page,
+    "⏳ Jobs": show_jobs_page,
+}
+
 if __name__ == "__main__":
     if not st.session_state.logged_in:
-        show_login_page()
+        with page_context("show_login_page"):
+            show_login_page()
     else:
-        show_dashboard()
+        with session_memory.in_use():
+            show_dashboard()
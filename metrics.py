@@ -0,0 +1,241 @@
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Page (show_* function) the current thread is rendering; labels every call it makes
+current_page: contextvars.ContextVar[str] = contextvars.ContextVar("current_page", default="other")
+
+_ID_SEGMENT = re.compile(r"^([0-9a-fA-F-]{8,}|\d+)$")
+
+
+@contextmanager
+def page_context(page: str):
+    """Attribute API calls made inside the block to a page"""
+    token = current_page.set(page)
+    try:
+        yield
+    finally:
+        current_page.reset(token)
+
+
+def run_in_page(page: str, fn: Callable, *args) -> Any:
+    """Call fn under a page label (for work handed to thread pools, which don't inherit it)"""
+    with page_context(page):
+        return fn(*args)
+
+
+def endpoint_template(url: str) -> str:
+    """URL path with ids collapsed, e.g. /v1/agents/4f1c.../activate -> /v1/agents/{id}/activate"""
+    segments = urlparse(url).path.split("/")
+    return "/".join("{id}" if _ID_SEGMENT.match(s) else s for s in segments)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+class APIMetrics:
+    """Thread-safe counters for every call made through APIClient.
+
+    Calls are keyed by (method, endpoint template, status, page). Each key
+    keeps a count, a latency histogram, request/response bytes (decoded and
+    as sent over the wire) and disk cache hits. Retries and session-cache hits are counted separately.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._calls: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+            self._retries: Dict[Tuple[str, str, str], int] = {}
+            self._session_hits: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, method: str, endpoint: str, status: int, seconds: float,
+                request_bytes: int, response_bytes: int, cache_hit: bool = False,
+                wire_bytes: Optional[int] = None):
+        """Record one completed HTTP call; wire_bytes is the response body before decompression"""
+        key = (method, endpoint, str(status), current_page.get())
+        with self._lock:
+            entry = self._calls.get(key)
+            if entry is None:
+                entry = self._calls[key] = {"count": 0, "seconds": 0.0, "buckets": [0] * len(LATENCY_BUCKETS),
+                                            "request_bytes": 0, "response_bytes": 0, "wire_bytes": 0,
+                                            "cache_hits": 0}
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["request_bytes"] += request_bytes
+            entry["response_bytes"] += response_bytes
+            entry["wire_bytes"] += response_bytes if wire_bytes is None else wire_bytes
+            entry["cache_hits"] += int(cache_hit)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+                    break
+
+    def record_retry(self, method: str, endpoint: str):
+        key = (method, endpoint, current_page.get())
+        with self._lock:
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def record_session_hit(self, call: str):
+        """A read served from the per-session cache without any HTTP call"""
+        key = (call, current_page.get())
+        with self._lock:
+            self._session_hits[key] = self._session_hits.get(key, 0) + 1
+
+    def hook(self, response, *args, **kwargs):
+        """requests response hook; reads the body so its download time is included"""
+        started = time.perf_counter()
+        body = response.content or b""
+        seconds = response.elapsed.total_seconds() + (time.perf_counter() - started)
+        request_body = response.request.body or b""
+        # Streamed bodies (api_client.NDJSONBody) count what they sent
+        request_bytes = len(request_body) if isinstance(request_body, (bytes, str)) else getattr(
+            request_body, "bytes_sent", 0)
+        cache_hit = getattr(response, "from_cache", False)
+        wire_bytes = 0 if cache_hit else len(body)
+        if response.headers.get("Content-Encoding") and response.headers.get("Content-Length", "").isdigit():
+            wire_bytes = int(response.headers["Content-Length"])
+        self.observe(response.request.method, endpoint_template(response.request.url), response.status_code,
+                     seconds, request_bytes, len(body), cache_hit, wire_bytes)
+
+    # ============ VIEWS ============
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """One row per (method, endpoint, status, page), busiest first"""
+        with self._lock:
+            calls = [(k, dict(v, buckets=list(v["buckets"]))) for k, v in self._calls.items()]
+            retries = dict(self._retries)
+        rows = []
+        for (method, endpoint, status, page), entry in calls:
+            rows.append({
+                "page": page, "method": method, "endpoint": endpoint, "status": status,
+                "calls": entry["count"],
+                "total_ms": round(entry["seconds"] * 1000, 1),
+                "avg_ms": round(entry["seconds"] / entry["count"] * 1000, 1),
+                "p95_ms": round(self._bucket_quantile(entry, 0.95) * 1000, 1),
+                "request_kb": round(entry["request_bytes"] / 1024, 1),
+                "response_kb": round(entry["response_bytes"] / 1024, 1),
+                "wire_kb": round(entry["wire_bytes"] / 1024, 1),
+                "disk_cache_hits": entry["cache_hits"],
+                "retries": retries.get((method, endpoint, page), 0)
+            })
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def endpoints(self) -> List[Dict[str, Any]]:
+        """Per-endpoint totals across statuses and pages, with error rate"""
+        endpoints: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for row in self.rows():
+            entry = endpoints.setdefault((row["method"], row["endpoint"]), {
+                "method": row["method"], "endpoint": row["endpoint"], "calls": 0, "errors": 0,
+                "total_ms": 0.0, "response_kb": 0.0, "wire_kb": 0.0, "retries": 0, "disk_cache_hits": 0})
+            entry["calls"] += row["calls"]
+            entry["errors"] += 0 if row["status"].startswith(("2", "3")) else row["calls"]
+            entry["total_ms"] += row["total_ms"]
+            entry["response_kb"] += row["response_kb"]
+            entry["wire_kb"] += row["wire_kb"]
+            entry["retries"] += row["retries"]
+            entry["disk_cache_hits"] += row["disk_cache_hits"]
+        for entry in endpoints.values():
+            entry["error_rate"] = round(entry["errors"] / entry["calls"], 4) if entry["calls"] else 0.0
+            entry["avg_ms"] = round(entry["total_ms"] / entry["calls"], 1) if entry["calls"] else 0.0
+        return sorted(endpoints.values(), key=lambda e: e["total_ms"], reverse=True)
+
+    def session_hit_rows(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"page": page, "call": call, "hits": hits}
+                    for (call, page), hits in sorted(self._session_hits.items())]
+
+    def by_page(self) -> Dict[str, Dict[str, float]]:
+        """Calls, wall time spent waiting on calls, bytes and errors per page"""
+        pages: Dict[str, Dict[str, float]] = {}
+        for row in self.rows():
+            page = pages.setdefault(row["page"], {"calls": 0, "total_ms": 0.0, "response_kb": 0.0, "wire_kb": 0.0,
+                                                  "errors": 0})
+            page["calls"] += row["calls"]
+            page["total_ms"] += row["total_ms"]
+            page["response_kb"] += row["response_kb"]
+            page["wire_kb"] += row["wire_kb"]
+            page["errors"] += 0 if row["status"].startswith(("2", "3")) else row["calls"]
+        return dict(sorted(pages.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    @staticmethod
+    def _bucket_quantile(entry: Dict[str, Any], q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile"""
+        target = q * entry["count"]
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf") if entry["count"] else 0.0
+
+    def to_openmetrics(self) -> str:
+        """All metrics in OpenMetrics text exposition format"""
+        with self._lock:
+            calls = [(k, dict(v, buckets=list(v["buckets"]))) for k, v in sorted(self._calls.items())]
+            retries = sorted(self._retries.items())
+            session_hits = sorted(self._session_hits.items())
+
+        lines = [
+            "# TYPE cxai_api_requests counter",
+            "# HELP cxai_api_requests API calls by endpoint, status and page.",
+        ]
+        for (method, endpoint, status, page), entry in calls:
+            labels = _labels(method=method, endpoint=endpoint, status=status, page=page)
+            lines.append(f"cxai_api_requests_total{{{labels}}} {entry['count']}")
+
+        lines += [
+            "# TYPE cxai_api_request_duration_seconds histogram",
+            "# UNIT cxai_api_request_duration_seconds seconds",
+            "# HELP cxai_api_request_duration_seconds Time from sending a call to having its full body.",
+        ]
+        for (method, endpoint, status, page), entry in calls:
+            labels = _labels(method=method, endpoint=endpoint, status=status, page=page)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+                cumulative += count
+                lines.append(f'cxai_api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'cxai_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+            lines.append(f"cxai_api_request_duration_seconds_count{{{labels}}} {entry['count']}")
+            lines.append(f"cxai_api_request_duration_seconds_sum{{{labels}}} {entry['seconds']:.6f}")
+
+        for name, field, help_text in (
+                ("cxai_api_request_bytes", "request_bytes", "Request body bytes sent."),
+                ("cxai_api_response_bytes", "response_bytes", "Response body bytes received (decoded)."),
+                ("cxai_api_response_wire_bytes", "wire_bytes", "Response body bytes on the wire (compressed)."),
+                ("cxai_api_disk_cache_hits", "cache_hits", "Calls answered 304 and served from the disk cache.")):
+            lines += [f"# TYPE {name} counter", f"# HELP {name} {help_text}"]
+            for (method, endpoint, status, page), entry in calls:
+                labels = _labels(method=method, endpoint=endpoint, status=status, page=page)
+                lines.append(f"{name}_total{{{labels}}} {entry[field]}")
+
+        lines += ["# TYPE cxai_api_retries counter", "# HELP cxai_api_retries Calls re-sent after a failure."]
+        for (method, endpoint, page), count in retries:
+            lines.append(f"cxai_api_retries_total{{{_labels(method=method, endpoint=endpoint, page=page)}}} {count}")
+
+        lines += ["# TYPE cxai_session_cache_hits counter",
+                  "# HELP cxai_session_cache_hits Reads served from a session's in-memory cache."]
+        for (call, page), count in session_hits:
+            lines.append(f"cxai_session_cache_hits_total{{{_labels(call=call, page=page)}}} {count}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide metrics shared by every APIClient and session
+api_metrics = APIMetrics()
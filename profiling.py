@@ -0,0 +1,167 @@
+import contextvars
+import cProfile
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+# Opt-in: time every page rerun (toggle at runtime from the Diagnostics page)
+enabled = os.getenv("CXAI_PROFILE") == "1"
+
+# Also run each rerun under cProfile and keep the slowest ones as .prof files
+capture_cprofile = os.getenv("CXAI_PROFILE_CPROFILE") == "1"
+
+PROFILE_DIR = os.getenv("CXAI_PROFILE_DIR", os.path.join(os.getenv("CXAI_DATA_DIR", ".cxai_data"), "profiles"))
+
+# Reruns remembered per page, and .prof files kept per page
+HISTORY_SIZE = 200
+SLOWEST_KEPT = 5
+
+_active: contextvars.ContextVar[Optional["RerunProfile"]] = contextvars.ContextVar("active_profile", default=None)
+_history: Dict[str, Deque[Dict[str, Any]]] = {}
+_slowest: Dict[str, List[Dict[str, Any]]] = {}
+_lock = threading.Lock()
+# cProfile can only run in one thread at a time; concurrent reruns skip it
+_cprofile_lock = threading.Lock()
+
+
+class RerunProfile:
+    """Exclusive time per phase for one rerun of one page.
+
+    Phases nest: time spent in an inner phase is taken out of its parent, and
+    re-entering the phase already running is a no-op, so an API call inside a
+    cached read is only counted once.
+    """
+
+    def __init__(self, page: str):
+        self.page = page
+        self.phases: Dict[str, float] = {"api": 0.0, "process": 0.0}
+        self._stack: List[str] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        if self._stack and self._stack[-1] == name:
+            yield
+            return
+        self._stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stack.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            if self._stack:
+                self.phases[self._stack[-1]] -= elapsed
+
+
+@contextmanager
+def phase(name: str):
+    """Attribute the block to a phase ("api", "process") of the rerun being profiled, if any"""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    with profile.phase(name):
+        yield
+
+
+@contextmanager
+def profile_page(page: str):
+    """Time one rerun of a page, splitting it into API wait, data processing and render"""
+    if not enabled:
+        yield
+        return
+
+    profile = RerunProfile(page)
+    token = _active.set(profile)
+    profiler = cProfile.Profile() if capture_cprofile and _cprofile_lock.acquire(blocking=False) else None
+    started = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            _cprofile_lock.release()
+        total = time.perf_counter() - started
+        _active.reset(token)
+        _record(profile, total, profiler)
+
+
+def _record(profile: RerunProfile, total: float, profiler: Optional[cProfile.Profile]):
+    api = profile.phases.get("api", 0.0)
+    process = profile.phases.get("process", 0.0)
+    entry = {
+        "at": time.time(),
+        "total_ms": round(total * 1000, 1),
+        "api_ms": round(api * 1000, 1),
+        "process_ms": round(process * 1000, 1),
+        "render_ms": round(max(total - api - process, 0.0) * 1000, 1),
+        "prof_path": None
+    }
+    with _lock:
+        _history.setdefault(profile.page, deque(maxlen=HISTORY_SIZE)).append(entry)
+        if profiler is None:
+            return
+        slowest = _slowest.setdefault(profile.page, [])
+        if len(slowest) >= SLOWEST_KEPT and entry["total_ms"] <= slowest[-1]["total_ms"]:
+            return
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        entry["prof_path"] = os.path.join(
+            PROFILE_DIR, f"{profile.page}_{int(entry['at'] * 1000)}_{int(entry['total_ms'])}ms.prof")
+        profiler.dump_stats(entry["prof_path"])
+        slowest.append(entry)
+        slowest.sort(key=lambda e: e["total_ms"], reverse=True)
+        for dropped in slowest[SLOWEST_KEPT:]:
+            if dropped["prof_path"] and os.path.exists(dropped["prof_path"]):
+                os.remove(dropped["prof_path"])
+        del slowest[SLOWEST_KEPT:]
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def summary() -> List[Dict[str, Any]]:
+    """Per-page rerun stats over the rolling history, slowest p95 first"""
+    with _lock:
+        history = {page: list(entries) for page, entries in _history.items()}
+    rows = []
+    for page, entries in history.items():
+        totals = [e["total_ms"] for e in entries]
+        n = len(entries)
+        rows.append({
+            "page": page, "reruns": n,
+            "p50_ms": _pct(totals, 0.5), "p95_ms": _pct(totals, 0.95), "max_ms": max(totals),
+            "avg_api_ms": round(sum(e["api_ms"] for e in entries) / n, 1),
+            "avg_process_ms": round(sum(e["process_ms"] for e in entries) / n, 1),
+            "avg_render_ms": round(sum(e["render_ms"] for e in entries) / n, 1)
+        })
+    return sorted(rows, key=lambda r: r["p95_ms"], reverse=True)
+
+
+def history(page: str) -> List[Dict[str, Any]]:
+    with _lock:
+        return list(_history.get(page, []))
+
+
+def slowest_traces() -> List[Dict[str, Any]]:
+    """Kept cProfile dumps (load with `python -m pstats`, snakeviz, or flameprof for a flame graph)"""
+    with _lock:
+        return [dict(e, page=page) for page, entries in _slowest.items() for e in entries]
+
+
+def reset():
+    """Forget all history and delete kept traces"""
+    with _lock:
+        for entries in _slowest.values():
+            for entry in entries:
+                if entry["prof_path"] and os.path.exists(entry["prof_path"]):
+                    os.remove(entry["prof_path"])
+        _history.clear()
+        _slowest.clear()
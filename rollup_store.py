@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+import pandas as pd
+from api_client import api_client, APIClient, tenant_id
+from analytics_engine import records_to_frame
+
+# Where per-tenant rollup databases live
+DATA_DIR = os.getenv("CXAI_DATA_DIR", ".cxai_data")
+
+# Buckets this many days before the watermark are recomputed on every update,
+# so responses and sentiment that arrive after a check-in was sent are counted
+REOPEN_DAYS = 7
+
+METRICS = ["sent", "responded", "positive", "neutral", "negative",
+           "sentiment_sum", "sentiment_n", "churn_alerts"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily (
+    bucket TEXT NOT NULL, agent_id TEXT NOT NULL, site TEXT NOT NULL,
+    sent INTEGER, responded INTEGER, positive INTEGER, neutral INTEGER, negative INTEGER,
+    sentiment_sum REAL, sentiment_n INTEGER, churn_alerts INTEGER,
+    PRIMARY KEY (bucket, agent_id, site)
+);
+CREATE TABLE IF NOT EXISTS weekly (
+    bucket TEXT NOT NULL, agent_id TEXT NOT NULL, site TEXT NOT NULL,
+    sent INTEGER, responded INTEGER, positive INTEGER, neutral INTEGER, negative INTEGER,
+    sentiment_sum REAL, sentiment_n INTEGER, churn_alerts INTEGER,
+    PRIMARY KEY (bucket, agent_id, site)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# One lock per database file so concurrent sessions of a tenant don't interleave updates
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+class RollupStore:
+    """Daily and weekly check-in rollups per agent and site, persisted in SQLite.
+
+    update() only pulls check-ins created since the stored watermark (minus a
+    short re-open window for late responses), so chart queries read a fixed
+    number of pre-aggregated buckets no matter how much history exists.
+    """
+
+    def __init__(self, token: str, client: APIClient = api_client, data_dir: str = DATA_DIR):
+        os.makedirs(data_dir, exist_ok=True)
+        self.token = token
+        self.client = client
+        self.path = os.path.join(data_dir, f"rollups_{tenant_id(token)}.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """created_at of the newest check-in rolled up so far"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def update(self, employee_sites: Optional[Dict[str, str]] = None) -> int:
+        """Fold new check-ins into the rollups; returns how many records were fetched"""
+        with _lock_for(self.path):
+            watermark = self.watermark
+            cutoff = (watermark.date() - timedelta(days=REOPEN_DAYS)) if watermark else None
+            since = datetime.combine(cutoff, datetime.min.time()).isoformat() if cutoff else None
+
+            frames = [
+                records_to_frame(records, employee_sites)
+                for records in self.client.iter_checkins(self.token, since=since)
+            ]
+            frames = [f for f in frames if not f.empty]
+            if not frames:
+                return 0
+            frame = pd.concat(frames, ignore_index=True).drop_duplicates(subset=["id"], keep="last")
+            if cutoff:
+                frame = frame[frame["created_at"] >= pd.Timestamp(cutoff)]
+            if frame.empty:
+                return 0
+
+            daily = self._aggregate(frame)
+            first_day = cutoff.isoformat() if cutoff else daily["bucket"].min()
+
+            with self._connect() as conn:
+                conn.execute("DELETE FROM daily WHERE bucket >= ?", (first_day,))
+                conn.executemany(
+                    f"INSERT INTO daily (bucket, agent_id, site, {', '.join(METRICS)}) "
+                    f"VALUES ({', '.join('?' * (3 + len(METRICS)))})",
+                    daily[["bucket", "agent_id", "site"] + METRICS].itertuples(index=False, name=None)
+                )
+                # Weeks start on Monday; rebuild every week touched by the re-opened days
+                first_week = conn.execute("SELECT date(?, 'weekday 0', '-6 days')", (first_day,)).fetchone()[0]
+                conn.execute("DELETE FROM weekly WHERE bucket >= ?", (first_week,))
+                conn.execute(
+                    f"INSERT INTO weekly (bucket, agent_id, site, {', '.join(METRICS)}) "
+                    f"SELECT date(bucket, 'weekday 0', '-6 days') AS week, agent_id, site, "
+                    f"{', '.join(f'SUM({m})' for m in METRICS)} "
+                    f"FROM daily WHERE bucket >= ? GROUP BY week, agent_id, site",
+                    (first_week,)
+                )
+                newest = frame["created_at"].max().isoformat()
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('watermark', ?)", (newest,))
+            return len(frame)
+
+    @staticmethod
+    def _aggregate(frame: pd.DataFrame) -> pd.DataFrame:
+        """Group check-ins into day x agent x site buckets"""
+        score = frame["sentiment_score"]
+        columns = pd.DataFrame({
+            "bucket": frame["created_at"].dt.strftime("%Y-%m-%d"),
+            "agent_id": frame["agent_id"].astype("string").fillna(""),
+            "site": frame["site"].astype("string").fillna("Unknown"),
+            "sent": 1,
+            "responded": frame["responded"].astype(int),
+            "positive": (frame["sentiment"] == "positive").astype(int),
+            "neutral": (frame["sentiment"] == "neutral").astype(int),
+            "negative": (frame["sentiment"] == "negative").astype(int),
+            "sentiment_sum": score.fillna(0.0),
+            "sentiment_n": score.notna().astype(int),
+            "churn_alerts": frame["churn_alert"].astype(int)
+        })
+        return columns.groupby(["bucket", "agent_id", "site"], as_index=False).sum()
+
+    def trend(self, grain: str = "weekly", start: Optional[date] = None, end: Optional[date] = None,
+              agents: Iterable[str] = (), sites: Iterable[str] = ()) -> pd.DataFrame:
+        """Per-bucket totals plus response rate (%) and average sentiment, oldest first"""
+        if grain not in ("daily", "weekly"):
+            raise ValueError(f"Unknown grain: {grain}")
+        clauses, params = [], []
+        if start:
+            clauses.append("bucket >= ?")
+            params.append(start.isoformat())
+        if end:
+            clauses.append("bucket <= ?")
+            params.append(end.isoformat())
+        for column, values in (("agent_id", list(agents)), ("site", list(sites))):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._connect() as conn:
+            frame = pd.read_sql_query(
+                f"SELECT bucket, {', '.join(f'SUM({m}) AS {m}' for m in METRICS)} "
+                f"FROM {grain} {where} GROUP BY bucket ORDER BY bucket",
+                conn, params=params
+            )
+        frame["bucket"] = pd.to_datetime(frame["bucket"])
+        frame = frame.set_index("bucket")
+        frame["response_rate"] = (frame["responded"] / frame["sent"].where(frame["sent"] > 0) * 100).round(1)
+        frame["avg_sentiment"] = (frame["sentiment_sum"] / frame["sentiment_n"].where(frame["sentiment_n"] > 0)).round(3)
+        return frame
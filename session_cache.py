@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+import streamlit as st
+from api_client import api_client, tenant_id
+from document_index import DocumentIndex
+from metrics import api_metrics, run_in_page
+import profiling
+from shared_cache import shared_cache
+
+# How long a cached API read stays fresh (seconds)
+CACHE_TTL = 120
+
+# Page size used by the employee directory (matches APIClient.get_employees default)
+EMPLOYEE_PAGE_SIZE = 50
+
+# Reads that are the same for everyone in a company: kept once per tenant in the
+# process-wide shared cache instead of once per session
+SHARED_CALLS = {"get_agents", "get_documents", "get_dashboard_summary", "get_sentiment_breakdown",
+                "get_roi_metrics", "get_employee_directory"}
+
+# Shared by every session on this server; prefetch work never blocks a script run
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+
+def _get_cache() -> Dict[Tuple, Tuple[Any, float]]:
+    """Get this session's cache dict, creating it on first use"""
+    if "api_cache" not in st.session_state:
+        st.session_state.api_cache = {}
+    return st.session_state.api_cache
+
+
+def _cache_key(fn: Callable, args: Tuple) -> Tuple:
+    """Key a call by method name and its arguments after the token"""
+    return (fn.__name__,) + tuple(args[1:])
+
+
+def cached_call(fn: Callable, *args, ttl: float = CACHE_TTL) -> Any:
+    """Call an APIClient read method, serving it from the session cache when fresh.
+
+    The first argument must be the auth token; it is left out of the cache key
+    because the cache is cleared whenever the session logs in or out. Calls in
+    SHARED_CALLS are served from the cache shared by the token's tenant.
+    """
+    key = _cache_key(fn, args)
+    if fn.__name__ in SHARED_CALLS:
+        with profiling.phase("api"):
+            return shared_cache.get(tenant_id(args[0]), key, lambda: fn(*args), ttl)
+
+    cache = _get_cache()
+    entry = cache.get(key)
+
+    if entry is not None:
+        value, stored_at = entry
+        if isinstance(value, Future):
+            # Prefetch still in flight (or done) - wait for it instead of refetching
+            try:
+                with profiling.phase("api"):
+                    value = value.result()
+                cache[key] = (value, stored_at)
+            except Exception:
+                value = None
+                cache.pop(key, None)
+                stored_at = 0
+        if stored_at and time.time() - stored_at < ttl:
+            api_metrics.record_session_hit(fn.__name__)
+            return value
+
+    with profiling.phase("api"):
+        value = fn(*args)
+    cache[key] = (value, time.time())
+    return value
+
+
+def invalidate(*names: str):
+    """Drop cached entries for the given APIClient method names (all entries if none given).
+
+    Shared entries are dropped for the whole tenant, so other sessions see the change too.
+    """
+    cache = _get_cache()
+    for key in list(cache.keys()):
+        if not names or key[0] in names:
+            cache.pop(key, None)
+    if st.session_state.get("token") and (not names or SHARED_CALLS.intersection(names)):
+        shared_cache.invalidate(tenant_id(st.session_state.token), lambda key: not names or key[0] in names)
+
+
+def clear():
+    """Drop the whole session cache (on login/logout)"""
+    st.session_state.api_cache = {}
+
+
+def prefetch(token: str):
+    """Warm the session and shared caches right after login.
+
+    Agents and the dashboard summary/sentiment/ROI are fetched concurrently
+    (unless another session of the tenant already has them) and the document
+    index is synced; once agents arrive, the first employee page of each agent
+    is fetched too. The employee directory downloads every employee of every
+    agent, so it is left to the first page that needs it. Futures
+    are stored in the cache so a page that needs a value before it lands waits
+    for the in-flight request rather than issuing its own.
+    """
+    clear()
+    cache = _get_cache()
+
+    def submit(fn: Callable, *args) -> Future:
+        if fn.__name__ in SHARED_CALLS:
+            # Warms the tenant's shared entry; a page needing it meanwhile waits on the same load
+            return _executor.submit(run_in_page, "prefetch", shared_cache.get, tenant_id(token),
+                                    _cache_key(fn, args), lambda: fn(*args), CACHE_TTL)
+        future = _executor.submit(run_in_page, "prefetch", fn, *args)
+        cache[_cache_key(fn, args)] = (future, time.time())
+        return future
+
+    def warm_employees(agents_future: Future):
+        try:
+            agents = agents_future.result()
+        except Exception:
+            return
+        for agent in agents:
+            submit(api_client.get_employees, token, agent['id'], 1, EMPLOYEE_PAGE_SIZE)
+
+    submit(api_client.get_agents, token).add_done_callback(warm_employees)
+    # Bring the tenant's on-disk document index up to date for the configuration page
+    _executor.submit(run_in_page, "prefetch", lambda: DocumentIndex(token).sync())
+    submit(api_client.get_dashboard_summary, token)
+    submit(api_client.get_sentiment_breakdown, token)
+    submit(api_client.get_roi_metrics, token)
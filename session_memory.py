@@ -0,0 +1,216 @@
+import os
+import shutil
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, List
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from shared_cache import sizeof
+import exports
+
+# Memory a session may hold before its largest objects are spilled or dropped
+SESSION_BUDGET_BYTES = int(os.getenv("CXAI_SESSION_BUDGET_MB", "64")) * 1024 * 1024
+
+# Sessions without a rerun for this long give up everything reclaimable (seconds)
+IDLE_SECONDS = float(os.getenv("CXAI_SESSION_IDLE_MINUTES", "15")) * 60
+
+# Where spilled objects are written, one directory per session
+SPILL_DIR = os.path.join(os.getenv("CXAI_DATA_DIR", ".cxai_data"), "spill")
+
+# A session's state is measured at most this often, and idle sessions are
+# checked at most this often by whichever session reruns next (seconds)
+MEASURE_INTERVAL = 5
+SWEEP_INTERVAL = 30
+
+# Session keys holding only cached or display-only data, safe to drop
+DROPPABLE = {"api_cache"}
+
+# Session state key holding the session's _Handle
+HANDLE_KEY = "_session_memory"
+
+_sessions: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+class _Handle:
+    """Kept in a session's own state so the registry can hold a weak reference that dies with the session.
+
+    Its lock is held while the session reruns and while its state is
+    measured or reclaimed, so a sweep never spills or drops values that
+    the session's script is using.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.lock = threading.RLock()
+
+
+def _handle(ctx) -> _Handle:
+    """This session's handle; the thread-safe wrapper around its SessionState only lives as long as one script runner"""
+    state = object.__getattribute__(ctx.session_state, "_state")
+    if HANDLE_KEY not in state:
+        state[HANDLE_KEY] = _Handle(state)
+    return state[HANDLE_KEY]
+
+
+def footprint(value: Any) -> int:
+    """Approximate memory held by a session state value"""
+    if hasattr(value, "memory_bytes"):
+        return value.memory_bytes()
+    return sizeof(value)
+
+
+def _measure(state) -> Dict[str, int]:
+    """Bytes per key of a session's state"""
+    sizes = {}
+    for key in list(state.filtered_state):
+        if key == HANDLE_KEY:
+            continue
+        try:
+            sizes[key] = footprint(state[key])
+        except KeyError:
+            continue
+    return sizes
+
+
+def _reclaim(session_id: str, state, sizes: Dict[str, int], target: int) -> Dict[str, int]:
+    """Spill or drop the largest reclaimable values until the session is within target bytes"""
+    freed = {"spilled": 0, "dropped": 0}
+    total = sum(sizes.values())
+    for key in sorted(sizes, key=sizes.get, reverse=True):
+        if total <= target:
+            break
+        value = state[key]
+        if hasattr(value, "spill"):
+            released = value.spill(os.path.join(SPILL_DIR, session_id))
+            freed["spilled"] += released
+        elif key in DROPPABLE:
+            released = sizes[key]
+            del state[key]
+            freed["dropped"] += released
+        else:
+            continue
+        total -= released
+    return freed
+
+
+def _record(session_id: str, handle: _Handle, sizes: Dict[str, int], freed: Dict[str, int], active: bool):
+    state = handle.state
+    entry = _sessions.setdefault(session_id, {
+        "session_id": session_id, "handle": weakref.ref(handle), "last_active": time.time(), "measured_at": 0.0,
+        "spilled_bytes": 0, "dropped_bytes": 0, "reclaims": 0})
+    entry["measured_at"] = time.time()
+    if active:
+        entry["last_active"] = time.time()
+    customer = state["customer"] if "customer" in state else None
+    entry["user"] = (customer or {}).get("email", "") if isinstance(customer, dict) else ""
+    entry["bytes"] = sum(sizes.values()) - freed["spilled"] - freed["dropped"]
+    entry["largest"] = max(sizes, key=sizes.get) if sizes else ""
+    entry["spilled_bytes"] += freed["spilled"]
+    entry["dropped_bytes"] += freed["dropped"]
+    entry["reclaims"] += int(bool(freed["spilled"] or freed["dropped"]))
+
+
+@contextmanager
+def in_use():
+    """Hold this session's lock for the rest of a rerun; wrap the script's use of session state in it"""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        yield
+        return
+    with _handle(ctx).lock:
+        yield
+
+
+def track():
+    """Measure this session's state and keep it within budget; call at the end of every rerun.
+
+    Also reclaims everything it can from sessions idle longer than
+    IDLE_SECONDS, and forgets sessions that no longer exist, deleting
+    their spilled and exported files.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    handle = _handle(ctx)
+    now = time.time()
+    with _lock:
+        entry = _sessions.get(ctx.session_id)
+        recent = entry is not None and now - entry["measured_at"] < MEASURE_INTERVAL
+        if recent:
+            entry["last_active"] = now
+
+    if not recent:
+        with handle.lock:
+            sizes = _measure(handle.state)
+            freed = {"spilled": 0, "dropped": 0}
+            if sum(sizes.values()) > SESSION_BUDGET_BYTES:
+                freed = _reclaim(ctx.session_id, handle.state, sizes, SESSION_BUDGET_BYTES)
+        with _lock:
+            _record(ctx.session_id, handle, sizes, freed, active=True)
+    sweep()
+
+
+def sweep(force: bool = False):
+    """Reclaim memory from idle sessions and delete old exports (at most once per SWEEP_INTERVAL unless forced)"""
+    global _last_sweep
+    now = time.time()
+    ctx = get_script_run_ctx()
+    current = ctx.session_id if ctx else None
+    idle = []
+    with _lock:
+        if not force and now - _last_sweep < SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+        for session_id, entry in list(_sessions.items()):
+            handle = entry["handle"]()
+            if handle is None:
+                # Session is gone; so is anything it spilled or prepared for download
+                del _sessions[session_id]
+                shutil.rmtree(os.path.join(SPILL_DIR, session_id), ignore_errors=True)
+                exports.discard_session(session_id)
+            elif session_id != current and now - entry["last_active"] >= IDLE_SECONDS:
+                idle.append((session_id, handle))
+    exports.prune()
+
+    for session_id, handle in idle:
+        # A session holding its lock is rerunning, so it isn't idle after all
+        if not handle.lock.acquire(blocking=False):
+            continue
+        try:
+            sizes = _measure(handle.state)
+            freed = _reclaim(session_id, handle.state, sizes, 0)
+        finally:
+            handle.lock.release()
+        with _lock:
+            _record(session_id, handle, sizes, freed, active=False)
+
+
+# ============ VIEWS ============
+
+def session_rows() -> List[Dict[str, Any]]:
+    """Per-session footprint as of its last rerun or sweep, largest first"""
+    now = time.time()
+    with _lock:
+        entries = [dict(e) for e in _sessions.values() if e["handle"]() is not None]
+    rows = [{
+        "session": e["session_id"][:8], "user": e["user"], "mb": round(e["bytes"] / 2 ** 20, 2),
+        "largest": e["largest"], "idle_s": int(now - e["last_active"]),
+        "spilled_mb": round(e["spilled_bytes"] / 2 ** 20, 2), "dropped_mb": round(e["dropped_bytes"] / 2 ** 20, 2),
+        "reclaims": e["reclaims"]
+    } for e in entries]
+    return sorted(rows, key=lambda r: r["mb"], reverse=True)
+
+
+def totals() -> Dict[str, Any]:
+    rows = session_rows()
+    return {
+        "sessions": len(rows),
+        "mb": round(sum(r["mb"] for r in rows), 2),
+        "spilled_mb": round(sum(r["spilled_mb"] for r in rows), 2),
+        "dropped_mb": round(sum(r["dropped_mb"] for r in rows), 2),
+        "budget_mb": SESSION_BUDGET_BYTES / 2 ** 20,
+        "idle_minutes": IDLE_SECONDS / 60
+    }
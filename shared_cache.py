@@ -0,0 +1,178 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Cap on everything held across tenants, and on any one tenant's share (bytes)
+MAX_BYTES = int(os.getenv("CXAI_SHARED_CACHE_MB", "256")) * 1024 * 1024
+TENANT_MAX_BYTES = int(os.getenv("CXAI_SHARED_CACHE_TENANT_MB", "32")) * 1024 * 1024
+
+
+def sizeof(value: Any) -> int:
+    """Approximate memory held by a decoded JSON value (containers and their contents)"""
+    seen = set()
+    total = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return total
+
+
+class SharedCache:
+    """Process-wide LRU cache of tenant-global API reads, shared by every session of a tenant.
+
+    Entries are keyed by (tenant, key). A miss loads the value once, with
+    concurrent sessions waiting on the same load. Stored values are shared
+    between sessions and must be treated as read-only. Least recently used
+    entries are evicted when a tenant goes over its quota or the cache over
+    its global cap.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES, tenant_max_bytes: int = TENANT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.tenant_max_bytes = tenant_max_bytes
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Drop every entry and reset the stats"""
+        with self._lock:
+            self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, float, int]]" = OrderedDict()
+            self._loading: Dict[Tuple[str, Hashable], Future] = {}
+            self._bytes = 0
+            self._tenants: Dict[str, Dict[str, int]] = {}
+            # Bumped by invalidate() (replaced by clear()); loads started under an older generation aren't stored
+            self._generations: Dict[str, int] = {}
+
+    def _tenant(self, tenant: str) -> Dict[str, int]:
+        return self._tenants.setdefault(tenant, {"hits": 0, "misses": 0, "waits": 0, "evictions": 0,
+                                                 "bytes": 0, "entries": 0})
+
+    def get(self, tenant: str, key: Hashable, load: Callable[[], Any], ttl: float) -> Any:
+        """Cached value for the tenant and key if younger than ttl, otherwise load() it (once)"""
+        k = (tenant, key)
+        with self._lock:
+            stats = self._tenant(tenant)
+            entry = self._entries.get(k)
+            if entry is not None and time.time() - entry[1] < ttl:
+                self._entries.move_to_end(k)
+                stats["hits"] += 1
+                return entry[0]
+            future = self._loading.get(k)
+            loading = future is None
+            if loading:
+                future = self._loading[k] = Future()
+                generations = self._generations
+                generation = generations.get(tenant, 0)
+                stats["misses"] += 1
+            else:
+                stats["waits"] += 1
+
+        if not loading:
+            return future.result()
+        try:
+            value = load()
+        except Exception as e:
+            with self._lock:
+                self._finish(k, future)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._finish(k, future)
+            # Invalidated or cleared while loading: the value may predate the change, so don't keep it
+            if self._generations is generations and generations.get(tenant, 0) == generation:
+                self._store(k, value)
+        future.set_result(value)
+        return value
+
+    def _finish(self, k: Tuple[str, Hashable], future: Future):
+        if self._loading.get(k) is future:
+            del self._loading[k]
+
+    def _store(self, k: Tuple[str, Hashable], value: Any):
+        tenant = k[0]
+        size = sizeof(value)
+        self._discard(k)
+        if size > min(self.tenant_max_bytes, self.max_bytes):
+            return
+        self._entries[k] = (value, time.time(), size)
+        self._bytes += size
+        stats = self._tenant(tenant)
+        stats["bytes"] += size
+        stats["entries"] += 1
+
+        # Over quota: the tenant's own least recently used entries go first, then anyone's
+        if stats["bytes"] > self.tenant_max_bytes:
+            for old in [key for key in self._entries if key[0] == tenant]:
+                if stats["bytes"] <= self.tenant_max_bytes:
+                    break
+                self._discard(old, evicted=True)
+        for old in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            self._discard(old, evicted=True)
+
+    def _discard(self, k: Tuple[str, Hashable], evicted: bool = False):
+        entry = self._entries.pop(k, None)
+        if entry is None:
+            return
+        stats = self._tenant(k[0])
+        self._bytes -= entry[2]
+        stats["bytes"] -= entry[2]
+        stats["entries"] -= 1
+        stats["evictions"] += int(evicted)
+
+    def invalidate(self, tenant: str, match: Optional[Callable[[Hashable], bool]] = None):
+        """Drop a tenant's entries (only those whose key matches, if given), including loads in flight"""
+        with self._lock:
+            self._generations[tenant] = self._generations.get(tenant, 0) + 1
+            for k in [k for k in self._entries if k[0] == tenant and (match is None or match(k[1]))]:
+                self._discard(k)
+            # Later lookups start a fresh load instead of waiting on one that may return pre-change data
+            for k in [k for k in self._loading if k[0] == tenant and (match is None or match(k[1]))]:
+                del self._loading[k]
+
+    # ============ VIEWS ============
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals across tenants"""
+        with self._lock:
+            tenants = [dict(s) for s in self._tenants.values()]
+            total = {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                     "tenant_max_bytes": self.tenant_max_bytes, "tenants": len(self._tenants)}
+        for field in ("hits", "misses", "waits", "evictions"):
+            total[field] = sum(t[field] for t in tenants)
+        lookups = total["hits"] + total["misses"] + total["waits"]
+        total["hit_rate"] = round((total["hits"] + total["waits"]) / lookups, 4) if lookups else 0.0
+        return total
+
+    def tenant_rows(self) -> List[Dict[str, Any]]:
+        """Per-tenant usage and hit rate, largest first"""
+        with self._lock:
+            tenants = {tenant: dict(s) for tenant, s in self._tenants.items()}
+        rows = []
+        for tenant, s in tenants.items():
+            lookups = s["hits"] + s["misses"] + s["waits"]
+            rows.append({
+                "tenant": tenant, "entries": s["entries"], "kb": round(s["bytes"] / 1024, 1),
+                "quota_used": round(s["bytes"] / self.tenant_max_bytes, 4),
+                "hits": s["hits"], "misses": s["misses"], "waits": s["waits"], "evictions": s["evictions"],
+                "hit_rate": round((s["hits"] + s["waits"]) / lookups, 4) if lookups else 0.0
+            })
+        return sorted(rows, key=lambda r: r["kb"], reverse=True)
+
+
+# Process-wide cache shared by every session
+shared_cache = SharedCache()
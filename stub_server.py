@@ -0,0 +1,492 @@
+"""Local stand-in for the FastAPI backend, for benchmarks and offline development.
+
+Implements every endpoint APIClient calls against a synthetic in-memory
+dataset, with configurable latency, jitter and injected error rate:
+
+    python stub_server.py --port 8000 --latency-ms 40 --jitter-ms 15 --error-rate 0.01
+    API_BASE_URL=http://localhost:8000/v1 streamlit run main.py
+
+Any email/password logs in; unknown emails get a freshly seeded tenant. Access tokens
+expire after --token-ttl seconds and are renewed with single-use refresh tokens.
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SITES = ["Main Site", "North Warehouse", "South Warehouse", "Downtown Store", "Airport Hub"]
+FIRST_NAMES = ["Ana", "Ben", "Carla", "Dev", "Elena", "Femi", "Gus", "Hana", "Ivan", "Jo", "Kai", "Lena"]
+LAST_NAMES = ["Diaz", "Smith", "Okafor", "Nguyen", "Rossi", "Kim", "Patel", "Moreau", "Silva", "Cohen"]
+VOICES = ["Adam", "Sarah", "Dorothy", "Josh", "Maya", "Chris", "James"]
+FLOWS = ["retention_checkin", "payroll_help", "safety_report"]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def make_token(tenant_id: str, email: str, ttl_seconds: int) -> str:
+    """Unsigned JWT-shaped token carrying tenant id and expiry (the stub trusts it)"""
+    def encode(data: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+    claims = {"sub": email, "customer_id": tenant_id, "exp": int(time.time()) + ttl_seconds,
+              "jti": uuid.uuid4().hex}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.stub"
+
+
+def read_token(token: str) -> Optional[Dict[str, Any]]:
+    try:
+        payload = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except Exception:
+        return None
+
+
+class StubBackend:
+    """Synthetic multi-tenant dataset and the request handling on top of it"""
+
+    def __init__(self, agents: int = 3, employees_per_agent: int = 200, checkins: int = 5000,
+                 documents: int = 50, shared_employee_ratio: float = 0.1, latency_ms: float = 0,
+                 jitter_ms: float = 0, error_rate: float = 0.0, token_ttl: int = 3600,
+                 compress_min_bytes: int = 1024, bulk: bool = True, seed: int = 0):
+        self.agents = agents
+        self.employees_per_agent = employees_per_agent
+        self.checkins = checkins
+        self.documents = documents
+        self.shared_employee_ratio = shared_employee_ratio
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.compress_min_bytes = compress_min_bytes
+        self.bulk = bulk
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.tenants: Dict[str, Dict[str, Any]] = {}
+        self.accounts: Dict[str, str] = {}
+        # refresh token -> (tenant id, email); each one is single-use
+        self.refresh_tokens: Dict[str, Tuple[str, str]] = {}
+        self.lock = threading.Lock()
+
+    # ============ DATASET ============
+
+    def _new_tenant(self, email: str, company_name: str = "Stub Co", seeded: bool = True) -> str:
+        tenant_id = uuid.UUID(int=random.Random(f"{self.seed}:{email}").getrandbits(128)).hex
+        rng = random.Random(f"{self.seed}:{tenant_id}")
+        tenant = {"id": tenant_id, "company_name": company_name, "agents": {}, "employees": {},
+                  "checkins": {}, "documents": []}
+        self.tenants[tenant_id] = tenant
+        self.accounts[email] = tenant_id
+        if not seeded:
+            return tenant_id
+
+        created = _now() - timedelta(days=400)
+        people = []
+        for a in range(self.agents):
+            agent = self._make_agent(tenant, {
+                "name": f"Agent {a + 1}", "description": "Seeded agent",
+                "tone_score": round(rng.random(), 1), "voice_name": rng.choice(VOICES),
+                "instructions": "You are a friendly HR assistant.",
+                "flows_enabled": {flow: rng.random() < 0.6 for flow in FLOWS}
+            })
+            agent["status"] = "active" if a % 2 == 0 else "draft"
+            for e in range(self.employees_per_agent):
+                if people and rng.random() < self.shared_employee_ratio:
+                    person = dict(rng.choice(people))
+                else:
+                    person = {
+                        "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES),
+                        "phone": f"+1555{rng.randrange(10 ** 7):07d}",
+                        "hire_date": (created + timedelta(days=rng.randrange(400))).date().isoformat(),
+                        "manager_name": rng.choice(FIRST_NAMES), "site_location": rng.choice(SITES),
+                        "department": "Operations"
+                    }
+                    person["email"] = f"{person['first_name']}.{person['last_name']}{e}@example.com".lower()
+                    people.append(person)
+                self._make_employee(tenant, agent["id"], person)
+
+        employee_ids = list(tenant["employees"].keys())
+        span = 365 * 24 * 3600
+        for _ in range(self.checkins if employee_ids else 0):
+            employee = tenant["employees"][rng.choice(employee_ids)]
+            responded = rng.random() < 0.75
+            score = round(rng.uniform(-1, 1), 3) if responded else None
+            checkin = {
+                "id": uuid.UUID(int=rng.getrandbits(128)).hex,
+                "agent_id": employee["agent_id"], "employee_id": employee["id"],
+                "flow_name": rng.choice(FLOWS),
+                "status": "responded" if responded else "sent",
+                "sentiment_score": score,
+                "churn_risk": round(rng.random(), 3) if responded else None,
+                "created_at": (_now() - timedelta(seconds=rng.randrange(span))).isoformat(),
+                "messages": []
+            }
+            tenant["checkins"][checkin["id"]] = checkin
+
+        for d in range(self.documents):
+            tenant["documents"].append({
+                "id": uuid.UUID(int=rng.getrandbits(128)).hex,
+                "filename": f"{rng.choice(['Handbook', 'Payroll', 'Safety', 'Benefits', 'PTO'])}_policy_{d + 1}.pdf",
+                "size_bytes": rng.randrange(20_000, 5_000_000),
+                "tags": rng.sample(["hr", "payroll", "safety", "benefits", "onboarding"], 2),
+                "updated_at": (_now() - timedelta(days=rng.randrange(365))).isoformat()
+            })
+        return tenant_id
+
+    def _make_agent(self, tenant: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+        agent = {"id": uuid.uuid4().hex, "status": "draft", "language": "en", "knowledge_base_ids": [],
+                 "created_at": _now().isoformat()}
+        agent.update(data)
+        tenant["agents"][agent["id"]] = agent
+        return agent
+
+    def _make_employee(self, tenant: Dict[str, Any], agent_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        employee = dict(data, id=uuid.uuid4().hex, agent_id=agent_id, created_at=_now().isoformat())
+        tenant["employees"][employee["id"]] = employee
+        return employee
+
+    # ============ REQUEST HANDLING ============
+
+    def delay(self):
+        """Sleep for the configured latency plus uniform jitter"""
+        seconds = (self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def handle(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str],
+               body: Any) -> Tuple[int, Any]:
+        """Dispatch one request; returns (status, JSON-able payload)"""
+        if path == "/health":
+            return 200, {"status": "healthy", "version": "stub"}
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return 500, {"error": "Injected stub failure"}
+
+        route = path[len("/v1"):] if path.startswith("/v1") else path
+        if route == "/auth/signup" and method == "POST":
+            return self.signup(body)
+        if route == "/auth/login" and method == "POST":
+            return self.login(body)
+        if route == "/auth/refresh" and method == "POST":
+            return self.refresh(body)
+
+        auth = headers.get("authorization", "")
+        claims = read_token(auth[len("Bearer "):]) if auth.startswith("Bearer ") else None
+        if not claims or claims.get("exp", 0) < time.time():
+            return 401, {"detail": "Token expired or invalid"}
+        with self.lock:
+            tenant = self.tenants.get(claims.get("customer_id"))
+            if tenant is None:
+                return 401, {"detail": "Unknown tenant"}
+            return self.dispatch(tenant, method, route, query, body)
+
+    def signup(self, body: Dict[str, Any]) -> Tuple[int, Any]:
+        with self.lock:
+            if body.get("email") in self.accounts:
+                return 400, {"error": "Email already registered"}
+            tenant_id = self._new_tenant(body["email"], body.get("company_name", "Stub Co"), seeded=False)
+            return 200, self._issue_tokens(tenant_id, body["email"])
+
+    def login(self, body: Dict[str, Any]) -> Tuple[int, Any]:
+        email = body.get("email")
+        if not email or not body.get("password"):
+            return 401, {"error": "Invalid credentials"}
+        with self.lock:
+            tenant_id = self.accounts.get(email) or self._new_tenant(email)
+            return 200, self._issue_tokens(tenant_id, email)
+
+    def refresh(self, body: Dict[str, Any]) -> Tuple[int, Any]:
+        with self.lock:
+            issued = self.refresh_tokens.pop((body or {}).get("refresh_token"), None)
+            if issued is None:
+                return 401, {"detail": "Invalid refresh token"}
+            return 200, self._issue_tokens(*issued)
+
+    def _issue_tokens(self, tenant_id: str, email: str) -> Dict[str, Any]:
+        refresh_token = uuid.uuid4().hex
+        self.refresh_tokens[refresh_token] = (tenant_id, email)
+        return {"access_token": make_token(tenant_id, email, self.token_ttl), "refresh_token": refresh_token,
+                "token_type": "bearer", "expires_in": self.token_ttl}
+
+    def dispatch(self, tenant: Dict[str, Any], method: str, route: str, query: Dict[str, str],
+                 body: Any) -> Tuple[int, Any]:
+        page = int(query.get("page", 1))
+        limit = int(query.get("limit", 50))
+
+        if route == "/agents":
+            if method == "GET":
+                return 200, {"agents": list(tenant["agents"].values())}
+            return 200, self._make_agent(tenant, body or {})
+
+        match = re.fullmatch(r"/agents/([^/]+)(/activate)?", route)
+        if match:
+            agent = tenant["agents"].get(match.group(1))
+            if agent is None:
+                return 404, {"detail": "Agent not found"}
+            if match.group(2):
+                agent["status"] = "active"
+            elif method == "PATCH":
+                agent.update(body or {})
+            return 200, agent
+
+        if route == "/employees/bulk" and method == "POST" and self.bulk:
+            if query.get("agent_id") not in tenant["agents"]:
+                return 404, {"detail": "Agent not found"}
+            rows = body.get("employees", []) if isinstance(body, dict) else body or []
+            return 200, self.upsert_employees(tenant, query["agent_id"], rows)
+
+        if route == "/employees":
+            agent_id = query.get("agent_id")
+            if agent_id not in tenant["agents"]:
+                return 404, {"detail": "Agent not found"}
+            if method == "POST":
+                if not (body or {}).get("phone"):
+                    return 422, {"detail": [{"msg": "phone is required"}]}
+                return 200, self._make_employee(tenant, agent_id, body)
+            employees = [e for e in tenant["employees"].values() if e["agent_id"] == agent_id]
+            return 200, {"employees": employees[(page - 1) * limit:page * limit], "total": len(employees),
+                         "page": page, "limit": limit}
+
+        if route == "/check-ins":
+            if method == "POST":
+                checkin = {"id": uuid.uuid4().hex, "status": "sent", "created_at": _now().isoformat(),
+                           "sentiment_score": None, "churn_risk": None, "messages": []}
+                checkin.update(body or {})
+                tenant["checkins"][checkin["id"]] = checkin
+                return 200, checkin
+            rows = sorted(tenant["checkins"].values(), key=lambda c: c["created_at"])
+            since, until = query.get("since"), query.get("until")
+            rows = [
+                {k: v for k, v in c.items() if k != "messages"} for c in rows
+                if (not query.get("agent_id") or c["agent_id"] == query["agent_id"])
+                and (not since or _parse_time(c["created_at"]) >= _parse_time(since))
+                and (not until or _parse_time(c["created_at"]) < _parse_time(until))
+            ]
+            return 200, {"check_ins": rows[(page - 1) * limit:page * limit], "total": len(rows),
+                         "page": page, "limit": limit}
+
+        match = re.fullmatch(r"/check-ins/([^/]+)(/message)?", route)
+        if match:
+            checkin = tenant["checkins"].get(match.group(1))
+            if checkin is None:
+                return 404, {"detail": "Check-in not found"}
+            if match.group(2):
+                checkin["messages"].append({"role": "user", "content": body.get("user_message", "")})
+                checkin["status"] = "responded"
+                reply = "Thanks for letting me know - I've passed this along."
+                checkin["messages"].append({"role": "assistant", "content": reply})
+                return 200, {"ai_response": reply, "check_in_id": checkin["id"]}
+            return 200, checkin
+
+        if route.startswith("/dashboard/"):
+            return 200, self.dashboard(tenant, route[len("/dashboard/"):])
+
+        if route == "/documents":
+            # Without a page parameter, answer every document at once like the original endpoint
+            if "page" not in query:
+                return 200, {"documents": tenant["documents"]}
+            since = query.get("updated_since")
+            rows = sorted(
+                (d for d in tenant["documents"]
+                 if not since or _parse_time(d["updated_at"]) >= _parse_time(since)),
+                key=lambda d: (d["updated_at"], d["id"])
+            )
+            return 200, {"documents": rows[(page - 1) * limit:page * limit], "total": len(rows),
+                         "page": page, "limit": limit}
+
+        return 404, {"detail": f"No stub route for {method} {route}"}
+
+    def upsert_employees(self, tenant: Dict[str, Any], agent_id: str, rows: List[Any]) -> Dict[str, Any]:
+        """Create or update (matched by phone digits) each row under an agent"""
+        by_phone = {re.sub(r"\D", "", e.get("phone") or ""): e
+                    for e in tenant["employees"].values() if e["agent_id"] == agent_id}
+        results = []
+        for index, row in enumerate(rows):
+            phone = re.sub(r"\D", "", str((row or {}).get("phone") or "")) if isinstance(row, dict) else ""
+            if not phone:
+                results.append({"index": index, "status": "error", "error": "phone is required"})
+            elif phone in by_phone:
+                by_phone[phone].update({k: v for k, v in row.items() if k not in ("id", "agent_id")})
+                results.append({"index": index, "status": "updated", "employee": by_phone[phone]})
+            else:
+                by_phone[phone] = self._make_employee(tenant, agent_id, row)
+                results.append({"index": index, "status": "created", "employee": by_phone[phone]})
+        return {"results": results,
+                "created": sum(1 for r in results if r["status"] == "created"),
+                "updated": sum(1 for r in results if r["status"] == "updated"),
+                "failed": sum(1 for r in results if r["status"] == "error")}
+
+    def dashboard(self, tenant: Dict[str, Any], name: str) -> Dict[str, Any]:
+        cutoff = _now() - timedelta(days=30)
+        recent = [c for c in tenant["checkins"].values() if _parse_time(c["created_at"]) >= cutoff]
+        responded = [c for c in recent if c["status"] != "sent"]
+        if name == "summary":
+            return {
+                "check_ins_sent_30d": len(recent),
+                "response_rate": len(responded) / len(recent) if recent else 0,
+                "churn_alerts_this_month": sum(1 for c in responded if (c.get("churn_risk") or 0) >= 0.7)
+            }
+        if name == "sentiment":
+            buckets = {"positive": 0, "neutral": 0, "negative": 0}
+            for c in responded:
+                score = c.get("sentiment_score") or 0
+                buckets["positive" if score >= 0.25 else "negative" if score <= -0.25 else "neutral"] += 1
+            return {label: {"count": count} for label, count in buckets.items()}
+        return {"time_saved_hours": len(recent) * 0.1, "response_rate_improvement_pct": 35,
+                "estimated_savings": len(responded) * 12.5}
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """HTTP front end for a StubBackend (set as the server's .backend)"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per call
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_raw(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            if size == 0:
+                # Skip any trailers up to the blank line ending the body
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _read_body(self) -> Any:
+        raw = self._read_raw()
+        if raw and self.headers.get("Content-Encoding", "").lower() == "gzip":
+            raw = gzip.decompress(raw)
+        if not raw:
+            return None
+        if self.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+            return [json.loads(line) for line in raw.splitlines() if line.strip()]
+        return json.loads(raw)
+
+    def _encode(self, data: bytes, headers: Dict[str, str]) -> Tuple[bytes, Optional[str]]:
+        """Compress a body as the client's Accept-Encoding allows (br, then gzip)"""
+        backend: StubBackend = self.server.backend
+        if not backend.compress_min_bytes or len(data) < backend.compress_min_bytes:
+            return data, None
+        accepted = {value.split(";")[0].strip() for value in headers.get("accept-encoding", "").split(",")}
+        if brotli is not None and "br" in accepted:
+            return brotli.compress(data, quality=4), "br"
+        if "gzip" in accepted:
+            return gzip.compress(data, compresslevel=6), "gzip"
+        return data, None
+
+    def _respond(self):
+        backend: StubBackend = self.server.backend
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        headers = {k.lower(): v for k, v in self.headers.items()}
+        try:
+            body = self._read_body()
+        except ValueError:
+            status, payload = 400, {"error": "Invalid JSON"}
+        else:
+            backend.delay()
+            status, payload = backend.handle(self.command, url.path, query, headers, body)
+
+        data = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        if self.command == "GET" and status == 200 and headers.get("if-none-match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        data, encoding = self._encode(data, headers)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        if self.command == "GET" and status == 200:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _respond
+    do_POST = _respond
+    do_PATCH = _respond
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, **backend_options) -> Tuple[ThreadingHTTPServer, str]:
+    """Run a stub backend on a daemon thread; returns the server and its API base URL"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.backend = StubBackend(**backend_options)
+    threading.Thread(target=server.serve_forever, name="stub-backend", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+def add_backend_arguments(parser: argparse.ArgumentParser):
+    """CLI flags for StubBackend options (shared with the benchmark scripts)"""
+    parser.add_argument("--agents", type=int, default=3, help="Agents per seeded tenant")
+    parser.add_argument("--employees-per-agent", type=int, default=200)
+    parser.add_argument("--checkins", type=int, default=5000, help="Check-ins per seeded tenant (last 365 days)")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="Access token lifetime (seconds)")
+    parser.add_argument("--compress-min-bytes", type=int, default=1024,
+                        help="Compress responses at least this large when the client accepts it (0 = never)")
+    parser.add_argument("--no-bulk", dest="bulk", action="store_false",
+                        help="Leave out POST /employees/bulk, as an older backend would")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def backend_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "agents": args.agents, "employees_per_agent": args.employees_per_agent, "checkins": args.checkins,
+        "documents": args.documents, "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate, "token_ttl": args.token_ttl,
+        "compress_min_bytes": args.compress_min_bytes, "bulk": args.bulk, "seed": args.seed
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the local stand-in backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.backend = StubBackend(**backend_options(args))
+    print(f"Stub backend listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass